@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import os
+import sys
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# 시드 데이터로 돌리는 동안 sub의 발행 속도 제한에 걸리지 않도록 (app 임포트 전에 설정해야 적용된다)
+for _name in ("SENDER", "ROOM", "GLOBAL"):
+    os.environ.setdefault(f"ADMISSION_{_name}_RATE", "1000000")
+    os.environ.setdefault(f"ADMISSION_{_name}_BURST", "1000000")
+
+QA_FAST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(QA_FAST_DIR, "pub"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.Chat import chat_service  # noqa: E402
+from app.Chat.dm_cache import DM_CACHE_SIZE, DmRoomCache  # noqa: E402
+from app.Chat.transport import SUB_APP_DIR, SUB_PACKAGE, _load_sub_package  # noqa: E402
+from app.User import user_service  # noqa: E402
+from app.User.profile_cache import PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL, ProfileCache  # noqa: E402
+from app.db.session import engine  # noqa: E402
+
+
+# chat_service.py, user_service.py의 모든 서비스 함수와 sub의 메시지/룸 라우트.
+# 각 호출은 바깥 트랜잭션 안의 savepoint 세션에서 실행하고 끝나면 롤백하므로 쓰기 케이스도 데이터를 바꾸지 않는다.
+class Case:
+    def __init__(
+        self,
+        name: str,
+        call: Callable[[Session, Dict[str, Any]], Any],
+        setup: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.name = name
+        self.call = call
+        self.setup = setup
+
+
+# sub 라우트의 DB 의존성이 돌려줄 현재 롤백 세션
+_current: Dict[str, Session] = {}
+
+
+@contextmanager
+def rollback_session(bind: Engine = engine) -> Iterator[Session]:
+    with bind.connect() as conn:
+        trans = conn.begin()
+        try:
+            with Session(bind=conn, join_transaction_mode="create_savepoint", autoflush=False) as db:
+                _current["db"] = db
+                yield db
+        finally:
+            _current.pop("db", None)
+            trans.rollback()
+
+
+def _current_db() -> Iterator[Session]:
+    yield _current["db"]
+
+
+def sub_client() -> TestClient:
+    _load_sub_package(SUB_APP_DIR)
+    from importlib import import_module
+
+    sub_app = import_module(f"{SUB_PACKAGE}.main").app
+    sub_session = import_module(f"{SUB_PACKAGE}.db.session")
+    # sub 라우트도 같은 롤백 세션을 쓰도록 DB 의존성을 바꾼다 (startup 핸들러는 실행하지 않는다)
+    sub_app.dependency_overrides[sub_session.get_db] = _current_db
+    sub_app.dependency_overrides[sub_session.get_read_db] = _current_db
+    return TestClient(sub_app)
+
+
+def fixtures(bind: Engine = engine) -> Dict[str, Any]:
+    # 시드 데이터에서 케이스 인자로 쓸 대표 id를 고른다
+    with bind.connect() as conn:
+        one = lambda sql, **params: conn.execute(text(sql), params).scalar()  # noqa: E731
+        user = one("SELECT user_id FROM room_members ORDER BY room_id LIMIT 1")
+        if user is None:
+            raise SystemExit("no seeded data: run `python -m bench.seed` first")
+        room = one("SELECT room_id FROM room_members WHERE user_id = :user ORDER BY room_id LIMIT 1", user=user)
+        last = conn.execute(
+            text("SELECT id, sender_id, seq, version FROM message WHERE room_id = :room ORDER BY seq DESC LIMIT 1"),
+            {"room": room},
+        ).one()
+        return {
+            "user": user,
+            "room": room,
+            "friend": one("SELECT friend_user_id FROM friends WHERE user_id = :user LIMIT 1", user=user),
+            "stranger": one(
+                "SELECT id FROM users WHERE id <> :user AND id NOT IN"
+                " (SELECT friend_user_id FROM friends WHERE user_id = :user)"
+                " AND id NOT IN (SELECT user_id FROM room_members WHERE room_id = :room)"
+                " ORDER BY id DESC LIMIT 1",
+                user=user,
+                room=room,
+            ),
+            "username": one("SELECT username FROM users WHERE id = :user", user=user),
+            "parent": one("SELECT reply_to_id FROM message WHERE reply_to_id IS NOT NULL ORDER BY id DESC LIMIT 1"),
+            "message": last.id,
+            "sender": last.sender_id,
+            "last_seq": last.seq,
+            "last_version": last.version,
+            "last_change": one("SELECT max(change_id) FROM message"),
+        }
+
+
+def _ok(response) -> Any:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url}: {response.status_code} {response.text}")
+    return response.json()
+
+
+def _fresh_dm_cache() -> None:
+    # 캐시 히트가 아니라 DB 경로를 측정한다
+    chat_service.dm_rooms = DmRoomCache(DM_CACHE_SIZE)
+
+
+def _fresh_profile_cache() -> None:
+    user_service.profiles = ProfileCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL)
+
+
+def build_cases(client: TestClient) -> List[Case]:
+    c, u = chat_service, user_service
+    return [
+        # chat_service
+        Case("chat.create_room", lambda db, f: c.create_room(db, type="group", title="bench")),
+        Case("chat.list_rooms", lambda db, f: c.list_rooms(db, page=1, size=20)),
+        Case(
+            "chat.get_or_create_dm",
+            lambda db, f: c.get_or_create_dm(db, user_a=f["user"], user_b=f["stranger"]),
+            setup=_fresh_dm_cache,
+        ),
+        Case("chat.add_room_member", lambda db, f: c.add_room_member(db, room_id=f["room"], user_id=f["stranger"])),
+        Case("chat.remove_room_member", lambda db, f: c.remove_room_member(db, room_id=f["room"], user_id=f["user"])),
+        Case("chat.list_room_members", lambda db, f: c.list_room_members(db, room_id=f["room"], page=1, size=20)),
+        Case("chat.list_room_messages", lambda db, f: c.list_room_messages(db, room_id=f["room"], page=1, size=50)),
+        Case("chat.list_all_room_messages", lambda db, f: c.list_all_room_messages(db, room_id=f["room"])),
+        Case("chat.list_recent_messages", lambda db, f: c.list_recent_messages(db, room_id=f["room"], limit=50)),
+        Case(
+            "chat.list_recent_messages.before",
+            lambda db, f: c.list_recent_messages(db, room_id=f["room"], limit=50, before_seq=f["last_seq"] // 2),
+        ),
+        Case(
+            "chat.list_changes",
+            lambda db, f: c.list_changes(db, room_id=f["room"], since_version=max(f["last_version"] - 100, 0)),
+        ),
+        Case("chat.get_thread", lambda db, f: c.get_thread(db, message_id=f["parent"])),
+        Case("chat.list_user_rooms", lambda db, f: c.list_user_rooms(db, user_id=f["user"], limit=20)),
+        Case("chat.list_unread_counts", lambda db, f: c.list_unread_counts(db, user_id=f["user"])),
+        # user_service
+        Case("user.create_user", lambda db, f: u.create_user(db, username="bench_new_user")),
+        Case("user.update_user", lambda db, f: u.update_user(db, user_id=f["user"], status="away")),
+        Case("user.list_users", lambda db, f: u.list_users(db, page=1, size=20)),
+        Case("user.add_friend", lambda db, f: u.add_friend(db, user_id=f["user"], friend_user_id=f["stranger"])),
+        Case("user.delete_friend", lambda db, f: u.delete_friend(db, user_id=f["user"], friend_user_id=f["friend"])),
+        Case("user.list_friends", lambda db, f: u.list_friends(db, user_id=f["user"], page=1, size=20)),
+        Case(
+            "user.get_or_create_user_by_username",
+            lambda db, f: u.get_or_create_user_by_username(db, username=f["username"]),
+        ),
+        Case(
+            "user.get_users_by_ids",
+            lambda db, f: u.get_users_by_ids(db, ids=list(range(f["user"], f["user"] + 200))),
+            setup=_fresh_profile_cache,
+        ),
+        # sub routes
+        Case(
+            "sub.POST /messages",
+            lambda db, f: _ok(
+                client.post("/messages", json={"roomId": f["room"], "senderId": f["sender"], "content": "bench"})
+            ),
+        ),
+        Case("sub.GET /messages", lambda db, f: _ok(client.get("/messages", params={"roomId": f["room"], "limit": 50}))),
+        Case(
+            "sub.GET /messages?beforeSeq",
+            lambda db, f: _ok(
+                client.get("/messages", params={"roomId": f["room"], "limit": 50, "beforeSeq": f["last_seq"] // 2})
+            ),
+        ),
+        Case(
+            "sub.GET /messages/feed",
+            lambda db, f: _ok(client.get("/messages/feed", params={"afterChangeId": max(f["last_change"] - 500, 0)})),
+        ),
+        Case(
+            "sub.PATCH /messages/{id}",
+            lambda db, f: _ok(
+                client.patch(
+                    f"/messages/{f['message']}",
+                    json={"roomId": f["room"], "senderId": f["sender"], "content": "bench edit"},
+                )
+            ),
+        ),
+        Case(
+            "sub.DELETE /messages/{id}",
+            lambda db, f: _ok(
+                client.delete(f"/messages/{f['message']}", params={"roomId": f["room"], "senderId": f["sender"]})
+            ),
+        ),
+        Case(
+            "sub.GET /rooms/{id}/changes",
+            lambda db, f: _ok(
+                client.get(f"/rooms/{f['room']}/changes", params={"sinceVersion": max(f["last_version"] - 100, 0)})
+            ),
+        ),
+    ]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+
+# 서비스 함수가 실행한 SQL을 잡아 EXPLAIN (ANALYZE, BUFFERS)로 다시 실행하고,
+# 큰 테이블의 Seq Scan과 지연 시간 회귀를 찾는다. DB 없이 테스트할 수 있도록 판정 함수는 순수 함수로 둔다.
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+Statement = Tuple[str, Any]
+
+
+class StatementCapture:
+    def __init__(self) -> None:
+        self.statements: List[Statement] = []
+        self._local = threading.local()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if not getattr(self._local, "active", False):
+            return
+        if statement.lstrip().split(None, 1)[0].upper() not in _EXPLAINABLE:
+            return
+        if executemany and parameters:
+            parameters = parameters[0]
+        self.statements.append((statement, parameters))
+
+    @contextmanager
+    def capture(self) -> Iterator[List[Statement]]:
+        self.statements = []
+        self._local.active = True
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        try:
+            yield self.statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", self._on_execute)
+            self._local.active = False
+
+
+def explain(engine: Engine, statement: str, parameters: Any) -> Dict[str, Any]:
+    # 문장마다 새 트랜잭션에서 실행하고 롤백한다 (쓰기 문장도 DB에 남지 않는다).
+    # 원래 호출 안에서만 성립하는 문장(같은 트랜잭션에서 만든 행 참조 등)은 ANALYZE 없이 계획만 본다
+    for options in ("ANALYZE, BUFFERS, FORMAT JSON", "FORMAT JSON"):
+        with engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                plan = conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters or {}).scalar()
+            except DBAPIError as exc:
+                error = str(exc.orig)
+                continue
+            finally:
+                trans.rollback()
+        return {"sql": statement, "analyzed": options.startswith("ANALYZE"), "plan": plan[0]}
+    return {"sql": statement, "analyzed": False, "plan": None, "error": error}
+
+
+def walk(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from walk(child)
+
+
+def seq_scans(plan: Optional[Dict[str, Any]], reltuples: Dict[str, float], min_rows: float) -> List[str]:
+    # min_rows 이상인 테이블(파티션 포함)의 Seq Scan만 문제로 본다. 작은 테이블은 Seq Scan이 더 싸다
+    if not plan:
+        return []
+    found = []
+    for node in walk(plan["Plan"]):
+        if node.get("Node Type") != "Seq Scan":
+            continue
+        relation = node.get("Relation Name", "")
+        if reltuples.get(relation, 0) >= min_rows:
+            found.append(relation)
+    return sorted(set(found))
+
+
+def buffers(plan: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    root = (plan or {}).get("Plan", {})
+    return {"hit": root.get("Shared Hit Blocks", 0), "read": root.get("Shared Read Blocks", 0)}
+
+
+def percentile(samples: Sequence[float], p: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def regressions(
+    result: Dict[str, Any], baseline: Optional[Dict[str, Any]], tolerance: float, slack_ms: float
+) -> List[str]:
+    # 기준선에 없던 Seq Scan과, 기준선 p95의 tolerance배 + slack_ms를 넘는 지연을 실패로 본다.
+    # 기준선이 없으면 Seq Scan은 모두 실패, 지연은 비교하지 않는다
+    problems = []
+    accepted = set((baseline or {}).get("seqScans", ()))
+    new_scans = [relation for relation in result["seqScans"] if relation not in accepted]
+    if new_scans:
+        problems.append(f"seq scan on {', '.join(new_scans)}")
+    if baseline is not None:
+        limit = baseline["p95Ms"] * tolerance + slack_ms
+        if result["p95Ms"] > limit:
+            problems.append(f"p95 {result['p95Ms']:.2f}ms > {limit:.2f}ms (baseline {baseline['p95Ms']:.2f}ms)")
+    return problems
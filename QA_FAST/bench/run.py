@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+from bench.cases import build_cases, engine, fixtures, rollback_session, sub_client
+from bench.plans import StatementCapture, buffers, explain, percentile, regressions, seq_scans
+
+
+# 서비스 함수/라우트별 지연 시간(p50/p95)과 실행 계획을 측정하고 기준선과 비교한다.
+#   python -m bench.run                  (QA_FAST 디렉터리에서, 회귀가 있으면 종료 코드 1)
+#   python -m bench.run --save-baseline  (현재 결과를 기준선으로 저장)
+#   python -m bench.run chat.list_rooms user.list_friends   (이름이 이 문자열로 시작하는 케이스만)
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_BASELINE = os.getenv("BENCH_BASELINE", os.path.join(BENCH_DIR, "baseline.json"))
+BENCH_REPORT = os.getenv("BENCH_REPORT", os.path.join(BENCH_DIR, "report.json"))
+BENCH_WARMUP = int(os.getenv("BENCH_WARMUP", "3"))
+BENCH_ITERATIONS = int(os.getenv("BENCH_ITERATIONS", "30"))
+# 이보다 행이 많은(reltuples) 테이블의 Seq Scan을 회귀로 본다
+BENCH_SEQSCAN_MIN_ROWS = float(os.getenv("BENCH_SEQSCAN_MIN_ROWS", "10000"))
+# p95가 기준선 * TOLERANCE + SLACK_MS를 넘으면 실패
+BENCH_LATENCY_TOLERANCE = float(os.getenv("BENCH_LATENCY_TOLERANCE", "1.5"))
+BENCH_LATENCY_SLACK_MS = float(os.getenv("BENCH_LATENCY_SLACK_MS", "1.0"))
+
+
+def _reltuples() -> Dict[str, float]:
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p')"))
+        return {name: float(tuples) for name, tuples in rows}
+
+
+def run_case(case, params: Dict[str, Any], capture: StatementCapture, reltuples: Dict[str, float]) -> Dict[str, Any]:
+    samples: List[float] = []
+    for i in range(BENCH_WARMUP + BENCH_ITERATIONS):
+        with rollback_session() as db:
+            if case.setup is not None:
+                case.setup()
+            started = time.perf_counter()
+            case.call(db, params)
+            elapsed = (time.perf_counter() - started) * 1000
+        if i >= BENCH_WARMUP:
+            samples.append(elapsed)
+    # 한 번 더 실행하며 SQL을 잡고, 문장마다 EXPLAIN (ANALYZE, BUFFERS)
+    if case.setup is not None:
+        case.setup()
+    with capture.capture() as statements, rollback_session() as db:
+        case.call(db, params)
+    plans = [explain(engine, sql, parameters) for sql, parameters in statements]
+    return {
+        "p50Ms": round(percentile(samples, 50), 3),
+        "p95Ms": round(percentile(samples, 95), 3),
+        "statements": len(plans),
+        "seqScans": sorted({r for p in plans for r in seq_scans(p["plan"], reltuples, BENCH_SEQSCAN_MIN_ROWS)}),
+        "buffers": [buffers(p["plan"]) for p in plans],
+        "plans": plans,
+    }
+
+
+def main(argv: List[str]) -> int:
+    save = "--save-baseline" in argv
+    prefixes = [arg for arg in argv if not arg.startswith("--")]
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(BENCH_BASELINE):
+        with open(BENCH_BASELINE, encoding="utf-8") as f:
+            baseline = json.load(f)
+    elif not save:
+        print(f"no baseline at {BENCH_BASELINE}: latency is not compared (run with --save-baseline)")
+
+    params = fixtures()
+    reltuples = _reltuples()
+    capture = StatementCapture()
+    cases = [case for case in build_cases(sub_client()) if not prefixes or case.name.startswith(tuple(prefixes))]
+    results: Dict[str, Dict[str, Any]] = {}
+    failed = 0
+    print(f"{'case':40} {'p50 ms':>9} {'p95 ms':>9} {'stmts':>6}  result")
+    for case in cases:
+        result = results[case.name] = run_case(case, params, capture, reltuples)
+        problems = [] if save else regressions(
+            result, baseline.get(case.name), BENCH_LATENCY_TOLERANCE, BENCH_LATENCY_SLACK_MS
+        )
+        failed += bool(problems)
+        print(
+            f"{case.name:40} {result['p50Ms']:9.2f} {result['p95Ms']:9.2f} {result['statements']:6}  "
+            + ("; ".join(problems) if problems else "ok")
+        )
+
+    with open(BENCH_REPORT, "w", encoding="utf-8") as f:
+        json.dump({"fixtures": params, "reltuples": reltuples, "results": results}, f, indent=2, default=str)
+    if save:
+        # 기준선에는 지연과, 검토 후 허용한 Seq Scan만 남긴다
+        baseline.update(
+            {name: {"p95Ms": r["p95Ms"], "seqScans": r["seqScans"]} for name, r in results.items()}
+        )
+        with open(BENCH_BASELINE, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {BENCH_BASELINE}")
+    print(f"{len(cases) - failed}/{len(cases)} ok, report: {BENCH_REPORT}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
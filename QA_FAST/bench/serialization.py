@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from importlib import import_module
+from typing import Any, Callable, List
+
+QA_FAST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(QA_FAST_DIR, "pub"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.Chat.chat_service import message_dict  # noqa: E402
+from app.Chat.message import Message  # noqa: E402
+from app.Chat.room import Room  # noqa: E402
+from app.Chat.schemas import MessagePage, RoomPage  # noqa: E402
+from app.Chat.transport import SUB_APP_DIR, SUB_PACKAGE, _load_sub_package  # noqa: E402
+from app.core.serialization import OrjsonResponse  # noqa: E402
+
+
+# 200개짜리 페이지 한 번을 응답 바이트로 만드는 비용 (DB 없이 실행).
+#   before: response_model 없이 jsonable_encoder 반사 + json.dumps (예전 기본 경로)
+#   after:  응답 모델(pydantic-core 직렬화기) 검증/직렬화 + orjson (FastAPI가 response_model로 하는 일과 같다)
+#   python -m bench.serialization
+BENCH_PAGE_ITEMS = int(os.getenv("BENCH_PAGE_ITEMS", "200"))
+BENCH_SERIALIZE_ROUNDS = int(os.getenv("BENCH_SERIALIZE_ROUNDS", "300"))
+
+_START = datetime(2024, 5, 1)
+
+
+def _rooms(n: int) -> List[Room]:
+    return [
+        Room(
+            id=i, type="group", title=f"room {i}", created_at=_START, dm_key=None, last_seq=i,
+            last_message_at=_START + timedelta(seconds=i), last_message_preview=f"마지막 메시지 {i}",
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def _messages(n: int) -> List[dict]:
+    return [
+        message_dict(
+            Message(
+                id=i, room_id=1, sender_id=i % 7, to_user_id=None, content=f"메시지 본문 {i} " * 4, seq=i,
+                created_at=_START + timedelta(seconds=i), reply_to_id=None, reply_count=0, last_reply_seq=None,
+                edited_at=None, deleted_at=None, version=i, change_id=i,
+            )
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def _before(content: Any) -> bytes:
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def _after(adapter: TypeAdapter) -> Callable[[Any], bytes]:
+    def render(content: Any) -> bytes:
+        value = adapter.validate_python(content, from_attributes=True)
+        return OrjsonResponse(adapter.dump_python(value, mode="json")).body
+
+    return render
+
+
+def _per_request_us(fn: Callable[[Any], bytes], content: Any) -> float:
+    fn(content)
+    started = time.perf_counter()
+    for _ in range(BENCH_SERIALIZE_ROUNDS):
+        fn(content)
+    return (time.perf_counter() - started) / BENCH_SERIALIZE_ROUNDS * 1e6
+
+
+def main() -> None:
+    _load_sub_package(SUB_APP_DIR)
+    sub_schemas = import_module(f"{SUB_PACKAGE}.schemas")
+    n = BENCH_PAGE_ITEMS
+    messages = _messages(n)
+    pages = [
+        ("pub /chat/rooms (ORM)", RoomPage, {"items": _rooms(n), "total": n, "page": 1, "size": n}),
+        ("pub /chat/rooms/{id}/messages", MessagePage, {"items": messages, "total": n, "page": 1, "size": n}),
+        ("sub GET /messages", sub_schemas.MessageHistory, {"items": messages, "nextBeforeSeq": 1}),
+    ]
+    print(f"{n} items per page, {BENCH_SERIALIZE_ROUNDS} rounds")
+    print(f"{'page':34} {'before us':>10} {'after us':>10} {'speedup':>8} {'bytes':>8}")
+    for name, model, content in pages:
+        after = _after(TypeAdapter(model))
+        before_us, after_us = _per_request_us(_before, content), _per_request_us(after, content)
+        print(f"{name:34} {before_us:10.0f} {after_us:10.0f} {before_us / after_us:7.1f}x {len(after(content)):8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from bench.plans import percentile, regressions, seq_scans
+
+
+def _plan(*nodes):
+    return {"Plan": {"Node Type": "Limit", "Plans": list(nodes)}}
+
+
+def test_seq_scan_only_on_large_tables():
+    plan = _plan(
+        {"Node Type": "Nested Loop", "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "room_version"},
+            {"Node Type": "Seq Scan", "Relation Name": "users"},
+        ]},
+        {"Node Type": "Index Scan", "Relation Name": "friends"},
+    )
+    reltuples = {"users": 1_000_000, "room_version": 50, "friends": 20_000_000}
+    assert seq_scans(plan, reltuples, 10_000) == ["users"]
+    assert seq_scans(None, reltuples, 10_000) == []
+
+
+def test_regressions_against_baseline():
+    result = {"p95Ms": 4.0, "seqScans": ["users"]}
+    # 기준선이 없으면 Seq Scan만 실패
+    assert regressions(result, None, 1.5, 1.0) == ["seq scan on users"]
+    # 기준선에서 허용한 Seq Scan, 허용 범위 안의 지연
+    assert regressions(result, {"p95Ms": 3.0, "seqScans": ["users"]}, 1.5, 1.0) == []
+    problems = regressions(result, {"p95Ms": 2.0, "seqScans": ["users"]}, 1.5, 0.5)
+    assert len(problems) == 1 and problems[0].startswith("p95 4.00ms")
+
+
+def test_percentile():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 51.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile([], 95) == 0.0
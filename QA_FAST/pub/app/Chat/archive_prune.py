@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+from sqlalchemy import delete
+from sqlalchemy.engine import Engine
+
+from qa_common.archive import archived_rooms
+from qa_common.log import get_logger
+
+from app.Chat.message import Message
+
+
+# sub이 아카이브 파일로 옮긴 구간을 읽기 모델에서도 지운다 (조회는 이미 파일 쪽을 우선 사용)
+ARCHIVE_PRUNE_INTERVAL = float(os.getenv("ARCHIVE_PRUNE_INTERVAL", "3600"))
+
+log = get_logger("pub.archive_prune")
+
+
+def prune_archived(engine: Engine) -> int:
+    removed = 0
+    for room_id, last_seq in archived_rooms().items():
+        with engine.begin() as conn:
+            removed += conn.execute(
+                delete(Message).where(Message.room_id == room_id, Message.seq <= last_seq)
+            ).rowcount
+    if removed:
+        log.info("archive_prune.done", messages=removed)
+    return removed
+
+
+async def run_archive_prune(engine: Engine) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(prune_archived, engine)
+        except Exception as exc:
+            log.error("archive_prune.failed", error=exc)
+        await asyncio.sleep(ARCHIVE_PRUNE_INTERVAL)
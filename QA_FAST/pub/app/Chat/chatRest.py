@@ -1,23 +1,47 @@
 from __future__ import annotations
 
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
-import httpx
-import os
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.Chat.dm_cache import dm_key
+from app.Chat.presence import presence
+from app.Chat.read_pointers import read_pointers
+from app.Chat.search import search_messages
+from app.Chat.transport import transport
 from app.Chat.chat_service import (
     create_room,
+    get_or_create_dm,
+    get_thread,
     add_room_member,
     list_room_messages,
     list_all_room_messages,
+    list_changes,
+    list_recent_messages,
     list_rooms,
     remove_room_member,
     list_room_members,
+    list_unread_counts,
+    list_user_rooms,
 )
+from app.Chat.schemas import (
+    InboxPage,
+    MessageChanges,
+    MessageHistory,
+    MessageOut,
+    MessagePage,
+    MessageThread,
+    RoomMemberOut,
+    RoomMemberPage,
+    RoomOut,
+    RoomPage,
+    UnreadCounts,
+)
+from app.User.schemas import FriendOut, UserPage
 from app.User.user_service import (
     add_friend,
     list_friends,
@@ -27,18 +51,14 @@ from app.User.user_service import (
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
-SUB_BASE_URL = os.getenv("SUB_BASE_URL", "http://127.0.0.1:8001")
-
-
-
 
 class FriendCreate(BaseModel):
     userId: int
     friendUserId: int
 
 
-@router.get("/friends")
-def _list_friends(userId: int, page: int = 1, size: int = 20, db: Session = Depends(get_db)):
+@router.get("/friends", response_model=UserPage)
+def _list_friends(userId: int, page: int = 1, size: int = 20, db: Session = Depends(get_read_db)):
     items, total = list_friends(db, user_id=userId, page=page, size=size)
     return {"items": items, "total": total, "page": page, "size": size}
 
@@ -48,11 +68,21 @@ class RoomCreate(BaseModel):
     title: str
 
 
+class DmOpen(BaseModel):
+    userId: int
+    peerUserId: int
+
+
 class RoomMemberCreate(BaseModel):
     roomId: int
     userId: int
 
 
+class MarkRead(BaseModel):
+    userId: int
+    seq: int
+
+
 class MessageCreate(BaseModel):
     roomId: int
     senderId: int
@@ -61,7 +91,7 @@ class MessageCreate(BaseModel):
 
 
 
-@router.post("/friends")
+@router.post("/friends", response_model=FriendOut)
 def _add_friend(body: FriendCreate, db: Session = Depends(get_db)):
     return add_friend(db, user_id=body.userId, friend_user_id=body.friendUserId)
 
@@ -72,24 +102,36 @@ def _delete_friend(userId: int, friendUserId: int, db: Session = Depends(get_db)
     return {"deleted": ok}
 
 
-@router.post("/rooms")
+@router.post("/rooms", response_model=RoomOut)
 def _create_room(body: RoomCreate, db: Session = Depends(get_db)):
     return create_room(db, type=body.type, title=body.title)
 
 
-@router.get("/rooms")
-def _list_rooms(page: int = 1, size: int = 20, db: Session = Depends(get_db)):
+@router.post("/dms")
+def _open_dm(body: DmOpen, db: Session = Depends(get_db)):
+    # 두 유저의 DM 룸을 찾거나 생성 (중복 DM 룸이 생기지 않음)
+    room_id, created = get_or_create_dm(db, user_a=body.userId, user_b=body.peerUserId)
+    if created:
+        for uid in {body.userId, body.peerUserId}:
+            transport.notify_membership(uid, room_id, joined=True)
+    return {"roomId": room_id, "type": "dm", "dmKey": dm_key(body.userId, body.peerUserId), "created": created}
+
+
+@router.get("/rooms", response_model=RoomPage)
+def _list_rooms(page: int = 1, size: int = 20, db: Session = Depends(get_read_db)):
     items, total = list_rooms(db, page=page, size=size)
     return {"items": items, "total": total, "page": page, "size": size}
 
 
-@router.post("/room-members")
+@router.post("/room-members", response_model=RoomMemberOut)
 def _add_room_member(body: RoomMemberCreate, db: Session = Depends(get_db)):
-    return add_room_member(db, room_id=body.roomId, user_id=body.userId)
+    member = add_room_member(db, room_id=body.roomId, user_id=body.userId)
+    transport.notify_membership(body.userId, body.roomId, joined=True)
+    return member
 
 
-@router.get("/room-members")
-def _list_room_members(roomId: int, page: int = 1, size: int = 20, db: Session = Depends(get_db)):
+@router.get("/room-members", response_model=RoomMemberPage)
+def _list_room_members(roomId: int, page: int = 1, size: int = 20, db: Session = Depends(get_read_db)):
     items, total = list_room_members(db, room_id=roomId, page=page, size=size)
     return {"items": items, "total": total, "page": page, "size": size}
 
@@ -97,34 +139,150 @@ def _list_room_members(roomId: int, page: int = 1, size: int = 20, db: Session =
 @router.delete("/room-members")
 def _leave_room(roomId: int, userId: int, db: Session = Depends(get_db)):
     ok = remove_room_member(db, room_id=roomId, user_id=userId)
+    if ok:
+        transport.notify_membership(userId, roomId, joined=False)
     return {"left": ok}
 
 
 @router.delete("/rooms/{room_id}/leave")
 def _leave_room_by_path(room_id: int, userId: int, db: Session = Depends(get_db)):
     ok = remove_room_member(db, room_id=room_id, user_id=userId)
+    if ok:
+        transport.notify_membership(userId, room_id, joined=False)
     return {"left": ok}
 
 
 
 
-@router.get("/messages")
-def _list_all_messages(roomId: int, db: Session = Depends(get_db)):
+@router.get("/messages", response_model=List[MessageOut])
+def _list_all_messages(roomId: int, db: Session = Depends(get_read_db)):
     return list_all_room_messages(db, room_id=roomId)
 
 
-@router.get("/rooms/{room_id}/messages")
-def _list_messages(room_id: int, page: int = 1, size: int = 20, db: Session = Depends(get_db)):
-    items, total = list_room_messages(db, room_id=room_id, page=page, size=size)
-    return {"items": items, "total": total, "page": page, "size": size}
+@router.get("/messages/{message_id}/thread", response_model=MessageThread)
+def _thread(message_id: int, afterSeq: int = 0, limit: int = 50, db: Session = Depends(get_read_db)):
+    thread = get_thread(db, message_id=message_id, after_seq=afterSeq, limit=limit)
+    if thread is None:
+        raise HTTPException(status_code=404, detail="message_not_found")
+    parent, items, next_after = thread
+    return {"parent": parent, "items": items, "nextAfterSeq": next_after}
 
 
-@router.get("/rooms/{room_id}/history")
-def _room_history(room_id: int, limit: int = 50):
-    # SUB 서비스의 메시지 히스토리 프록시
-    with httpx.Client() as client:
-        r = client.get(f"{SUB_BASE_URL}/messages", params={"roomId": room_id, "limit": limit}, timeout=5)
-    r.raise_for_status()
-    return r.json()
+@router.get("/rooms/{room_id}/messages", response_model=MessagePage)
+def _list_messages(room_id: int, page: int = 1, size: int = 20, db: Session = Depends(get_read_db)):
+    items, total = list_room_messages(db, room_id=room_id, page=page, size=size)
+    return {"items": items, "total": total, "page": page, "size": size}
 
 
+@router.get("/rooms/{room_id}/history", response_model=MessageHistory)
+def _room_history(
+    room_id: int, limit: int = 50, beforeSeq: Optional[int] = None, db: Session = Depends(get_read_db)
+):
+    # 로컬 읽기 모델에서 조회 (sub 프록시 없음, 프로젝터 주기만큼 늦을 수 있다).
+    # 이전 페이지는 nextBeforeSeq를 beforeSeq로 넘긴다 (오래된 구간은 아카이브 파일에서 읽음)
+    items, next_before = list_recent_messages(db, room_id=room_id, limit=limit, before_seq=beforeSeq)
+    return {"items": items, "nextBeforeSeq": next_before}
+
+
+@router.get("/rooms/{room_id}/changes", response_model=MessageChanges)
+def _room_changes(room_id: int, sinceVersion: int = 0, limit: int = 500, db: Session = Depends(get_read_db)):
+    # 델타 동기화 (추가/수정은 upsert, 삭제는 tombstone)
+    return list_changes(db, room_id=room_id, since_version=sinceVersion, limit=limit)
+
+
+@router.post("/rooms/{room_id}/read")
+def _mark_read(room_id: int, body: MarkRead):
+    # 읽음 포인터는 버퍼에 모았다가 배치로 반영 (같은 룸/유저는 마지막 값만 저장)
+    read_pointers.mark(room_id, body.userId, body.seq)
+    return {"roomId": room_id, "userId": body.userId, "lastReadSeq": body.seq}
+
+
+@router.get("/rooms/{room_id}/presence")
+def _room_presence(room_id: int):
+    # 이 pub 프로세스에 연결된 소켓 기준 온라인 유저 (DB 조회 없음)
+    online = presence.room_online(room_id)
+    return {"roomId": room_id, "online": online, "count": len(online)}
+
+
+@router.get("/unread", response_model=UnreadCounts)
+def _unread(userId: int, db: Session = Depends(get_read_db)):
+    items = list_unread_counts(db, user_id=userId, pending=read_pointers.pending(userId))
+    return {"items": items, "total": sum(item["unread"] for item in items)}
+
+
+def _parse_rooms_cursor(cursor: str):
+    # "<lastMessageAt ISO>_<roomId>"
+    try:
+        at, room_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(at), int(room_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+
+
+@router.get("/users/{user_id}/rooms", response_model=InboxPage)
+def _list_user_rooms(
+    user_id: int, limit: int = 20, cursor: Optional[str] = None, db: Session = Depends(get_read_db)
+):
+    # 최근 활동순 내 룸 목록 (마지막 메시지 미리보기/안읽은 수 포함, N+1 없음)
+    items, next_cursor = list_user_rooms(
+        db,
+        user_id=user_id,
+        limit=limit,
+        cursor=_parse_rooms_cursor(cursor) if cursor else None,
+        pending=read_pointers.pending(user_id),
+    )
+    return {
+        "items": items,
+        "nextCursor": f"{next_cursor[0].isoformat()}_{next_cursor[1]}" if next_cursor else None,
+    }
+
+
+def _parse_search_cursor(cursor: str):
+    # "<rank>_<messageId>"
+    try:
+        rank, message_id = cursor.rsplit("_", 1)
+        return float(rank), int(message_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid_cursor")
+
+
+def _search_response(items, next_cursor):
+    return {
+        "items": items,
+        "nextCursor": f"{next_cursor[0]!r}_{next_cursor[1]}" if next_cursor else None,
+    }
+
+
+@router.get("/rooms/{room_id}/search")
+def _search_room(
+    room_id: int,
+    q: str,
+    userId: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="empty_query")
+    items, next_cursor = search_messages(
+        db,
+        q=q,
+        room_id=room_id,
+        user_id=userId,
+        limit=limit,
+        cursor=_parse_search_cursor(cursor) if cursor else None,
+    )
+    return _search_response(items, next_cursor)
+
+
+@router.get("/search")
+def _search_user_rooms(
+    userId: int, q: str, limit: int = 20, cursor: Optional[str] = None, db: Session = Depends(get_read_db)
+):
+    # 유저가 가입한 모든 룸에서 검색
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="empty_query")
+    items, next_cursor = search_messages(
+        db, q=q, user_id=userId, limit=limit, cursor=_parse_search_cursor(cursor) if cursor else None
+    )
+    return _search_response(items, next_cursor)
@@ -1,95 +1,330 @@
 from __future__ import annotations
 
 import json
-import os
-from typing import Any, Dict, Set, DefaultDict
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple, DefaultDict
 from collections import defaultdict
 
-import httpx
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from qa_common.log import get_logger
+from qa_common.tracing import TRACE_DEBUG, Trace
+
+from app.Chat.presence import PresenceEvent, presence
+from app.Chat.read_pointers import read_pointers
+from app.Chat.typing_indicator import typing_events
+from app.Chat.transport import SubError, SubRejected, SubUnavailable, transport
+from app.core.hot_rooms import hot_rooms
+from app.core.metrics import registry
+from app.core.serialization import dumps
+
 
 router = APIRouter()
 
+log = get_logger("pub.ws")
 
-SUB_BASE_URL = os.getenv("SUB_BASE_URL", "http://127.0.0.1:8001")
 
 # 룸별 연결된 소켓 목록 (동일 프로세스 내 브로드캐스트용)
 room_clients: DefaultDict[int, Set[WebSocket]] = defaultdict(set)
 
 
+def _joined_rooms():
+    yield (), sum(1 for sockets in room_clients.values() if sockets)
+
+
+def _online_users():
+    yield (), presence.online_count()
+
+
+# 라벨 카디널리티 제한용
+_KNOWN_EVENTS = {
+    "join_room",
+    "leave_room",
+    "publish",
+    "mark_read",
+    "edit_message",
+    "delete_message",
+    "identify",
+    "heartbeat",
+    "typing",
+}
+
+WS_EVENTS = registry.counter("qa_ws_events_total", "WebSocket events received", ("type",))
+WS_CONNECTIONS = registry.gauge("qa_ws_connections", "Open WebSocket connections")
+registry.gauge("qa_ws_joined_rooms", "Rooms with at least one joined socket", callback=_joined_rooms)
+registry.gauge("qa_presence_online_users", "Users online (heartbeat within TTL)", callback=_online_users)
+PUBLISH_LATENCY = registry.histogram("qa_ws_publish_seconds", "WebSocket publish handling time", ("outcome",))
+SUB_ROUNDTRIP = registry.histogram("qa_sub_roundtrip_seconds", "pub -> sub publish call time")
+WS_REJECTED = registry.counter("qa_ws_publish_rejected_total", "WebSocket publishes rejected", ("code", "scope"))
+
+
+def _rejected_message(code: str, scope: str, retry_after: float) -> str:
+    WS_REJECTED.inc(1, code, scope)
+    return dumps({"type": "error", "message": code, "scope": scope, "retryAfter": round(retry_after, 3)})
+
+
+def _client_id(ws: WebSocket, user_id: Optional[int]) -> str:
+    # sub 입장 제어 키: 식별된 연결은 유저, 아니면 연결 자체 (프레임의 senderId는 클라이언트가 바꿀 수 있다)
+    return str(user_id) if user_id is not None else f"ws-{id(ws)}"
+
+
+def _acting_user(user_id: Optional[int], data: Dict[str, Any]) -> Optional[int]:
+    # 식별된 연결은 자기 유저로만 행동한다. 식별 전 연결만 프레임의 userId를 쓰고, 없거나 잘못되면 None
+    if user_id is not None:
+        return user_id
+    try:
+        return int(data.get("userId"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _broadcast(rid: int, text: str) -> None:
+    for peer in list(room_clients.get(rid, set())):
+        try:
+            await peer.send_text(text)
+        except Exception:
+            pass
+
+
+async def broadcast_presence(events: List[PresenceEvent]) -> None:
+    # 접속 상태는 변경(온라인 <-> 오프라인)이 생길 때만 해당 룸에 알린다
+    for rid, user_id, online in events:
+        data = {"roomId": rid, "userId": user_id, "online": online}
+        await _broadcast(rid, dumps({"type": "presence", "data": data}))
+
+
+async def broadcast_typing(batch: List[Tuple[int, List[int], List[int]]]) -> None:
+    # 인터벌 동안 모인 룸별 타이핑 상태를 프레임 하나로 전달
+    for rid, typing, stopped in batch:
+        data = {"roomId": rid, "typing": typing, "stopped": stopped}
+        await _broadcast(rid, dumps({"type": "typing", "data": data}))
+
+
+async def _change_message(ws: WebSocket, data: Dict[str, Any]) -> None:
+    # 수정/삭제는 sub에 저장 후 룸에 가벼운 이벤트(message_edited / message_deleted)만 브로드캐스트
+    rid = int(data.get("roomId"))
+    message_id = int(data.get("messageId"))
+    sender_id = int(data.get("senderId"))
+    try:
+        if data.get("type") == "edit_message":
+            msg = await transport.edit(
+                message_id, {"roomId": rid, "senderId": sender_id, "content": data.get("content")}
+            )
+            event = {
+                "type": "message_edited",
+                "data": {
+                    "id": msg["id"],
+                    "roomId": rid,
+                    "seq": msg["seq"],
+                    "content": msg["content"],
+                    "editedAt": msg["editedAt"],
+                    "version": msg["version"],
+                },
+            }
+        else:
+            msg = await transport.delete(message_id, rid, sender_id)
+            event = {
+                "type": "message_deleted",
+                "data": {"id": msg["id"], "roomId": rid, "seq": msg["seq"], "version": msg["version"]},
+            }
+    except SubUnavailable:
+        await ws.send_text(dumps({"type": "error", "message": "sub_unavailable"}))
+        return
+    except SubError as exc:
+        await ws.send_text(dumps({"type": "error", "code": exc.status_code, "message": exc.message}))
+        return
+    if msg.get("toUserId") is not None:
+        # 귓속말은 룸 전체에 알리지 않고 요청자에게만 응답
+        await ws.send_text(dumps(event))
+        return
+    text = dumps(event)
+    if ws not in room_clients.get(rid, ()):
+        await ws.send_text(text)
+    await _broadcast(rid, text)
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket) -> None:
     await ws.accept()
+    WS_CONNECTIONS.inc()
     joined_rooms: Set[int] = set()
+    # 접속 상태 추적용 유저 (쿼리 ?userId= 또는 identify 이벤트로 지정)
+    user_id: Optional[int] = None
+    if ws.query_params.get("userId", "").isdigit():
+        user_id = int(ws.query_params["userId"])
+        presence.connect(user_id)
     try:
         while True:
             raw = await ws.receive_text()
-            print(f"[WS] recv: {raw[:200]}")
+            if user_id is not None:
+                # 어떤 프레임이든 하트비트로 취급
+                events = presence.heartbeat(user_id)
+                if events:
+                    await broadcast_presence(events)
+            if log.enabled(logging.DEBUG):
+                log.debug("ws.recv", raw=raw[:200])
             try:
                 data: Dict[str, Any] = json.loads(raw)
             except json.JSONDecodeError:
-                await ws.send_text(json.dumps({"type": "error", "message": "invalid_json"}))
+                await ws.send_text(dumps({"type": "error", "message": "invalid_json"}))
                 continue
 
             event_type = data.get("type")
+            WS_EVENTS.inc(1, event_type if event_type in _KNOWN_EVENTS else "unknown")
+
+            if event_type == "identify":
+                if user_id is None:
+                    user_id = int(data.get("userId"))
+                    presence.connect(user_id)
+                    events: List[PresenceEvent] = []
+                    for rid in joined_rooms:
+                        events.extend(presence.join(user_id, rid))
+                    await broadcast_presence(events)
+                await ws.send_text(dumps({"type": "identified", "userId": user_id}))
+                continue
+
+            if event_type == "heartbeat":
+                continue
 
             if event_type == "join_room":
                 rid = int(data.get("roomId"))
-                print(f"[WS] join_room roomId={rid}")
+                log.info("ws.join_room", room=rid)
                 room_clients[rid].add(ws)
+                await ws.send_text(dumps({"type": "joined", "roomId": rid}))
+                if user_id is not None and rid not in joined_rooms:
+                    await broadcast_presence(presence.join(user_id, rid))
                 joined_rooms.add(rid)
-                await ws.send_text(json.dumps({"type": "joined", "roomId": rid}))
                 continue
 
             if event_type == "leave_room":
                 rid = int(data.get("roomId"))
-                print(f"[WS] leave_room roomId={rid}")
+                log.info("ws.leave_room", room=rid)
                 room_clients[rid].discard(ws)
+                if user_id is not None and rid in joined_rooms:
+                    await broadcast_presence(presence.leave(user_id, rid))
                 joined_rooms.discard(rid)
-                await ws.send_text(json.dumps({"type": "left", "roomId": rid}))
+                await ws.send_text(dumps({"type": "left", "roomId": rid}))
+                continue
+
+            if event_type == "typing":
+                # 휘발성 이벤트: sub/DB로 보내지 않고 응답도 하지 않는다
+                rid = int(data.get("roomId"))
+                if rid not in joined_rooms:
+                    await ws.send_text(dumps({"type": "error", "message": "not_joined", "roomId": rid}))
+                    continue
+                uid = _acting_user(user_id, data)
+                if uid is None:
+                    await ws.send_text(dumps({"type": "error", "message": "userId_required", "roomId": rid}))
+                    continue
+                typing_events.mark(rid, uid, bool(data.get("typing", True)))
+                continue
+
+            if event_type == "mark_read":
+                rid = int(data.get("roomId"))
+                seq = int(data.get("seq"))
+                # 식별된 연결은 프레임의 userId로 다른 유저의 읽음 위치를 옮길 수 없다
+                uid = _acting_user(user_id, data)
+                if uid is None:
+                    await ws.send_text(dumps({"type": "error", "message": "userId_required", "roomId": rid}))
+                    continue
+                read_pointers.mark(rid, uid, seq)
+                await ws.send_text(dumps({"type": "read", "roomId": rid, "seq": seq}))
+                continue
+
+            if event_type in ("edit_message", "delete_message"):
+                await _change_message(ws, data)
                 continue
 
             if event_type == "publish":
-                payload = {
-                    "roomId": data.get("roomId"),
-                    "senderId": data.get("senderId"),
-                    "toUserId": data.get("toUserId"),
-                    "content": data.get("content"),
-                    "replyToId": data.get("replyToId"),
-                }
-                print(f"[WS] publish room={payload['roomId']} sender={payload['senderId']} to={payload['toUserId']}")
-                async with httpx.AsyncClient() as client:
-                    r = await client.post(f"{SUB_BASE_URL}/messages", json=payload, timeout=10)
-                if r.status_code == 200:
-                    msg = r.json()
-                    print(f"[WS] publish ok id={msg.get('id')} seq={msg.get('seq')}")
-                    await ws.send_text(json.dumps({"type": "ack", "data": msg}))
+                started = time.perf_counter()
+                # 실패/거절도 기록한다 (outcome: ok, rejected, sub_unavailable, error)
+                outcome = "error"
+                try:
+                    trace = Trace("pub")
+                    trace.mark("receive")
+                    payload = {
+                        "roomId": data.get("roomId"),
+                        "senderId": data.get("senderId"),
+                        "toUserId": data.get("toUserId"),
+                        "content": data.get("content"),
+                        "replyToId": data.get("replyToId"),
+                        # 클라이언트가 clientMsgId를 주면 클라이언트 재전송까지 중복 제거된다
+                        "idempotencyKey": str(data.get("clientMsgId") or uuid.uuid4().hex)[:64],
+                    }
+                    log.debug(
+                        "ws.publish",
+                        room=payload["roomId"],
+                        sender=payload["senderId"],
+                        to=payload["toUserId"],
+                        trace=trace.trace_id,
+                    )
+                    try:
+                        with SUB_ROUNDTRIP.time():
+                            msg = await transport.publish(
+                                payload, trace_id=trace.trace_id, client_id=_client_id(ws, user_id)
+                            )
+                    except SubUnavailable:
+                        outcome = "sub_unavailable"
+                        await ws.send_text(dumps({"type": "error", "message": "sub_unavailable"}))
+                        continue
+                    except SubRejected as exc:
+                        outcome = "rejected"
+                        await ws.send_text(_rejected_message(exc.code, exc.scope, exc.retry_after))
+                        continue
+                    except SubError as exc:
+                        outcome = "rejected" if exc.status_code < 500 else "error"
+                        await ws.send_text(
+                            dumps({"type": "error", "code": exc.status_code, "message": exc.message})
+                        )
+                        continue
+                    trace.mark("sub_roundtrip")
+                    if TRACE_DEBUG:
+                        # sub 단계(receive/seq_alloc/commit/fanout_scheduled)와 pub 단계를 함께 노출
+                        msg = dict(msg, trace={"sub": msg.get("trace"), "pub": trace.timings()})
+                    log.debug("ws.publish.ok", id=msg.get("id"), seq=msg.get("seq"), trace=trace.trace_id)
+                    await ws.send_text(dumps({"type": "ack", "data": msg}))
+                    outcome = "ok"
+                    trace.mark("ack")
                     # 동일 프로세스 내 같은 룸 클라이언트에게 브로드캐스트 (빠른 반영)
                     try:
                         rid = int(payload["roomId"])
-                        broadcast = json.dumps({"type": "message", "data": msg})
+                        broadcast = dumps({"type": "message", "data": msg})
                         for peer in list(room_clients.get(rid, set())):
                             try:
                                 if peer is not ws:
                                     await peer.send_text(broadcast)
-                                    print(f"[WS] broadcast to room={rid}")
                             except Exception:
                                 pass
+                        hot_rooms.record(
+                            rid,
+                            messages=1,
+                            fanout=len(room_clients.get(rid, ())),
+                            nbytes=len(str(payload.get("content") or "").encode("utf-8")),
+                        )
+                        log.debug("ws.broadcast", room=rid, peers=len(room_clients.get(rid, ())))
                     except Exception:
                         pass
-                else:
-                    await ws.send_text(
-                        json.dumps({"type": "error", "code": r.status_code, "message": r.text})
-                    )
+                    trace.mark("broadcast")
+                    trace.finish()
+                finally:
+                    PUBLISH_LATENCY.observe(time.perf_counter() - started, outcome)
                 continue
 
-            await ws.send_text(json.dumps({"type": "error", "message": "unknown_event"}))
+            await ws.send_text(dumps({"type": "error", "message": "unknown_event"}))
     except WebSocketDisconnect:
         pass
     finally:
+        WS_CONNECTIONS.dec()
         # 연결 종료 시, 가입했던 룸에서 제거
         for rid in joined_rooms:
             room_clients[rid].discard(ws)
+        if user_id is not None:
+            events = []
+            for rid in joined_rooms:
+                events.extend(presence.leave(user_id, rid))
+            events.extend(presence.disconnect(user_id))
+            await broadcast_presence(events)
 
 
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import func
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from qa_common.archive import RoomArchive
+
 from app.User.user import User
 from app.User.friend import Friend
+from app.Chat.dm_cache import dm_key, dm_rooms
 from app.Chat.room import Room
 from app.Chat.room_member import RoomMember
 from app.Chat.message import Message
@@ -36,6 +40,40 @@ def list_rooms(db: Session, *, page: int, size: int) -> Tuple[List[Room], int]:
     return items, total
 
 
+def get_or_create_dm(db: Session, *, user_a: int, user_b: int) -> Tuple[int, bool]:
+    # (room_id, created). 캐시 히트 또는 dm_key 유니크 인덱스 한 번으로 해결
+    key = dm_key(user_a, user_b)
+    room_id = dm_rooms.get(key)
+    if room_id is not None:
+        return room_id, False
+    now = datetime.utcnow()
+    # 동시에 같은 쌍을 만들면 한쪽만 INSERT되고 나머지는 기존 행을 읽는다
+    room_id = db.execute(
+        pg_insert(Room)
+        .values(type="dm", title=key, dm_key=key, created_at=now)
+        .on_conflict_do_nothing(index_elements=[Room.dm_key])
+        .returning(Room.id)
+    ).scalar()
+    created = room_id is not None
+    if created:
+        db.execute(
+            pg_insert(RoomMember)
+            .values(
+                [
+                    {"room_id": room_id, "user_id": uid, "joined_at": now}
+                    for uid in {user_a, user_b}
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[RoomMember.room_id, RoomMember.user_id])
+        )
+        db.commit()
+    else:
+        db.rollback()
+        room_id = db.query(Room.id).filter(Room.dm_key == key).scalar()
+    dm_rooms.put(key, room_id)
+    return room_id, created
+
+
 # Room Members
 def add_room_member(db: Session, *, room_id: int, user_id: int) -> RoomMember:
     member = RoomMember(room_id=room_id, user_id=user_id, joined_at=datetime.utcnow())
@@ -71,56 +109,183 @@ def list_room_members(
     return items, total
 
 
-# Messages
-def _next_seq_for_room(db: Session, room_id: int) -> int:
-    return (
-        db.query(func.coalesce(func.max(Message.seq), 0)).filter(Message.room_id == room_id).scalar() + 1
-    )
+# Messages (sub 변경 피드를 따라오는 읽기 모델에서 조회)
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() + "Z" if value is not None else None
 
 
-def create_message(
-    db: Session,
-    *,
-    room_id: int,
-    sender_id: int,
-    content: str,
-    reply_to_id: Optional[int] = None,
-) -> Message:
-    seq = _next_seq_for_room(db, room_id)
-    msg = Message(
-        room_id=room_id,
-        sender_id=sender_id,
-        content=content,
-        seq=seq,
-        reply_to_id=reply_to_id,
-        created_at=datetime.utcnow(),
-        edited_at=None,
-    )
-    db.add(msg)
-    db.commit()
-    db.refresh(msg)
-    return msg
+def message_dict(msg: Message) -> dict:
+    # sub의 message_response와 같은 모양
+    return {
+        "id": msg.id,
+        "roomId": msg.room_id,
+        "senderId": msg.sender_id,
+        "toUserId": msg.to_user_id,
+        "content": msg.content if msg.deleted_at is None else None,
+        "seq": msg.seq,
+        "createdAt": msg.created_at.isoformat() + "Z",
+        "replyToId": msg.reply_to_id,
+        "replyCount": msg.reply_count,
+        "lastReplySeq": msg.last_reply_seq,
+        "editedAt": _iso(msg.edited_at),
+        "deletedAt": _iso(msg.deleted_at),
+        "version": msg.version,
+    }
+
+
+def _hot_messages(db: Session, room_id: int, cold: RoomArchive):
+    # 아카이브 정리 전이라 양쪽에 같은 메시지가 있어도 보관된 구간은 파일 쪽만 사용
+    return db.query(Message).filter(Message.room_id == room_id, Message.seq > cold.last_seq)
 
 
 def list_room_messages(
     db: Session, *, room_id: int, page: int, size: int
-) -> Tuple[List[Message], int]:
-    # 최신순 정렬(desc)
-    base = db.query(Message).filter(Message.room_id == room_id).order_by(Message.seq.desc())
-    total = base.count()
-    items = paginate(base, page, size).all()
-    return items, total
+) -> Tuple[List[dict], int]:
+    # 최신순 정렬(desc). 핫 구간을 넘어가는 페이지는 아카이브에서 이어서 읽는다.
+    # 핫/콜드 구간이 같은 페이지 크기를 쓰도록 paginate와 같은 범위로 한 번만 맞춘다
+    page = max(page, 1)
+    size = max(min(size, 100), 1)
+    cold = RoomArchive(room_id)
+    base = _hot_messages(db, room_id, cold).order_by(Message.seq.desc())
+    hot_total = base.count()
+    items = [message_dict(m) for m in paginate(base, page, size).all()]
+    offset = (page - 1) * size
+    if len(items) < size and cold.blocks:
+        items.extend(cold.newest(max(offset - hot_total, 0), size - len(items)))
+    return items, hot_total + cold.count
 
 
-def list_all_room_messages(db: Session, *, room_id: int) -> List[Message]:
-    return (
+def list_all_room_messages(db: Session, *, room_id: int) -> List[dict]:
+    cold = RoomArchive(room_id)
+    rows = _hot_messages(db, room_id, cold).order_by(Message.seq.asc()).all()
+    return cold.all() + [message_dict(m) for m in rows]
+
+
+def list_recent_messages(
+    db: Session, *, room_id: int, limit: int = 50, before_seq: Optional[int] = None
+) -> Tuple[List[dict], Optional[int]]:
+    # 최근 메시지 limit개(before_seq가 있으면 그 이전), 과거->현재 순서로 반환 ((room_id, seq) 인덱스 역순 조회)
+    limit = max(min(limit, 200), 1)
+    cold = RoomArchive(room_id)
+    q = _hot_messages(db, room_id, cold)
+    if before_seq is not None:
+        q = q.filter(Message.seq < before_seq)
+    rows = q.order_by(Message.seq.desc()).limit(limit).all()
+    items = [message_dict(m) for m in reversed(rows)]
+    if len(items) < limit and cold.blocks:
+        # 커서가 콜드 구간으로 넘어가면 아카이브 파일에서 이어서 읽는다
+        items[:0] = cold.before(items[0]["seq"] if items else before_seq, limit - len(items))
+    return items, (items[0]["seq"] if len(items) == limit else None)
+
+
+def list_changes(db: Session, *, room_id: int, since_version: int = 0, limit: int = 500) -> dict:
+    # 클라이언트가 마지막으로 본 버전 이후의 추가/수정(upsert)과 삭제(tombstone)만 반환
+    limit = max(min(limit, 1000), 1)
+    rows = (
         db.query(Message)
-        .filter(Message.room_id == room_id)
-        .order_by(Message.seq.asc())
+        .filter(Message.room_id == room_id, Message.version > since_version)
+        .order_by(Message.version)
+        .limit(limit + 1)
         .all()
     )
+    items = []
+    for m in rows[:limit]:
+        if m.deleted_at is not None:
+            items.append({"op": "delete", "id": m.id, "seq": m.seq, "version": m.version})
+        else:
+            items.append({"op": "upsert", "message": message_dict(m), "version": m.version})
+    version = items[-1]["version"] if items else since_version
+    return {"items": items, "version": version, "hasMore": len(rows) > limit}
 
 
+def get_thread(
+    db: Session, *, message_id: int, after_seq: int = 0, limit: int = 50
+) -> Optional[Tuple[dict, List[dict], Optional[int]]]:
+    # 부모 메시지 + 답글(seq 오름차순). (reply_to_id, seq) 인덱스 범위 조회 + keyset
+    limit = max(min(limit, 200), 1)
+    parent = db.get(Message, message_id)
+    if parent is None:
+        return None
+    rows = (
+        db.query(Message)
+        .filter(Message.reply_to_id == message_id, Message.room_id == parent.room_id, Message.seq > after_seq)
+        .order_by(Message.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    items = [message_dict(m) for m in rows[:limit]]
+    next_after = rows[limit - 1].seq if len(rows) > limit else None
+    return message_dict(parent), items, next_after
 
 
+# Inbox
+def list_user_rooms(
+    db: Session,
+    *,
+    user_id: int,
+    limit: int,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    pending: Optional[Dict[int, int]] = None,
+) -> Tuple[List[dict], Optional[Tuple[datetime, int]]]:
+    # 룸의 마지막 활동(메시지가 없으면 생성 시각) 역순 keyset 페이지네이션. 활동 시각은 rooms 한 곳에만 있으므로
+    # publish가 멤버 행을 갱신하지 않는다. 정렬 키는 ix_rooms_activity 식 인덱스와 같아서, 플래너가
+    # 룸을 활동순으로 읽으며 (user_id, room_id) 인덱스로 멤버 여부만 확인하고 limit개에서 멈출 수 있다
+    limit = max(min(limit, 100), 1)
+    activity = func.coalesce(Room.last_message_at, Room.created_at)
+    q = (
+        db.query(Room.id, activity, RoomMember.last_read_seq, Room)
+        .join(RoomMember, RoomMember.room_id == Room.id)
+        .filter(RoomMember.user_id == user_id)
+    )
+    if cursor is not None:
+        q = q.filter(tuple_(activity, Room.id) < tuple_(*cursor))
+    rows = (
+        q.order_by(activity.desc(), Room.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    pending = pending or {}
+    items = [
+        {
+            "roomId": room_id,
+            "type": room.type,
+            "title": room.title,
+            "lastSeq": room.last_seq,
+            "lastMessageAt": last_message_at.isoformat() + "Z",
+            "lastMessagePreview": room.last_message_preview,
+            "unread": max(room.last_seq - pending.get(room_id, last_read_seq), 0),
+        }
+        for room_id, last_message_at, last_read_seq, room in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        room_id, last_message_at = rows[limit - 1][0], rows[limit - 1][1]
+        next_cursor = (last_message_at, room_id)
+    return items, next_cursor
 
+
+# Unread
+def list_unread_counts(
+    db: Session, *, user_id: int, pending: Optional[Dict[int, int]] = None
+) -> List[dict]:
+    # 유저의 모든 룸을 한 번에. 최신 seq는 내 룸 목록과 같은 pub 읽기 모델(rooms.last_seq)을 써서 두 응답이 일치한다
+    rows = (
+        db.query(RoomMember.room_id, RoomMember.last_read_seq, Room.last_seq)
+        .join(Room, Room.id == RoomMember.room_id)
+        .filter(RoomMember.user_id == user_id)
+        .order_by(RoomMember.room_id)
+        .all()
+    )
+    pending = pending or {}
+    items = []
+    for room_id, last_read_seq, latest in rows:
+        last_read_seq = pending.get(room_id, last_read_seq)
+        items.append(
+            {
+                "roomId": room_id,
+                "lastReadSeq": last_read_seq,
+                "latestSeq": latest,
+                "unread": max(latest - last_read_seq, 0),
+            }
+        )
+    return items
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+# dm_key -> room_id. DM 룸은 삭제되지 않으므로 만료 없이 LRU로만 크기를 제한한다
+DM_CACHE_SIZE = int(os.getenv("DM_CACHE_SIZE", "100000"))
+
+
+def dm_key(user_a: int, user_b: int) -> str:
+    low, high = sorted((user_a, user_b))
+    return f"{low}:{high}"
+
+
+class DmRoomCache:
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._items: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            room_id = self._items.get(key)
+            if room_id is not None:
+                self._items.move_to_end(key)
+            return room_id
+
+    def put(self, key: str, room_id: int) -> None:
+        with self._lock:
+            self._items[key] = room_id
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+dm_rooms = DmRoomCache(DM_CACHE_SIZE)
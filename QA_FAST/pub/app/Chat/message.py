@@ -2,25 +2,36 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, UniqueConstraint
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.model_base import Base
 
 
 class Message(Base):
+    # sub의 message 테이블을 따라가는 읽기 모델. 프로젝터만 쓰고, id는 sub 메시지 id를 그대로 쓴다.
     __tablename__ = "messages"
     __table_args__ = (
-        UniqueConstraint("room_id", "seq"),
+        Index("ix_messages_room_id_seq", "room_id", "seq"),
+        # 스레드 조회용
+        Index("ix_messages_reply_to_id_seq", "reply_to_id", "seq"),
+        # 델타 동기화(changes)용
+        Index("ix_messages_room_id_version", "room_id", "version"),
     )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
     room_id: Mapped[int] = mapped_column(Integer, index=True)
     sender_id: Mapped[int] = mapped_column(Integer, index=True)
+    to_user_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     content: Mapped[str] = mapped_column(String(4000))
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     seq: Mapped[int] = mapped_column(Integer, index=True)
     reply_to_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     edited_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
-
-
+    # 스레드 배지용 집계 (sub에서 계산된 값을 그대로 반영)
+    reply_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_reply_seq: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # 이 행에 마지막으로 반영된 sub의 change_id (더 오래된 이벤트로 덮어쓰지 않기 위한 비교용)
+    change_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+
+# /ws 연결 수명주기 + 하트비트 기반 접속 상태.
+# 유저별 타이머 대신 계층형 타이밍 휠 하나로 만료를 처리한다 (스케줄/취소 O(1), 틱당 해당 슬롯만 처리).
+PRESENCE_TTL = float(os.getenv("PRESENCE_TTL", "60"))
+PRESENCE_TICK = float(os.getenv("PRESENCE_TICK", "1"))
+
+# (room_id, user_id, online)
+PresenceEvent = Tuple[int, int, bool]
+
+
+class TimingWheel:
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 3, now: Optional[float] = None) -> None:
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._wheels: List[List[Set[Hashable]]] = [[set() for _ in range(slots)] for _ in range(levels)]
+        self._current = int((time.monotonic() if now is None else now) // tick)
+        self._deadlines: Dict[Hashable, int] = {}
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, key: Hashable, at: float) -> None:
+        self.cancel(key)
+        deadline = max(math.ceil(at / self.tick), self._current + 1)
+        self._deadlines[key] = deadline
+        self._place(key, deadline)
+
+    def cancel(self, key: Hashable) -> None:
+        where = self._where.pop(key, None)
+        if where is not None:
+            self._wheels[where[0]][where[1]].discard(key)
+        self._deadlines.pop(key, None)
+
+    def _place(self, key: Hashable, deadline: int) -> None:
+        # 캐스케이드 중에는 현재 틱 슬롯이 아직 처리 전이므로 현재 틱까지 허용
+        deadline = max(deadline, self._current)
+        delta = deadline - self._current
+        for level in range(self.levels):
+            # 레벨 L은 slots^(L+1) 틱 이내의 만료를 담는다. 최상위 레벨을 넘는 값은 캐스케이드 때 다시 배치
+            if delta < self.slots ** (level + 1) or level == self.levels - 1:
+                slot = (deadline // self.slots ** level) % self.slots
+                self._wheels[level][slot].add(key)
+                self._where[key] = (level, slot)
+                return
+
+    def advance(self, now: float) -> List[Hashable]:
+        target = int(now // self.tick)
+        expired: List[Hashable] = []
+        while self._current < target:
+            self._current += 1
+            t = self._current
+            # 상위 레벨 슬롯이 돌아오면 하위 레벨로 내린다
+            for level in range(1, self.levels):
+                span = self.slots ** level
+                if t % span:
+                    break
+                slot = (t // span) % self.slots
+                bucket, self._wheels[level][slot] = self._wheels[level][slot], set()
+                for key in bucket:
+                    self._place(key, self._deadlines[key])
+            slot = t % self.slots
+            bucket, self._wheels[0][slot] = self._wheels[0][slot], set()
+            for key in bucket:
+                if self._deadlines[key] <= t:
+                    del self._where[key]
+                    del self._deadlines[key]
+                    expired.append(key)
+                else:
+                    self._place(key, self._deadlines[key])
+        return expired
+
+
+class _UserState:
+    # 온라인 유저당 상태는 이 객체 하나 (+ 휠 슬롯 항목)
+    __slots__ = ("sockets", "online", "rooms")
+
+    def __init__(self) -> None:
+        self.sockets = 0
+        self.online = True
+        self.rooms: Dict[int, int] = {}  # room_id -> 이 룸에 join한 소켓 수
+
+
+class PresenceTracker:
+    def __init__(self, ttl: float = PRESENCE_TTL, wheel: Optional[TimingWheel] = None) -> None:
+        self.ttl = ttl
+        self.wheel = wheel if wheel is not None else TimingWheel(PRESENCE_TICK)
+        self._users: Dict[int, _UserState] = {}
+        self._room_online: Dict[int, Set[int]] = {}
+
+    def _now(self, now: Optional[float]) -> float:
+        return time.monotonic() if now is None else now
+
+    def _set_room(self, room_id: int, user_id: int, online: bool, events: List[PresenceEvent]) -> None:
+        users = self._room_online.get(room_id)
+        if online:
+            if users is None:
+                users = self._room_online[room_id] = set()
+            users.add(user_id)
+        elif users is not None:
+            users.discard(user_id)
+            if not users:
+                del self._room_online[room_id]
+        events.append((room_id, user_id, online))
+
+    def connect(self, user_id: int, now: Optional[float] = None) -> List[PresenceEvent]:
+        state = self._users.get(user_id)
+        if state is None:
+            state = self._users[user_id] = _UserState()
+        state.sockets += 1
+        return self.heartbeat(user_id, now)
+
+    def heartbeat(self, user_id: int, now: Optional[float] = None) -> List[PresenceEvent]:
+        state = self._users.get(user_id)
+        events: List[PresenceEvent] = []
+        if state is None:
+            return events
+        self.wheel.schedule(user_id, self._now(now) + self.ttl)
+        if not state.online:
+            # 하트비트가 끊겨 만료됐던 연결이 다시 살아난 경우
+            state.online = True
+            for room_id in state.rooms:
+                self._set_room(room_id, user_id, True, events)
+        return events
+
+    def disconnect(self, user_id: int) -> List[PresenceEvent]:
+        state = self._users.get(user_id)
+        events: List[PresenceEvent] = []
+        if state is None:
+            return events
+        state.sockets -= 1
+        if state.sockets > 0:
+            return events
+        del self._users[user_id]
+        self.wheel.cancel(user_id)
+        if state.online:
+            for room_id in state.rooms:
+                self._set_room(room_id, user_id, False, events)
+        return events
+
+    def join(self, user_id: int, room_id: int) -> List[PresenceEvent]:
+        state = self._users.get(user_id)
+        events: List[PresenceEvent] = []
+        if state is None:
+            return events
+        refs = state.rooms.get(room_id, 0)
+        state.rooms[room_id] = refs + 1
+        if refs == 0 and state.online:
+            self._set_room(room_id, user_id, True, events)
+        return events
+
+    def leave(self, user_id: int, room_id: int) -> List[PresenceEvent]:
+        state = self._users.get(user_id)
+        events: List[PresenceEvent] = []
+        if state is None or room_id not in state.rooms:
+            return events
+        refs = state.rooms[room_id] - 1
+        if refs > 0:
+            state.rooms[room_id] = refs
+            return events
+        del state.rooms[room_id]
+        if state.online:
+            self._set_room(room_id, user_id, False, events)
+        return events
+
+    def expire(self, now: Optional[float] = None) -> List[PresenceEvent]:
+        events: List[PresenceEvent] = []
+        for user_id in self.wheel.advance(self._now(now)):
+            state = self._users.get(user_id)
+            if state is None or not state.online:
+                continue
+            # 소켓은 남아 있어도 하트비트가 없으면 오프라인으로 본다 (half-open 연결)
+            state.online = False
+            for room_id in state.rooms:
+                self._set_room(room_id, user_id, False, events)
+        return events
+
+    def is_online(self, user_id: int) -> bool:
+        state = self._users.get(user_id)
+        return state is not None and state.online
+
+    def room_online(self, room_id: int) -> List[int]:
+        return sorted(self._room_online.get(room_id, ()))
+
+    def online_count(self) -> int:
+        return sum(1 for state in self._users.values() if state.online)
+
+
+presence = PresenceTracker()
+
+
+async def run_presence_expiry(on_events) -> None:
+    while True:
+        await asyncio.sleep(PRESENCE_TICK)
+        events = presence.expire()
+        if events:
+            await on_events(events)
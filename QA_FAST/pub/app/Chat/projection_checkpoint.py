@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.model_base import Base
+
+
+class ProjectionCheckpoint(Base):
+    # 프로젝터별로 마지막으로 반영한 sub change_id (읽기 모델 갱신과 같은 트랜잭션에서 저장)
+    __tablename__ = "projection_checkpoint"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    change_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
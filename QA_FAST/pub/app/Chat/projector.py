@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Connection, Engine
+
+from qa_common.log import get_logger
+
+from app.Chat.message import Message
+from app.Chat.projection_checkpoint import ProjectionCheckpoint
+from app.Chat.room_activity import room_activity
+from app.Chat.transport import SubError, SubUnavailable, transport
+from app.core.metrics import registry
+
+
+# sub의 전역 변경 피드(GET /messages/feed)를 따라가며 pub의 messages 읽기 모델을 갱신한다.
+# upsert는 change_id 비교로 멱등이고, 체크포인트는 같은 트랜잭션에 저장한다.
+PROJECTOR_NAME = "messages"
+PROJECTOR_INTERVAL = float(os.getenv("PROJECTOR_INTERVAL", "0.2"))
+PROJECTOR_BATCH = int(os.getenv("PROJECTOR_BATCH", "500"))
+# change_id는 커밋 순서가 아니라 할당 순서라서, 늦게 커밋되는 트랜잭션이 있으면 순번이 잠시 비어 보인다.
+# 빈 순번은 이 시간 동안 다시 확인하고, 지나면 롤백(또는 같은 행의 중간 변경)으로 보고 넘어간다.
+PROJECTOR_GAP_TIMEOUT = float(os.getenv("PROJECTOR_GAP_TIMEOUT", "5"))
+# 한 번에 이보다 크게 건너뛴 구간은 추적하지 않는다 (재구축 시 과거 이력의 빈 순번 등)
+PROJECTOR_MAX_GAP = int(os.getenv("PROJECTOR_MAX_GAP", "1000"))
+# 워커가 여러 개여도 프로젝터는 advisory lock을 잡은 한 워커에서만 돈다. 나머지는 이 간격으로 다시 시도한다
+PROJECTOR_LOCK_KEY = 740101
+PROJECTOR_LOCK_RETRY = float(os.getenv("PROJECTOR_LOCK_RETRY", "5"))
+
+log = get_logger("pub.projector")
+
+PROJECTOR_APPLIED = registry.counter("qa_projector_applied_total", "Feed items applied to the read model")
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value.rstrip("Z")) if value else None
+
+
+def _row(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": item["id"],
+        "room_id": item["roomId"],
+        "sender_id": item["senderId"],
+        "to_user_id": item.get("toUserId"),
+        # 삭제된 메시지는 피드에 본문이 없다
+        "content": item.get("content") or "",
+        "created_at": _parse_ts(item["createdAt"]),
+        "seq": item["seq"],
+        "reply_to_id": item.get("replyToId"),
+        "edited_at": _parse_ts(item.get("editedAt")),
+        "reply_count": item.get("replyCount") or 0,
+        "last_reply_seq": item.get("lastReplySeq"),
+        "deleted_at": _parse_ts(item.get("deletedAt")),
+        "version": item.get("version") or 0,
+        "change_id": item["changeId"],
+    }
+
+
+def record_room_activity(items: Iterable[Dict[str, Any]]) -> None:
+    # 인박스 정렬/미리보기용 룸 상태. WS publish뿐 아니라 sub에 직접 들어온 메시지도 피드로 반영된다.
+    # 버퍼와 flush가 seq를 비교하므로 수정/삭제로 다시 온 이전 메시지는 최신 상태를 덮지 않는다
+    for item in items:
+        # 귓속말과 삭제된 메시지는 미리보기에 노출하지 않음
+        hidden = item.get("toUserId") is not None or item.get("deletedAt")
+        preview = None if hidden else item.get("content")
+        room_activity.record(item["roomId"], item["seq"], _parse_ts(item["createdAt"]), preview)
+
+
+class MessageProjector:
+    def __init__(
+        self,
+        name: str = PROJECTOR_NAME,
+        gap_timeout: float = PROJECTOR_GAP_TIMEOUT,
+        max_gap: int = PROJECTOR_MAX_GAP,
+    ) -> None:
+        self.name = name
+        self.gap_timeout = gap_timeout
+        self.max_gap = max_gap
+        # 피드를 읽은 위치 (메모리). 저장되는 체크포인트는 아직 비어 있는 순번 앞에서 멈춘다
+        self.cursor = 0
+        self._gaps: Dict[int, float] = {}
+
+    @property
+    def checkpoint(self) -> int:
+        return min(self._gaps) - 1 if self._gaps else self.cursor
+
+    @property
+    def open_gaps(self) -> int:
+        return len(self._gaps)
+
+    def reset(self, checkpoint: int = 0) -> None:
+        self.cursor = checkpoint
+        self._gaps.clear()
+
+    def observe(self, change_ids: Iterable[int], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        for change_id in sorted(set(change_ids)):
+            if change_id > self.cursor:
+                if change_id - self.cursor - 1 <= self.max_gap:
+                    for missing in range(self.cursor + 1, change_id):
+                        self._gaps.setdefault(missing, now)
+                self.cursor = change_id
+            else:
+                # 늦게 커밋된 변경이 도착
+                self._gaps.pop(change_id, None)
+        expired = [change_id for change_id, since in self._gaps.items() if now - since >= self.gap_timeout]
+        for change_id in expired:
+            del self._gaps[change_id]
+
+    def load(self, engine: Engine) -> int:
+        with engine.connect() as conn:
+            saved = conn.execute(
+                select(ProjectionCheckpoint.change_id).where(ProjectionCheckpoint.name == self.name)
+            ).scalar()
+        self.reset(saved or 0)
+        return self.cursor
+
+    def apply(self, engine: Engine, items: List[Dict[str, Any]]) -> int:
+        # 같은 배치에 같은 메시지가 두 번 있으면 최신 change_id만 남긴다 (ON CONFLICT는 한 행을 한 번만 갱신)
+        latest: Dict[int, Dict[str, Any]] = {}
+        for item in items:
+            current = latest.get(item["id"])
+            if current is None or current["changeId"] < item["changeId"]:
+                latest[item["id"]] = item
+        with engine.begin() as conn:
+            if latest:
+                stmt = pg_insert(Message).values([_row(item) for item in latest.values()])
+                conn.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[Message.id],
+                        set_={name: stmt.excluded[name] for name in _row(items[0]) if name != "id"},
+                        # 이미 더 최신 변경이 반영된 행은 건드리지 않는다 (재적용/순서 뒤바뀜에 안전)
+                        where=Message.change_id < stmt.excluded.change_id,
+                    )
+                )
+            checkpoint = pg_insert(ProjectionCheckpoint).values(
+                name=self.name, change_id=self.checkpoint, updated_at=datetime.utcnow()
+            )
+            conn.execute(
+                checkpoint.on_conflict_do_update(
+                    index_elements=[ProjectionCheckpoint.name],
+                    set_={
+                        # 체크포인트는 뒤로 가지 않는다 (락을 넘겨받기 전 워커의 늦은 커밋 등)
+                        "change_id": func.greatest(ProjectionCheckpoint.change_id, checkpoint.excluded.change_id),
+                        "updated_at": checkpoint.excluded.updated_at,
+                    },
+                )
+            )
+        PROJECTOR_APPLIED.inc(len(latest))
+        return len(latest)
+
+    async def step(self, engine: Engine) -> bool:
+        # 한 번 폴링해서 반영. 더 읽을 것이 없으면 True
+        feed = await transport.feed(self.cursor, PROJECTOR_BATCH)
+        items = list(feed["items"])
+        # 비어 있는 순번이 그 사이 커밋됐는지 해당 순번만 골라 다시 확인 (커서에서 멀리 떨어진 순번도 빠지지 않는다)
+        missing = sorted(self._gaps)
+        for start in range(0, len(missing), PROJECTOR_BATCH):
+            chunk = missing[start:start + PROJECTOR_BATCH]
+            recheck = await transport.feed(chunk[0] - 1, len(chunk), change_ids=chunk)
+            items.extend(item for item in recheck["items"] if item["changeId"] <= self.cursor)
+        cursor, gaps = self.cursor, dict(self._gaps)
+        self.observe(item["changeId"] for item in items)
+        try:
+            await asyncio.to_thread(self.apply, engine, items)
+        except Exception:
+            # 반영 실패 시 읽은 위치도 되돌려 다음 폴링에서 다시 읽는다
+            self.cursor, self._gaps = cursor, gaps
+            raise
+        record_room_activity(items)
+        return not feed["hasMore"]
+
+
+projector = MessageProjector()
+
+
+def _projector_state():
+    yield (), projector.checkpoint
+
+
+registry.gauge("qa_projector_checkpoint", "Last change id durably applied to the read model", callback=_projector_state)
+
+
+def try_lock(engine: Engine) -> Optional[Connection]:
+    # 세션 advisory lock은 이 연결이 살아 있는 동안 유지된다 (트랜잭션을 열어 두지 않도록 autocommit)
+    conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        if conn.exec_driver_sql(f"select pg_try_advisory_lock({PROJECTOR_LOCK_KEY})").scalar():
+            return conn
+    except Exception:
+        conn.invalidate()
+        raise
+    conn.close()
+    return None
+
+
+def unlock(conn: Connection) -> None:
+    # 풀로 돌아간 연결에 락이 남지 않도록 해제하고, 실패하면 연결을 버린다
+    try:
+        conn.exec_driver_sql(f"select pg_advisory_unlock({PROJECTOR_LOCK_KEY})")
+    except Exception:
+        conn.invalidate()
+    finally:
+        conn.close()
+
+
+async def _project(engine: Engine, lock: Connection, interval: float) -> None:
+    await asyncio.to_thread(projector.load, engine)
+    log.info("projector.start", checkpoint=projector.cursor)
+    while True:
+        try:
+            caught_up = await projector.step(engine)
+        except (SubError, SubUnavailable) as exc:
+            log.warning("projector.feed_failed", error=exc)
+            caught_up = True
+        except Exception as exc:
+            log.error("projector.apply_failed", error=exc)
+            caught_up = True
+        if caught_up:
+            await asyncio.sleep(interval)
+            # 락 연결이 끊겼으면 락도 풀린 것이므로 다시 경쟁한다
+            await asyncio.to_thread(lock.exec_driver_sql, "select 1")
+
+
+async def run_projector(engine: Engine, interval: Optional[float] = None) -> None:
+    interval = PROJECTOR_INTERVAL if interval is None else interval
+    while True:
+        try:
+            lock = await asyncio.to_thread(try_lock, engine)
+        except Exception as exc:
+            log.error("projector.lock_failed", error=exc)
+            lock = None
+        if lock is None:
+            await asyncio.sleep(PROJECTOR_LOCK_RETRY)
+            continue
+        try:
+            await _project(engine, lock, interval)
+        except Exception as exc:
+            log.error("projector.lock_lost", error=exc)
+        finally:
+            await asyncio.to_thread(unlock, lock)
+
+
+async def catch_up(engine: Engine) -> None:
+    projector.load(engine)
+    while not await projector.step(engine):
+        pass
+
+
+def rebuild(engine: Engine) -> None:
+    # 읽기 모델을 비우고 change_id 0부터 다시 따라온다
+    with engine.begin() as conn:
+        conn.execute(delete(Message))
+        conn.execute(delete(ProjectionCheckpoint).where(ProjectionCheckpoint.name == projector.name))
+
+
+if __name__ == "__main__":
+    # python -m app.Chat.projector rebuild   (pub을 멈춘 상태에서 실행 권장)
+    # python -m app.Chat.projector catchup
+    from app.db.session import engine
+
+    async def _main(command: str) -> None:
+        if command == "rebuild":
+            rebuild(engine)
+        elif command != "catchup":
+            raise SystemExit(f"unknown command: {command}")
+        try:
+            await catch_up(engine)
+        finally:
+            await transport.shutdown()
+        print(f"checkpoint {projector.checkpoint}")
+
+    asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else "catchup"))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, column, update, values
+from sqlalchemy.engine import Engine
+
+from qa_common.log import get_logger
+
+from app.Chat.room_member import RoomMember
+
+
+# mark_read는 매우 잦으므로 바로 쓰지 않고 메모리에 모았다가 배치로 반영한다.
+# 같은 (room, user)의 갱신은 마지막 값만 남는다.
+READ_FLUSH_INTERVAL = float(os.getenv("READ_FLUSH_INTERVAL", "0.5"))
+READ_FLUSH_BATCH = int(os.getenv("READ_FLUSH_BATCH", "1000"))
+
+log = get_logger("pub.read_pointers")
+
+Key = Tuple[int, int]
+
+
+class ReadPointerBuffer:
+    def __init__(self) -> None:
+        self._pending: Dict[Key, int] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, room_id: int, user_id: int, seq: int) -> None:
+        with self._lock:
+            self._pending[(room_id, user_id)] = seq
+
+    def pending(self, user_id: int) -> Dict[int, int]:
+        # 아직 반영 전인 포인터 (조회 시 DB 값 위에 덮어쓴다)
+        with self._lock:
+            return {room_id: seq for (room_id, uid), seq in self._pending.items() if uid == user_id}
+
+    def drain(self) -> List[Tuple[int, int, int]]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return [(room_id, user_id, seq) for (room_id, user_id), seq in pending.items()]
+
+    def flush(self, engine: Engine) -> int:
+        rows = self.drain()
+        written = 0
+        for start in range(0, len(rows), READ_FLUSH_BATCH):
+            batch = rows[start:start + READ_FLUSH_BATCH]
+            # UPDATE room_members SET last_read_seq = v.seq FROM (VALUES ...) v WHERE ...
+            v = values(
+                column("room_id", Integer), column("user_id", Integer), column("seq", Integer), name="v"
+            ).data(batch)
+            stmt = (
+                update(RoomMember)
+                .where(RoomMember.room_id == v.c.room_id, RoomMember.user_id == v.c.user_id)
+                .values(last_read_seq=v.c.seq)
+            )
+            try:
+                with engine.begin() as conn:
+                    conn.execute(stmt)
+            except Exception as exc:
+                # 반영하지 못한 값은 그 사이 더 새로운 값이 들어오지 않았을 때만 되돌려 놓는다
+                with self._lock:
+                    for room_id, user_id, seq in rows[start:]:
+                        self._pending.setdefault((room_id, user_id), seq)
+                log.error("read_pointers.flush_failed", rows=len(rows) - start, error=exc)
+                break
+            written += len(batch)
+        return written
+
+
+read_pointers = ReadPointerBuffer()
+
+
+async def run_read_pointer_flusher(engine: Engine, interval: Optional[float] = None) -> None:
+    interval = READ_FLUSH_INTERVAL if interval is None else interval
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(read_pointers.flush, engine)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String
+from sqlalchemy import DateTime, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.model_base import Base
@@ -10,9 +10,21 @@ from app.model_base import Base
 
 class Room(Base):
     __tablename__ = "rooms"
+    __table_args__ = (
+        Index("uq_rooms_dm_key", "dm_key", unique=True),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     type: Mapped[str] = mapped_column(String(10), index=True)  # dm | group
     title: Mapped[str] = mapped_column(String(100))
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    # dm 룸의 정규화된 참여자 쌍 "min:max" (group은 NULL)
+    dm_key: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    # 인박스용 비정규화 상태 (프로젝터가 반영한 변경으로 room_activity 버퍼가 갱신)
+    last_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    last_message_preview: Mapped[str | None] = mapped_column(String(200), nullable=True)
 
 
+# 내 룸 목록(최근 활동순) keyset 조회용. list_user_rooms의 정렬 키와 같은 식이어야 한다
+Index("ix_rooms_activity", func.coalesce(Room.last_message_at, Room.created_at), Room.id)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Integer, String, column, func, update, values
+from sqlalchemy.engine import Engine
+
+from qa_common.log import get_logger
+
+from app.Chat.room import Room
+
+
+# publish마다 rooms를 갱신하면 룸 행이 핫스팟이 되므로,
+# 룸별 최신 활동만 메모리에 모았다가 주기적으로 배치 반영한다.
+# 멤버 행은 건드리지 않는다 (인박스는 rooms.last_message_at으로 정렬하므로 룸당 한 행만 쓴다).
+ROOM_ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ROOM_ACTIVITY_FLUSH_INTERVAL", "0.5"))
+ROOM_ACTIVITY_FLUSH_BATCH = int(os.getenv("ROOM_ACTIVITY_FLUSH_BATCH", "500"))
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+
+log = get_logger("pub.room_activity")
+
+Activity = Tuple[int, datetime, Optional[str]]
+
+
+class RoomActivityBuffer:
+    def __init__(self) -> None:
+        self._pending: Dict[int, Activity] = {}
+        self._lock = threading.Lock()
+
+    def record(self, room_id: int, seq: int, at: datetime, preview: Optional[str]) -> None:
+        if preview is not None:
+            preview = preview[:LAST_MESSAGE_PREVIEW_LENGTH]
+        with self._lock:
+            current = self._pending.get(room_id)
+            if current is None or current[0] < seq:
+                self._pending[room_id] = (seq, at, preview)
+
+    def drain(self) -> List[Tuple[int, int, datetime, Optional[str]]]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return [(room_id, seq, at, preview) for room_id, (seq, at, preview) in pending.items()]
+
+    def flush(self, engine: Engine) -> int:
+        rows = self.drain()
+        written = 0
+        for start in range(0, len(rows), ROOM_ACTIVITY_FLUSH_BATCH):
+            batch = rows[start:start + ROOM_ACTIVITY_FLUSH_BATCH]
+            v = values(
+                column("room_id", Integer),
+                column("seq", Integer),
+                column("at", DateTime),
+                column("preview", String),
+                name="v",
+            ).data(batch)
+            # 늦게 도착한 이전 seq가 최신 상태를 덮지 않도록 seq/시각 비교 후 갱신
+            rooms = (
+                update(Room)
+                .where(Room.id == v.c.room_id, Room.last_seq < v.c.seq)
+                .values(
+                    last_seq=v.c.seq,
+                    last_message_at=v.c.at,
+                    last_message_preview=func.coalesce(v.c.preview, Room.last_message_preview),
+                )
+            )
+            try:
+                with engine.begin() as conn:
+                    conn.execute(rooms)
+            except Exception as exc:
+                # 반영하지 못한 활동은 다시 버퍼에 (그 사이 더 최신 활동이 있으면 그쪽이 남는다)
+                for room_id, seq, at, preview in rows[start:]:
+                    self.record(room_id, seq, at, preview)
+                log.error("room_activity.flush_failed", rows=len(rows) - start, error=exc)
+                break
+            written += len(batch)
+        return written
+
+
+room_activity = RoomActivityBuffer()
+
+
+async def run_room_activity_flusher(engine: Engine, interval: Optional[float] = None) -> None:
+    interval = ROOM_ACTIVITY_FLUSH_INTERVAL if interval is None else interval
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(room_activity.flush, engine)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, UniqueConstraint
+from sqlalchemy import DateTime, Index, Integer, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.model_base import Base
@@ -12,11 +12,13 @@ class RoomMember(Base):
     __tablename__ = "room_members"
     __table_args__ = (
         UniqueConstraint("room_id", "user_id"),
+        # 내 룸 목록/안읽은 수: 유저의 멤버 행을 테이블 접근 없이 읽는다
+        Index("ix_room_members_user_rooms", "user_id", "room_id", postgresql_include=["last_read_seq"]),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     room_id: Mapped[int] = mapped_column(Integer, index=True)
     user_id: Mapped[int] = mapped_column(Integer, index=True)
     joined_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
-
-
+    # 마지막으로 읽은 메시지 seq (안읽은 수 = 룸 최신 seq - last_read_seq)
+    last_read_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
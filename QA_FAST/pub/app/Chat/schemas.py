@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Annotated, List, Literal, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# 응답 모델. 룸/멤버는 ORM 객체를 컬럼 이름 그대로, 메시지는 chat_service.message_dict 모양 그대로 내보낸다
+class RoomOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    type: str
+    title: str
+    created_at: datetime
+    dm_key: Optional[str] = None
+    last_seq: int
+    last_message_at: Optional[datetime] = None
+    last_message_preview: Optional[str] = None
+
+
+class RoomPage(BaseModel):
+    items: List[RoomOut]
+    total: int
+    page: int
+    size: int
+
+
+class RoomMemberOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    room_id: int
+    user_id: int
+    joined_at: datetime
+    last_read_seq: int
+
+
+class RoomMemberPage(BaseModel):
+    items: List[RoomMemberOut]
+    total: int
+    page: int
+    size: int
+
+
+class MessageOut(BaseModel):
+    id: int
+    roomId: int
+    senderId: int
+    toUserId: Optional[int]
+    content: Optional[str]
+    seq: int
+    createdAt: str
+    replyToId: Optional[int]
+    replyCount: int
+    lastReplySeq: Optional[int]
+    editedAt: Optional[str]
+    deletedAt: Optional[str]
+    version: int
+
+
+class MessagePage(BaseModel):
+    items: List[MessageOut]
+    total: int
+    page: int
+    size: int
+
+
+class MessageHistory(BaseModel):
+    items: List[MessageOut]
+    nextBeforeSeq: Optional[int]
+
+
+class MessageThread(BaseModel):
+    parent: MessageOut
+    items: List[MessageOut]
+    nextAfterSeq: Optional[int]
+
+
+class ChangeUpsert(BaseModel):
+    op: Literal["upsert"]
+    message: MessageOut
+    version: int
+
+
+class ChangeDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+    seq: int
+    version: int
+
+
+class MessageChanges(BaseModel):
+    items: List[Annotated[Union[ChangeUpsert, ChangeDelete], Field(discriminator="op")]]
+    version: int
+    hasMore: bool
+
+
+class InboxRoom(BaseModel):
+    roomId: int
+    type: str
+    title: str
+    lastSeq: int
+    lastMessageAt: str
+    lastMessagePreview: Optional[str]
+    unread: int
+
+
+class InboxPage(BaseModel):
+    items: List[InboxRoom]
+    nextCursor: Optional[str]
+
+
+class UnreadRoom(BaseModel):
+    roomId: int
+    lastReadSeq: int
+    latestSeq: int
+    unread: int
+
+
+class UnreadCounts(BaseModel):
+    items: List[UnreadRoom]
+    total: int
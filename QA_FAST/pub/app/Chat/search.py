@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import cast, func, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import Session
+
+from app.Chat.room_member import RoomMember
+from app.Chat.sub_message import sub_messages
+
+
+# 메시지 검색 (sub의 message 테이블).
+# - 기본: content_tsv(GIN) + websearch_to_tsquery, ts_rank 순
+# - 한글이 포함된 검색어: 'simple' 토큰은 조사까지 붙어 있어 일치하지 않으므로 pg_trgm(GIN) 부분 일치, 유사도 순
+# 정렬 키 (rank, id) 기준 keyset 페이지네이션
+
+TEXT_CONFIG = "simple"
+SNIPPET_RADIUS = 40
+_HANGUL = re.compile(r"[ᄀ-ᇿ㄰-㆏가-힣]")
+
+Cursor = Tuple[float, int]
+
+
+def uses_trigram(q: str) -> bool:
+    return bool(_HANGUL.search(q))
+
+
+def _escape_like(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def highlight(content: str, terms: List[str], radius: int = SNIPPET_RADIUS) -> str:
+    # 첫 일치 위치 주변만 잘라 <mark>로 감싼다 (HTML 이스케이프 후)
+    terms = [t for t in terms if t]
+    if not terms:
+        return html.escape(content[: radius * 2])
+    pattern = re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    m = pattern.search(content)
+    start = max((m.start() if m else 0) - radius, 0)
+    end = min((m.end() if m else 0) + radius, len(content))
+    window = content[start:end]
+    out = []
+    pos = 0
+    for hit in pattern.finditer(window):
+        out.append(html.escape(window[pos:hit.start()]))
+        out.append(f"<mark>{html.escape(hit.group())}</mark>")
+        pos = hit.end()
+    out.append(html.escape(window[pos:]))
+    return ("…" if start > 0 else "") + "".join(out) + ("…" if end < len(content) else "")
+
+
+def search_messages(
+    db: Session,
+    *,
+    q: str,
+    user_id: Optional[int] = None,
+    room_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[Cursor] = None,
+) -> Tuple[List[dict], Optional[Cursor]]:
+    q = q.strip()
+    limit = max(min(limit, 50), 1)
+    m = sub_messages.c
+    if uses_trigram(q):
+        rank = func.similarity(m.content, q)
+        match = m.content.ilike(f"%{_escape_like(q)}%", escape="\\")
+    else:
+        query = func.websearch_to_tsquery(TEXT_CONFIG, q)
+        rank = func.ts_rank(m.content_tsv, query)
+        match = m.content_tsv.op("@@")(query)
+    # ts_rank/similarity는 real(float4)이다. 텍스트로 받은 float4를 커서로 되돌려 비교하면 값이 어긋나
+    # 경계 행과 같은 순위의 행이 다음 페이지에 다시 나오므로 double precision으로 올려서 정렬/비교한다
+    rank = cast(rank, DOUBLE_PRECISION).label("rank")
+
+    stmt = (
+        select(m.id, m.room_id, m.sender_id, m.to_user_id, m.seq, m.content, m.created_at, rank)
+        .where(match)
+        .where(m.deleted_at.is_(None))
+    )
+    if room_id is not None:
+        stmt = stmt.where(m.room_id == room_id)
+    if user_id is not None:
+        if room_id is None:
+            # 전체 검색은 가입한 룸으로 한정
+            stmt = stmt.where(
+                m.room_id.in_(select(RoomMember.room_id).where(RoomMember.user_id == user_id))
+            )
+        # 귓속말은 보낸/받은 사람에게만
+        stmt = stmt.where(or_(m.to_user_id.is_(None), m.to_user_id == user_id, m.sender_id == user_id))
+    else:
+        stmt = stmt.where(m.to_user_id.is_(None))
+    if cursor is not None:
+        stmt = stmt.where(tuple_(rank, m.id) < tuple_(*cursor))
+    rows = db.execute(stmt.order_by(rank.desc(), m.id.desc()).limit(limit + 1)).all()
+
+    terms = [q] if uses_trigram(q) else q.replace('"', " ").split()
+    items = [
+        {
+            "id": row.id,
+            "roomId": row.room_id,
+            "senderId": row.sender_id,
+            "toUserId": row.to_user_id,
+            "seq": row.seq,
+            "createdAt": row.created_at.isoformat() + "Z",
+            "rank": row.rank,
+            "snippet": highlight(row.content, terms),
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = (rows[limit - 1].rank, rows[limit - 1].id) if len(rows) > limit else None
+    return items, next_cursor
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+# sub 서비스가 소유하는 message 테이블(WS publish 저장소)의 읽기 전용 매핑.
+# pub의 create_all 대상이 되지 않도록 별도 MetaData에 둔다.
+sub_messages = Table(
+    "message",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("room_id", Integer),
+    Column("sender_id", Integer),
+    Column("to_user_id", Integer),
+    Column("content", String(4000)),
+    Column("seq", Integer),
+    Column("reply_to_id", Integer),
+    Column("created_at", DateTime),
+    Column("reply_count", Integer),
+    Column("last_reply_seq", Integer),
+    Column("deleted_at", DateTime),
+    # sub이 생성 컬럼으로 유지하는 검색용 tsvector
+    Column("content_tsv", TSVECTOR),
+)
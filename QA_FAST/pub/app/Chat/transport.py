@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import importlib.util
+import inspect
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from qa_common.log import get_logger
+from qa_common.tracing import TRACE_HEADER
+
+from app.db.session import CLIENT_ID_HEADER
+
+
+# pub -> sub 호출 방식: "http"(기본, 별도 sub 서버) | "embedded"(같은 프로세스에 sub 파이프라인 탑재)
+SUB_TRANSPORT = os.getenv("SUB_TRANSPORT", "http").strip().lower()
+SUB_BASE_URL = os.getenv("SUB_BASE_URL", "http://127.0.0.1:8001")
+# sub 저장은 멱등 키로 보호되므로 짧은 타임아웃 + 자동 재시도를 사용한다
+SUB_PUBLISH_TIMEOUT = float(os.getenv("SUB_PUBLISH_TIMEOUT", "2"))
+SUB_PUBLISH_RETRIES = int(os.getenv("SUB_PUBLISH_RETRIES", "3"))
+SUB_APP_DIR = os.getenv(
+    "SUB_APP_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "sub", "app"),
+)
+# embedded 모드에서 sub의 HTTP/SSE 라우트를 노출할 경로
+SUB_MOUNT_PATH = os.getenv("SUB_MOUNT_PATH", "/sub")
+# pub과 sub 모두 최상위 패키지명이 app이므로 다른 이름으로 적재한다
+SUB_PACKAGE = "qa_sub"
+
+log = get_logger("pub.transport")
+
+
+class SubError(Exception):
+    def __init__(self, status_code: int, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class SubUnavailable(Exception):
+    pass
+
+
+class SubRejected(SubError):
+    # sub의 입장 제어/부하 차단 거절 (429 rate_limited, 503 overloaded)
+    def __init__(self, status_code: int, code: str, scope: str, retry_after: float) -> None:
+        super().__init__(status_code, code)
+        self.code = code
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class SubTransport(ABC):
+    # 구현이 빠진 전송은 첫 호출이 아니라 생성 시점에 실패한다
+    @abstractmethod
+    async def publish(
+        self, payload: Dict[str, Any], trace_id: Optional[str] = None, client_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    async def feed(
+        self, after_change_id: int, limit: int, change_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    async def edit(self, message_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    async def delete(self, message_id: int, room_id: int, sender_id: int) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def notify_membership(self, user_id: int, room_id: int, joined: bool) -> None:
+        ...
+
+    async def startup(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
+def _client_headers(user_id: Any) -> Dict[str, str]:
+    # sub은 호출자별로 read-your-writes를 적용하므로 pub 주소 대신 작성자 userId로 구분되게 한다
+    return {CLIENT_ID_HEADER: str(user_id)} if user_id is not None else {}
+
+
+class HttpSubTransport(SubTransport):
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # 요청마다 커넥션을 새로 맺지 않도록 keep-alive 클라이언트를 재사용
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url)
+        return self._client
+
+    async def publish(
+        self, payload: Dict[str, Any], trace_id: Optional[str] = None, client_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        # client_id: 입장 제어/read-your-writes 키 (pub 연결의 유저). 없으면 작성자
+        headers = _client_headers(client_id if client_id is not None else payload.get("senderId"))
+        if trace_id:
+            headers[TRACE_HEADER] = trace_id
+        attempt = 0
+        while True:
+            try:
+                r = await self.client.post(
+                    "/messages", json=payload, headers=headers, timeout=SUB_PUBLISH_TIMEOUT
+                )
+                break
+            except httpx.TransportError as exc:
+                attempt += 1
+                if attempt > SUB_PUBLISH_RETRIES:
+                    raise SubUnavailable(str(exc)) from exc
+                log.warning("sub.publish.retry", attempt=attempt, key=payload.get("idempotencyKey"))
+                await asyncio.sleep(0.05 * (2 ** attempt))
+        if r.status_code in (429, 503):
+            try:
+                body = r.json()
+                raise SubRejected(r.status_code, body["code"], body.get("scope", ""), float(body["retryAfter"]))
+            except (ValueError, KeyError, TypeError):
+                pass
+        if r.status_code != 200:
+            raise SubError(r.status_code, r.text)
+        return r.json()
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> Dict[str, Any]:
+        try:
+            r = await self.client.request(method, url, timeout=5, **kwargs)
+        except httpx.TransportError as exc:
+            raise SubUnavailable(str(exc)) from exc
+        if r.status_code != 200:
+            raise SubError(r.status_code, r.text)
+        return r.json()
+
+    async def feed(
+        self, after_change_id: int, limit: int, change_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"afterChangeId": after_change_id, "limit": limit}
+        if change_ids is not None:
+            params["changeIds"] = ",".join(str(change_id) for change_id in change_ids)
+        return await self._request("GET", "/messages/feed", params=params)
+
+    async def edit(self, message_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request(
+            "PATCH", f"/messages/{message_id}", json=payload, headers=_client_headers(payload.get("senderId"))
+        )
+
+    async def delete(self, message_id: int, room_id: int, sender_id: int) -> Dict[str, Any]:
+        return await self._request(
+            "DELETE",
+            f"/messages/{message_id}",
+            params={"roomId": room_id, "senderId": sender_id},
+            headers=_client_headers(sender_id),
+        )
+
+    def notify_membership(self, user_id: int, room_id: int, joined: bool) -> None:
+        # SUB의 유저 SSE 스트림이 멤버십 변경을 실시간으로 따라가도록 알림 (실패해도 무시)
+        try:
+            with httpx.Client() as client:
+                client.request(
+                    "POST" if joined else "DELETE",
+                    f"{self.base_url}/sse/users/{user_id}/rooms/{room_id}",
+                    headers=_client_headers(user_id),
+                    timeout=2,
+                )
+        except httpx.HTTPError:
+            pass
+
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _load_sub_package(path: str):
+    if SUB_PACKAGE in sys.modules:
+        return sys.modules[SUB_PACKAGE]
+    path = os.path.abspath(path)
+    spec = importlib.util.spec_from_file_location(
+        SUB_PACKAGE, os.path.join(path, "__init__.py"), submodule_search_locations=[path]
+    )
+    if spec is None or spec.loader is None:
+        raise RuntimeError(f"cannot load sub package from {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[SUB_PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class EmbeddedSubTransport(SubTransport):
+    # sub의 저장 파이프라인과 RoomEventBus를 같은 프로세스에서 직접 호출 (HTTP/JSON 왕복 없음)
+    def __init__(self, app_dir: str) -> None:
+        _load_sub_package(app_dir)
+        self.pipeline = importlib.import_module(f"{SUB_PACKAGE}.pipeline")
+        self.session = importlib.import_module(f"{SUB_PACKAGE}.db.session")
+        self.membership = importlib.import_module(f"{SUB_PACKAGE}.membership")
+        self.rejected = importlib.import_module(f"{SUB_PACKAGE}.admission").Rejected
+        self.asgi_app = importlib.import_module(f"{SUB_PACKAGE}.main").app
+
+    def _publish_sync(
+        self, payload: Dict[str, Any], trace_id: Optional[str], client_id: Optional[str]
+    ) -> Dict[str, Any]:
+        try:
+            body = self.pipeline.PublishMessageRequest(**payload)
+        except ValueError as exc:
+            raise SubError(422, str(exc)) from exc
+        with self.session.SessionLocal() as db:
+            try:
+                return self.pipeline.publish_message(db, body, trace_id=trace_id, client=client_id)
+            except self.rejected as exc:
+                status_code = 429 if exc.code == "rate_limited" else 503
+                raise SubRejected(status_code, exc.code, exc.scope, exc.retry_after) from exc
+
+    def _call_sync(self, fn_name: str, *args: Any) -> Dict[str, Any]:
+        with self.session.SessionLocal() as db:
+            try:
+                return getattr(self.pipeline, fn_name)(db, *args)
+            except self.pipeline.PipelineError as exc:
+                raise SubError(exc.status_code, exc.code) from exc
+
+    async def publish(
+        self, payload: Dict[str, Any], trace_id: Optional[str] = None, client_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return await run_in_threadpool(self._publish_sync, payload, trace_id, client_id)
+
+    async def feed(
+        self, after_change_id: int, limit: int, change_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        return await run_in_threadpool(self._call_sync, "list_feed", after_change_id, limit, change_ids)
+
+    async def edit(self, message_id: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            body = self.pipeline.EditMessageRequest(**payload)
+        except ValueError as exc:
+            raise SubError(422, str(exc)) from exc
+        return await run_in_threadpool(self._call_sync, "edit_message", message_id, body)
+
+    async def delete(self, message_id: int, room_id: int, sender_id: int) -> Dict[str, Any]:
+        return await run_in_threadpool(self._call_sync, "delete_message", message_id, room_id, sender_id)
+
+    def notify_membership(self, user_id: int, room_id: int, joined: bool) -> None:
+        # 다른 pub 워커에 탑재된 sub 버스에도 NOTIFY로 전달된다
+        self.membership.publish_membership(user_id, room_id, joined)
+
+    async def startup(self) -> None:
+        # 마운트된 하위 앱의 startup 핸들러는 Starlette가 실행하지 않으므로 직접 호출
+        await self._run_handlers(self.asgi_app.router.on_startup)
+
+    async def shutdown(self) -> None:
+        await self._run_handlers(self.asgi_app.router.on_shutdown)
+
+    @staticmethod
+    async def _run_handlers(handlers) -> None:
+        for handler in handlers:
+            if inspect.iscoroutinefunction(handler):
+                await handler()
+            else:
+                await run_in_threadpool(handler)
+
+
+def _create_transport() -> SubTransport:
+    if SUB_TRANSPORT == "embedded":
+        return EmbeddedSubTransport(SUB_APP_DIR)
+    return HttpSubTransport(SUB_BASE_URL)
+
+
+transport = _create_transport()
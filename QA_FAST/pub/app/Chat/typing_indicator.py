@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+# 타이핑 표시는 저장하지 않는 휘발성 이벤트다. sub/DB로 보내지 않고 이 프로세스의 룸 소켓에만 전달한다.
+# 키 입력마다 오는 이벤트를 (룸, 유저)별로 스로틀하고, 룸별로 TYPING_INTERVAL마다 한 번만 브로드캐스트한다.
+TYPING_INTERVAL = float(os.getenv("TYPING_INTERVAL", "0.5"))
+# 같은 상태(입력 중)의 반복 이벤트는 이 간격 안에서는 버린다
+TYPING_THROTTLE = float(os.getenv("TYPING_THROTTLE", "3"))
+
+Key = Tuple[int, int]
+
+
+class TypingCoalescer:
+    def __init__(self, throttle: float = TYPING_THROTTLE) -> None:
+        self.throttle = throttle
+        self._last: Dict[Key, Tuple[bool, float]] = {}
+        self._pending: Dict[int, Dict[int, bool]] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, room_id: int, user_id: int, typing: bool = True, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        key = (room_id, user_id)
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and last[0] == typing and now - last[1] < self.throttle:
+                return False
+            self._last[key] = (typing, now)
+            # 한 인터벌 안에서 같은 유저의 상태가 여러 번 바뀌면 마지막 값만 보낸다
+            self._pending.setdefault(room_id, {})[user_id] = typing
+            return True
+
+    def drain(self, now: Optional[float] = None) -> List[Tuple[int, List[int], List[int]]]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            # 스로틀 기록은 간격이 지나면 필요 없으므로 정리 (메모리는 최근 입력한 유저 수에 비례)
+            stale = [key for key, (_, at) in self._last.items() if now - at >= self.throttle]
+            for key in stale:
+                del self._last[key]
+        return [
+            (
+                room_id,
+                sorted(uid for uid, typing in users.items() if typing),
+                sorted(uid for uid, typing in users.items() if not typing),
+            )
+            for room_id, users in pending.items()
+        ]
+
+
+typing_events = TypingCoalescer()
+
+
+async def run_typing_flusher(on_batch) -> None:
+    while True:
+        await asyncio.sleep(TYPING_INTERVAL)
+        batch = typing_events.drain()
+        if batch:
+            await on_batch(batch)
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+
+from app.core.hot_rooms import hot_rooms
+
+
+router = APIRouter()
+
+
+@router.get("/admin/hot-rooms", tags=["admin"])
+def hot_room_list(k: int = 10) -> dict:
+    # 이 프로세스가 본 WS publish 기준 상위 K 룸 (추정치, error는 과대 추정 상한)
+    return hot_rooms.snapshot(max(min(k, 100), 1))
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+
+from app.core.metrics import registry
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", tags=["system"])  # Prometheus scrape
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
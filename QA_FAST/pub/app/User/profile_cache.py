@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# user_id -> 프로필(dict) LRU.
+# 같은 프로세스의 create_user/update_user가 무효화하고, 다른 pub 프로세스의 변경은 TTL로 반영된다.
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "100000"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "60"))
+
+
+class ProfileCache:
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[int, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _get(self, user_id: int, now: float) -> Optional[dict]:
+        entry = self._items.get(user_id)
+        if entry is None:
+            return None
+        expires_at, profile = entry
+        if expires_at <= now:
+            self._drop(user_id)
+            return None
+        self._items.move_to_end(user_id)
+        return profile
+
+    def _drop(self, user_id: int) -> None:
+        self._items.pop(user_id, None)
+
+    def get(self, user_id: int, now: Optional[float] = None) -> Optional[dict]:
+        with self._lock:
+            return self._get(user_id, time.monotonic() if now is None else now)
+
+    def get_many(self, user_ids: Iterable[int], now: Optional[float] = None) -> Tuple[Dict[int, dict], List[int]]:
+        # (캐시에 있는 프로필, 없는 id)
+        now = time.monotonic() if now is None else now
+        found: Dict[int, dict] = {}
+        missing: List[int] = []
+        with self._lock:
+            for user_id in user_ids:
+                profile = self._get(user_id, now)
+                if profile is None:
+                    missing.append(user_id)
+                else:
+                    found[user_id] = profile
+        return found, missing
+
+    def put(self, profile: dict, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._drop(profile["id"])
+            self._items[profile["id"]] = (now + self.ttl, profile)
+            while len(self._items) > self.max_size:
+                self._drop(next(iter(self._items)))
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._drop(user_id)
+
+
+profiles = ProfileCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel, ConfigDict
+
+
+# 응답 모델. ORM 객체를 그대로 받아 컬럼 이름 그대로 내보낸다 (예전 jsonable_encoder 출력과 같은 모양)
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    status: str
+    created_at: datetime
+
+
+class UserPage(BaseModel):
+    items: List[UserOut]
+    total: int
+    page: int
+    size: int
+
+
+class UserBatch(BaseModel):
+    items: List[UserOut]
+    missing: List[int]
+
+
+class FriendOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int
+    friend_user_id: int
+    created_at: datetime
+
+
+class LoginOut(BaseModel):
+    userId: int
+    username: str
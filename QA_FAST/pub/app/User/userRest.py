@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from app.User.user_service import (
     create_user,
+    get_users_by_ids,
     list_users,
     update_user,
     get_or_create_user_by_username,
 )
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.User.schemas import LoginOut, UserBatch, UserOut, UserPage
+
+# /user/users/batch 한 번에 조회할 수 있는 최대 id 수
+USER_BATCH_MAX = int(os.getenv("USER_BATCH_MAX", "300"))
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -17,23 +24,43 @@ router = APIRouter(prefix="/user", tags=["user"])
 class UserCreate(BaseModel):
     username: str
 
-@router.post("/users")
+@router.post("/users", response_model=UserOut)
 def _create_user(body: UserCreate, db: Session = Depends(get_db)):
     return create_user(db, username=body.username)
 
 
-@router.get("/users")
-def _list_users(page: int = 1, size: int = 20, db: Session = Depends(get_db)):
+@router.get("/users", response_model=UserPage)
+def _list_users(page: int = 1, size: int = 20, db: Session = Depends(get_read_db)):
     items, total = list_users(db, page=page, size=size)
     return {"items": items, "total": total, "page": page, "size": size}
 
 
+def _parse_ids(ids: str) -> List[int]:
+    # "1,2,3" -> 중복 제거, 요청 순서 유지
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid_ids")
+    if len(parsed) > USER_BATCH_MAX:
+        raise HTTPException(status_code=400, detail="too_many_ids")
+    return parsed
+
+
+@router.get("/users/batch", response_model=UserBatch)
+def _batch_users(ids: str, db: Session = Depends(get_read_db)):
+    # 히스토리 한 페이지의 senderId들을 한 번에 프로필로 변환 (캐시 + IN 쿼리 한 번)
+    wanted = _parse_ids(ids)
+    items = get_users_by_ids(db, ids=wanted)
+    found = {item["id"] for item in items}
+    return {"items": items, "missing": [user_id for user_id in wanted if user_id not in found]}
+
+
 class UserUpdate(BaseModel):
     username: Optional[str] = None
     status: Optional[str] = None
 
 
-@router.patch("/users/{user_id}")
+@router.patch("/users/{user_id}", response_model=UserOut)
 def _update_user(user_id: int, body: UserUpdate, db: Session = Depends(get_db)):
     return update_user(db, user_id=user_id, username=body.username, status=body.status)
 
@@ -42,7 +69,7 @@ class LoginRequest(BaseModel):
     username: str
 
 
-@router.post("/login")
+@router.post("/login", response_model=LoginOut)
 def _login(body: LoginRequest, db: Session = Depends(get_db)):
     user = get_or_create_user_by_username(db, username=body.username)
     # 간단한 로그인: 토큰 없이 사용자 정보만 반환 (테스트용)
@@ -3,6 +3,8 @@ from typing import Optional, Tuple, List
 from sqlalchemy.orm import Session
 from app.User.user import User
 from app.User.friend import Friend
+from app.User.profile_cache import profiles
+from app.db.session import engine, read_router
 
 
 def paginate(query, page: int, size: int):
@@ -20,6 +22,7 @@ def update_user(db: Session, *, user_id: int, username: Optional[str] = None, st
         user.status = status
     db.commit()
     db.refresh(user)
+    profiles.invalidate(user.id)
     return user
 
 
@@ -42,6 +45,7 @@ def create_user(db: Session, *, username: str) -> User:
     db.add(user)
     db.commit()
     db.refresh(user)
+    profiles.invalidate(user.id)
     return user
 
 
@@ -73,8 +77,28 @@ def list_friends(db: Session, *, user_id: int, page: int, size: int) -> Tuple[Li
     return items, total
 
 
+# Profiles (프로필 캐시 우선, 없는 id만 IN 쿼리 한 번)
+def profile_dict(user: User) -> dict:
+    return {"id": user.id, "username": user.username, "status": user.status, "created_at": user.created_at}
+
+
+def get_users_by_ids(db: Session, *, ids: List[int]) -> List[dict]:
+    # 요청한 id 순서대로, 없는 유저는 빠진다
+    found, missing = profiles.get_many(ids)
+    if missing:
+        # 지연된 replica에서 읽은 프로필은 캐시하지 않는다 (무효화 이후의 옛 값이 TTL 동안 남지 않도록)
+        cacheable = db.get_bind() is engine or read_router.replica_lag() == 0
+        for user in db.query(User).filter(User.id.in_(missing)).all():
+            profile = profile_dict(user)
+            if cacheable:
+                profiles.put(profile)
+            found[user.id] = profile
+    return [found[user_id] for user_id in ids if user_id in found]
+
+
 # Auth (lightweight): get or create by username
 def get_or_create_user_by_username(db: Session, *, username: str) -> User:
+    # primary에서만 조회한다 (프로필 캐시/replica를 쓰면 방금 바뀐 이름으로 다른 유저가 로그인될 수 있다)
     user = db.query(User).filter(User.username == username).first()
     if user is not None:
         return user
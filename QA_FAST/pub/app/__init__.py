@@ -1 +1,9 @@
-__all__ = []
\ No newline at end of file
+import os
+import sys
+
+# 공용 패키지(QA_FAST/qa_common)를 찾을 수 있도록 저장소 루트를 임포트 경로에 추가
+_QA_FAST_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _QA_FAST_DIR not in sys.path:
+    sys.path.append(_QA_FAST_DIR)
+
+__all__ = []
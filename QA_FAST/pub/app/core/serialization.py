@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+# JSON 직렬화는 orjson으로 한다.
+# 라우트에 response_model이 있으면 FastAPI가 pydantic-core(모델마다 한 번 컴파일된 직렬화기)로
+# dict/ORM 객체를 JSON 호환 값으로 바꾸고, 여기서는 바이트로만 만든다 (jsonable_encoder 반사 없음).
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj: Any) -> str:
+    # WS 텍스트 프레임 / SSE data 줄용
+    return orjson.dumps(obj, option=_OPTIONS).decode("utf-8")
+
+
+class OrjsonResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=_OPTIONS)
@@ -1,7 +1,7 @@
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 
-__all__ = ["Session", "get_db"]
+__all__ = ["Session", "get_db", "get_read_db"]
 
 
@@ -1,11 +1,25 @@
-from fastapi import FastAPI
+import asyncio
 
+from fastapi import FastAPI, Request
+
+from qa_common.log import setup_logging
+
+from app.Etc.admin import router as admin_router
 from app.Etc.health import router as health_router
-from app.Chat.chatWs import router as chatWs
+from app.Etc.metrics import router as metrics_router
+from app.Chat.archive_prune import run_archive_prune
+from app.Chat.chatWs import broadcast_presence, broadcast_typing, router as chatWs
+from app.Chat.presence import run_presence_expiry
+from app.Chat.projector import run_projector
+from app.Chat.typing_indicator import run_typing_flusher
 from app.Chat.chatRest import router as chatRest
+from app.Chat.read_pointers import read_pointers, run_read_pointer_flusher
+from app.Chat.room_activity import room_activity, run_room_activity_flusher
+from app.Chat.transport import SUB_MOUNT_PATH, EmbeddedSubTransport, transport
 from app.User.userRest import router as user_router
-from app.model_base import Base
-from app.db.session import engine
+from app.core.serialization import OrjsonResponse
+from app.migrate import verify_schema
+from app.db.session import caller_key, engine, read_router, run_lag_monitor
 
 
 def create_application() -> FastAPI:
@@ -14,24 +28,66 @@ def create_application() -> FastAPI:
         version="0.1.0",
         docs_url="/swagger",
         redoc_url=None,
+        default_response_class=OrjsonResponse,
     )
     application.include_router(health_router)
+    application.include_router(metrics_router)
+    application.include_router(admin_router)
     application.include_router(chatWs)
     application.include_router(chatRest)
     application.include_router(user_router)
+    if isinstance(transport, EmbeddedSubTransport):
+        # 단일 노드 배포: sub의 REST/SSE 엔드포인트를 pub 프로세스에서 함께 제공
+        application.mount(SUB_MOUNT_PATH, transport.asgi_app)
     return application
 
 
+setup_logging()
 app = create_application()
 
 
+@app.middleware("http")
+async def track_writes(request: Request, call_next):
+    # 쓰기 직후에는 같은 호출자의 읽기를 primary로 보내기 위해 기록 (read-your-writes)
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        read_router.mark_write(caller_key(request))
+    return response
+
+
 @app.on_event("startup")
 def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
-    # Ensure missing columns exist (lightweight safeguard for dev)
-    with engine.begin() as conn:
-        conn.exec_driver_sql(
-            "ALTER TABLE message ADD COLUMN IF NOT EXISTS edited_at TIMESTAMP NULL"
-        )
+    # DDL은 실행하지 않는다. 스키마 변경은 `python -m app.migrate`로 배포 전에 한 번 적용
+    verify_schema(engine)
+
+
+@app.on_event("startup")
+async def start_transport() -> None:
+    await transport.startup()
+    app.state.read_pointer_flusher = asyncio.create_task(run_read_pointer_flusher(engine))
+    app.state.room_activity_flusher = asyncio.create_task(run_room_activity_flusher(engine))
+    app.state.presence_expiry = asyncio.create_task(run_presence_expiry(broadcast_presence))
+    app.state.typing_flusher = asyncio.create_task(run_typing_flusher(broadcast_typing))
+    app.state.projector = asyncio.create_task(run_projector(engine))
+    app.state.archive_prune = asyncio.create_task(run_archive_prune(engine))
+    app.state.lag_monitor = asyncio.create_task(run_lag_monitor())
 
 
+@app.on_event("shutdown")
+async def stop_transport() -> None:
+    for name in (
+        "read_pointer_flusher",
+        "room_activity_flusher",
+        "presence_expiry",
+        "typing_flusher",
+        "projector",
+        "archive_prune",
+        "lag_monitor",
+    ):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    # 종료 전에 버퍼에 남은 읽음 포인터/룸 활동을 반영
+    await asyncio.to_thread(read_pointers.flush, engine)
+    await asyncio.to_thread(room_activity.flush, engine)
+    await transport.shutdown()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from alembic import context
+
+# autogenerate가 비교할 수 있도록 모든 모델을 메타데이터에 등록
+from app.Chat import message, projection_checkpoint, room, room_member  # noqa: F401
+from app.User import friend, user  # noqa: F401
+from app.db.session import engine, get_database_url
+from app.migrate import MIGRATION_LOCK_KEY, VERSION_TABLE
+from app.model_base import Base
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    # 같은 DB의 sub 테이블(message, room_version 등)은 autogenerate 대상에서 제외
+    return not (type_ == "table" and reflected and compare_to is None)
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=get_database_url(),
+        target_metadata=Base.metadata,
+        literal_binds=True,
+        version_table=VERSION_TABLE,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as conn:
+        context.configure(
+            connection=conn,
+            target_metadata=Base.metadata,
+            version_table=VERSION_TABLE,
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            conn.exec_driver_sql(f"select pg_advisory_xact_lock({MIGRATION_LOCK_KEY})")
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,131 @@
+"""baseline: schema previously created by on_startup
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 새 DB와 예전 시작 시 DDL로 만들어진 DB 모두에서 같은 결과가 되도록 IF NOT EXISTS로 작성한다
+_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL NOT NULL,
+        username VARCHAR(50) NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        CONSTRAINT pk_users PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS friends (
+        id SERIAL NOT NULL,
+        user_id INTEGER NOT NULL,
+        friend_user_id INTEGER NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        CONSTRAINT pk_friends PRIMARY KEY (id),
+        CONSTRAINT uq_friends_user_id UNIQUE (user_id, friend_user_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rooms (
+        id SERIAL NOT NULL,
+        type VARCHAR(10) NOT NULL,
+        title VARCHAR(100) NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        CONSTRAINT pk_rooms PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS room_members (
+        id SERIAL NOT NULL,
+        room_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        joined_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        CONSTRAINT pk_room_members PRIMARY KEY (id),
+        CONSTRAINT uq_room_members_room_id UNIQUE (room_id, user_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER NOT NULL,
+        room_id INTEGER NOT NULL,
+        sender_id INTEGER NOT NULL,
+        content VARCHAR(4000) NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        seq INTEGER NOT NULL,
+        reply_to_id INTEGER,
+        edited_at TIMESTAMP WITHOUT TIME ZONE,
+        CONSTRAINT pk_messages PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS projection_checkpoint (
+        name VARCHAR(50) NOT NULL,
+        change_id BIGINT DEFAULT 0 NOT NULL,
+        updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        CONSTRAINT pk_projection_checkpoint PRIMARY KEY (name)
+    )
+    """,
+]
+
+# 예전 시작 시 DDL이 단계적으로 추가하던 컬럼
+_COLUMNS = [
+    "ALTER TABLE rooms ADD COLUMN IF NOT EXISTS dm_key VARCHAR(32) NULL",
+    "ALTER TABLE rooms ADD COLUMN IF NOT EXISTS last_seq INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE rooms ADD COLUMN IF NOT EXISTS last_message_at TIMESTAMP NULL",
+    "ALTER TABLE rooms ADD COLUMN IF NOT EXISTS last_message_preview VARCHAR(200) NULL",
+    "ALTER TABLE room_members ADD COLUMN IF NOT EXISTS last_read_seq INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE room_members ADD COLUMN IF NOT EXISTS last_message_at TIMESTAMP NULL",
+    "UPDATE room_members SET last_message_at = joined_at WHERE last_message_at IS NULL",
+    "ALTER TABLE room_members ALTER COLUMN last_message_at SET NOT NULL",
+    # messages는 sub 변경 피드의 읽기 모델 (id는 sub 메시지 id, (room_id, seq) 유니크 제약은 두지 않는다)
+    "ALTER TABLE messages DROP CONSTRAINT IF EXISTS uq_messages_room_id",
+    "ALTER TABLE messages ALTER COLUMN id DROP DEFAULT",
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS to_user_id INTEGER NULL",
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS reply_count INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS last_reply_seq INTEGER NULL",
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP NULL",
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS change_id BIGINT NOT NULL DEFAULT 0",
+]
+
+_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username ON users (username)",
+    "CREATE INDEX IF NOT EXISTS ix_friends_user_id ON friends (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_friends_friend_user_id ON friends (friend_user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_rooms_type ON rooms (type)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_rooms_dm_key ON rooms (dm_key)",
+    "CREATE INDEX IF NOT EXISTS ix_room_members_room_id ON room_members (room_id)",
+    "CREATE INDEX IF NOT EXISTS ix_room_members_user_id ON room_members (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_room_members_user_activity"
+    " ON room_members (user_id, last_message_at, room_id) INCLUDE (last_read_seq)",
+    "CREATE INDEX IF NOT EXISTS ix_messages_room_id ON messages (room_id)",
+    "CREATE INDEX IF NOT EXISTS ix_messages_sender_id ON messages (sender_id)",
+    "CREATE INDEX IF NOT EXISTS ix_messages_seq ON messages (seq)",
+    "CREATE INDEX IF NOT EXISTS ix_messages_room_id_seq ON messages (room_id, seq)",
+    "CREATE INDEX IF NOT EXISTS ix_messages_reply_to_id_seq ON messages (reply_to_id, seq)",
+    "CREATE INDEX IF NOT EXISTS ix_messages_room_id_version ON messages (room_id, version)",
+]
+
+
+def upgrade() -> None:
+    for statement in _TABLES + _COLUMNS + _INDEXES:
+        op.execute(statement)
+    # 예전 on_startup의 ALTER TABLE message ... 는 sub 테이블이므로 sub 마이그레이션이 담당한다
+
+
+def downgrade() -> None:
+    for table in ("projection_checkpoint", "messages", "room_members", "rooms", "friends", "users"):
+        op.execute(f"DROP TABLE IF EXISTS {table}")
@@ -0,0 +1,45 @@
+"""inbox ordered by rooms.last_message_at: drop the per-member activity copy
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_room_members_user_rooms",
+        "room_members",
+        ["user_id", "room_id"],
+        postgresql_include=["last_read_seq"],
+    )
+    op.drop_index("ix_room_members_user_activity", table_name="room_members")
+    op.drop_column("room_members", "last_message_at")
+
+
+def downgrade() -> None:
+    op.add_column("room_members", sa.Column("last_message_at", sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE room_members SET last_message_at = coalesce(rooms.last_message_at, room_members.joined_at)"
+        " FROM rooms WHERE rooms.id = room_members.room_id"
+    )
+    op.alter_column("room_members", "last_message_at", nullable=False)
+    op.create_index(
+        "ix_room_members_user_activity",
+        "room_members",
+        ["user_id", "last_message_at", "room_id"],
+        postgresql_include=["last_read_seq"],
+    )
+    op.drop_index("ix_room_members_user_rooms", table_name="room_members")
@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from qa_common.hot_rooms import HotRooms
+
+
+client = TestClient(app)
+
+
+def test_hot_rooms_endpoint():
+    response = client.get("/admin/hot-rooms?k=5")
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"windowSeconds", "messages", "fanout", "bytes"}
+
+
+def test_top_rooms_with_fixed_capacity_and_window():
+    rooms = HotRooms(capacity=10, bucket_seconds=10, buckets=2)
+    for _ in range(50):
+        rooms.record(1, messages=1, now=0)
+    for _ in range(20):
+        rooms.record(2, messages=1, nbytes=100, now=5)
+    # 용량보다 많은 룸이 지나가도 항목 수는 고정되고 상위 룸은 유지된다
+    for room_id in range(100, 200):
+        rooms.record(room_id, messages=1, now=5)
+
+    top = rooms.top(2, "messages", now=5)
+    assert [item["roomId"] for item in top] == [1, 2]
+    assert all(len(b.sketches["messages"].counts) <= 10 for b in rooms._ring)
+    assert rooms.top(1, "bytes", now=5)[0]["roomId"] == 2
+
+    # 윈도우(2 x 10초)를 벗어난 버킷은 집계에서 빠진다
+    rooms.record(3, messages=1, now=25)
+    assert [item["roomId"] for item in rooms.top(5, "messages", now=25)] == [3]
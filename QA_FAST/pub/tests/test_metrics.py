@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from qa_common.metrics import Registry
+
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE qa_ws_connections gauge" in response.text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    h = registry.histogram("lat", "latency", buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        h.observe(v)
+    text = registry.render()
+    assert 'lat_bucket{le="0.1"} 2' in text
+    assert 'lat_bucket{le="1.0"} 3' in text
+    assert 'lat_bucket{le="+Inf"} 4' in text
+    assert "lat_count 4" in text
+
+
+def test_metric_without_render_cannot_be_created():
+    import pytest
+
+    from qa_common.metrics import _Metric
+
+    class Summary(_Metric):
+        kind = "summary"
+
+    with pytest.raises(TypeError):
+        Summary("s", "summary")
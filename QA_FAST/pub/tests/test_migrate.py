@@ -0,0 +1,20 @@
+import pytest
+
+from app import migrate
+
+
+def test_single_head():
+    assert migrate.head_revision() == "0003"
+
+
+def test_verify_schema_rejects_old_revision(monkeypatch):
+    monkeypatch.setattr(migrate.migrations, "schema_check", True)
+    monkeypatch.setattr(migrate.migrations, "current_revision", lambda engine: None)
+    with pytest.raises(migrate.SchemaOutOfDate):
+        migrate.verify_schema(engine=None)
+
+
+def test_verify_schema_accepts_head(monkeypatch):
+    monkeypatch.setattr(migrate.migrations, "schema_check", True)
+    monkeypatch.setattr(migrate.migrations, "current_revision", lambda engine: migrate.head_revision())
+    migrate.verify_schema(engine=None)
@@ -0,0 +1,39 @@
+from app.Chat.presence import PresenceTracker, TimingWheel
+
+
+def test_wheel_expires_on_deadline_and_cascades():
+    wheel = TimingWheel(tick=1.0, slots=4, levels=3, now=0)
+    wheel.schedule("a", 3)
+    wheel.schedule("b", 10)  # 레벨 1에서 레벨 0으로 내려와야 함
+    wheel.schedule("c", 40)  # 레벨 2
+    wheel.schedule("d", 5)
+    wheel.cancel("d")
+
+    assert wheel.advance(2) == []
+    assert wheel.advance(3) == ["a"]
+    assert wheel.advance(9) == []
+    assert wheel.advance(10) == ["b"]
+    assert wheel.advance(39) == []
+    assert wheel.advance(45) == ["c"]
+    assert len(wheel) == 0
+
+
+def test_presence_join_leave_and_heartbeat_expiry():
+    tracker = PresenceTracker(ttl=5, wheel=TimingWheel(tick=1.0, now=0))
+    assert tracker.connect(7, now=0) == []
+    assert tracker.join(7, 1) == [(1, 7, True)]
+    assert tracker.room_online(1) == [7]
+
+    # 하트비트가 계속 오면 만료되지 않음
+    tracker.heartbeat(7, now=4)
+    assert tracker.expire(now=8) == []
+
+    assert tracker.expire(now=9) == [(1, 7, False)]
+    assert tracker.room_online(1) == []
+    assert tracker.heartbeat(7, now=10) == [(1, 7, True)]
+
+    # 같은 유저의 소켓이 둘이면 마지막 소켓이 끊길 때만 오프라인
+    tracker.connect(7, now=10)
+    assert tracker.disconnect(7) == []
+    assert tracker.disconnect(7) == [(1, 7, False)]
+    assert not tracker.is_online(7)
@@ -0,0 +1,113 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.User import user_service
+from app.User.profile_cache import ProfileCache, profiles
+from app.db.session import get_read_db
+from app.main import app
+
+
+def _profile(user_id, username):
+    return {"id": user_id, "username": username, "status": "active", "created_at": datetime(2024, 1, 1)}
+
+
+def test_lru_eviction():
+    cache = ProfileCache(max_size=2, ttl=60)
+    cache.put(_profile(1, "a"), now=0)
+    cache.put(_profile(2, "b"), now=0)
+    assert cache.get(1, now=1)["username"] == "a"  # 1이 최근 사용으로 이동
+    cache.put(_profile(3, "c"), now=1)
+    assert cache.get(2, now=1) is None
+    found, missing = cache.get_many([1, 2, 3], now=1)
+    assert sorted(found) == [1, 3] and missing == [2]
+
+
+def test_ttl_and_invalidate():
+    cache = ProfileCache(max_size=10, ttl=5)
+    cache.put(_profile(1, "a"), now=0)
+    assert cache.get(1, now=4)["id"] == 1
+    assert cache.get(1, now=5) is None
+    cache.put(_profile(1, "a"), now=10)
+    cache.invalidate(1)
+    assert cache.get(1, now=10) is None and len(cache) == 0
+
+
+def test_batch_endpoint_from_cache():
+    for user_id in (1, 2, 3):
+        profiles.put(_profile(user_id, f"user{user_id}"))
+    app.dependency_overrides[get_read_db] = lambda: None
+    try:
+        client = TestClient(app)
+        response = client.get("/user/users/batch", params={"ids": "3,1,3,2"})
+        assert response.status_code == 200
+        body = response.json()
+        assert [item["id"] for item in body["items"]] == [3, 1, 2]
+        assert body["items"][0] == {
+            "id": 3,
+            "username": "user3",
+            "status": "active",
+            "created_at": "2024-01-01T00:00:00",
+        }
+        assert body["missing"] == []
+        assert client.get("/user/users/batch", params={"ids": "1,x"}).status_code == 400
+        too_many = ",".join(str(i) for i in range(1, 1000))
+        assert client.get("/user/users/batch", params={"ids": too_many}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+        for user_id in (1, 2, 3):
+            profiles.invalidate(user_id)
+
+
+class _Query:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def all(self):
+        return self.rows
+
+
+class _Db:
+    # 지정한 엔진에 바인딩된 세션 흉내 (User 조회 결과 고정)
+    def __init__(self, bind, rows):
+        self.bind = bind
+        self.rows = rows
+
+    def get_bind(self):
+        return self.bind
+
+    def query(self, model):
+        return _Query(self.rows)
+
+
+def test_lagging_replica_reads_are_not_cached(monkeypatch):
+    from app.User.user import User
+
+    rows = [User(id=50, username="replica", status="active", created_at=datetime(2024, 1, 1))]
+    monkeypatch.setattr(user_service.read_router, "replica_lag", lambda: 1.5)
+    try:
+        assert [p["id"] for p in user_service.get_users_by_ids(_Db(object(), rows), ids=[50])] == [50]
+        assert profiles.get(50) is None
+        # primary에서 읽은 값은 캐시한다
+        user_service.get_users_by_ids(_Db(user_service.engine, rows), ids=[50])
+        assert profiles.get(50)["username"] == "replica"
+    finally:
+        profiles.invalidate(50)
+
+
+def test_login_reads_primary_not_cache():
+    from app.User.user import User
+
+    profiles.put(_profile(42, "cached"))
+    try:
+        # 캐시에 같은 이름이 있어도 DB 결과를 쓴다
+        primary = _Db(None, [User(id=7, username="cached", status="active", created_at=datetime(2024, 1, 1))])
+        assert user_service.get_or_create_user_by_username(primary, username="cached").id == 7
+    finally:
+        profiles.invalidate(42)
@@ -0,0 +1,93 @@
+from app.Chat.projector import MessageProjector
+
+
+def test_checkpoint_waits_for_late_commits_until_gap_timeout():
+    projector = MessageProjector(gap_timeout=5)
+    projector.observe([1, 2, 4, 5], now=0)
+    # 3번이 아직 커밋 전일 수 있으므로 저장 위치는 2에서 멈추고, 읽기 위치는 5까지 진행
+    assert projector.cursor == 5
+    assert projector.checkpoint == 2
+
+    projector.observe([3, 6], now=1)
+    assert projector.checkpoint == 6
+
+    projector.observe([8], now=2)
+    assert projector.checkpoint == 6
+    projector.observe([], now=7)  # 롤백된 것으로 보고 넘어감
+    assert projector.checkpoint == 8
+    assert projector.open_gaps == 0
+
+
+class _FakeFeed:
+    # sub 피드 흉내: 커밋된 change_id만 보인다
+    def __init__(self):
+        self.committed = {}
+
+    def commit(self, *change_ids):
+        for change_id in change_ids:
+            self.committed[change_id] = {
+                "id": change_id,
+                "roomId": change_id % 3 + 1,
+                "seq": change_id,
+                "createdAt": "2024-05-01T00:00:00Z",
+                "content": f"m{change_id}",
+                "changeId": change_id,
+            }
+
+    async def feed(self, after_change_id, limit, change_ids=None):
+        ids = sorted(i for i in self.committed if i > after_change_id)
+        if change_ids is not None:
+            ids = [i for i in ids if i in change_ids]
+        items = [self.committed[i] for i in ids[:limit]]
+        return {"items": items, "hasMore": len(ids) > limit}
+
+
+def test_recheck_finds_gaps_far_behind_cursor(monkeypatch):
+    import asyncio
+
+    from app.Chat import projector as module
+
+    fake = _FakeFeed()
+    applied = []
+    monkeypatch.setattr(module, "transport", fake)
+    monkeypatch.setattr(module, "PROJECTOR_BATCH", 500)
+    monkeypatch.setattr(module.MessageProjector, "apply", lambda self, engine, items: applied.extend(items))
+
+    projector = MessageProjector(gap_timeout=60)
+    fake.commit(*[i for i in range(1, 1201) if i not in (100, 700)])
+    while not asyncio.run(projector.step(None)):
+        pass
+    assert projector.cursor == 1200
+    assert projector.checkpoint == 99
+
+    # 두 순번이 다음 폴링 전에 커밋됨. 700은 min(gap)+PROJECTOR_BATCH 범위 밖이다
+    fake.commit(100, 700)
+    asyncio.run(projector.step(None))
+    assert {100, 700} <= {item["changeId"] for item in applied}
+    assert projector.open_gaps == 0
+    assert projector.checkpoint == 1200
+
+
+class _CaptureEngine:
+    def __init__(self):
+        self.statements = []
+
+    def begin(self):
+        from contextlib import contextmanager
+
+        @contextmanager
+        def _tx():
+            yield self
+
+        return _tx()
+
+    def execute(self, stmt):
+        from sqlalchemy.dialects import postgresql
+
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+
+
+def test_checkpoint_upsert_never_moves_backwards():
+    engine = _CaptureEngine()
+    MessageProjector().apply(engine, [])
+    assert "greatest(projection_checkpoint.change_id, excluded.change_id)" in engine.statements[-1]
@@ -0,0 +1,29 @@
+from app.Chat.read_pointers import ReadPointerBuffer
+
+
+def test_mark_read_coalesces_to_last_value():
+    buffer = ReadPointerBuffer()
+    buffer.mark(1, 7, 10)
+    buffer.mark(1, 7, 12)
+    buffer.mark(2, 7, 3)
+    buffer.mark(1, 8, 5)
+
+    assert buffer.pending(7) == {1: 12, 2: 3}
+    assert sorted(buffer.drain()) == [(1, 7, 12), (1, 8, 5), (2, 7, 3)]
+    assert buffer.drain() == []
+
+
+def test_identified_socket_marks_its_own_read_pointer():
+    from fastapi.testclient import TestClient
+
+    from app.Chat.read_pointers import read_pointers
+    from app.main import app
+
+    read_pointers.drain()
+    with TestClient(app).websocket_connect("/ws?userId=7") as ws:
+        ws.send_json({"type": "mark_read", "roomId": 1, "userId": 8, "seq": 5})
+        assert ws.receive_json() == {"type": "read", "roomId": 1, "seq": 5}
+    with TestClient(app).websocket_connect("/ws") as ws:
+        ws.send_json({"type": "mark_read", "roomId": 1, "seq": 5})
+        assert ws.receive_json()["message"] == "userId_required"
+    assert read_pointers.drain() == [(1, 7, 5)]
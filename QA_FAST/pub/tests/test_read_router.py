@@ -0,0 +1,32 @@
+import time
+
+from app.Chat.transport import _client_headers
+from app.db.session import ReadRouter
+
+
+def test_replica_lag_is_unknown_until_probed_and_when_stale():
+    router = ReadRouter(primary=None, replica=None, max_lag=2, check_interval=1, sticky_window=5)
+    assert router.replica_lag() == float("inf")
+    router._lag, router._checked_at = 0.5, time.monotonic()
+    assert router.replica_lag() == 0.5
+    # 백그라운드 측정이 멈추면 replica를 쓰지 않는다
+    router._checked_at = time.monotonic() - 10
+    assert router.replica_lag() == float("inf")
+
+
+def test_sub_calls_carry_end_user_id():
+    assert _client_headers(7) == {"X-Client-Id": "7"}
+    assert _client_headers(None) == {}
+
+
+def test_incomplete_transport_fails_at_instantiation():
+    import pytest
+
+    from app.Chat.transport import SubTransport
+
+    class PublishOnly(SubTransport):
+        async def publish(self, payload, trace_id=None, client_id=None):
+            return payload
+
+    with pytest.raises(TypeError):
+        PublishOnly()
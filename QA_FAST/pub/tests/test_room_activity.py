@@ -0,0 +1,102 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from app.Chat.chat_service import list_user_rooms
+from app.Chat.room import Room
+from app.Chat.room_activity import RoomActivityBuffer
+
+
+class _FakeEngine:
+    def __init__(self):
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+
+
+def test_flush_writes_rooms_only():
+    buffer = RoomActivityBuffer()
+    buffer.record(1, 5, datetime(2024, 5, 1), "hi")
+    engine = _FakeEngine()
+
+    assert buffer.flush(engine) == 1
+    assert len(engine.statements) == 1
+    assert engine.statements[0].startswith("UPDATE rooms")
+    assert "room_members" not in engine.statements[0]
+
+
+class _FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.order = None
+
+    def join(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *clauses):
+        self.order = clauses
+        return self
+
+    def limit(self, n):
+        self.rows = self.rows[:n]
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class _FakeDb:
+    def __init__(self, rows):
+        self.q = _FakeQuery(rows)
+
+    def query(self, *columns):
+        return self.q
+
+
+def test_inbox_orders_by_room_activity_and_applies_pending_reads():
+    at = datetime(2024, 5, 1)
+    room = Room(id=1, type="group", title="t", last_seq=10, last_message_preview="hi")
+    db = _FakeDb([(1, at, 4, room)])
+
+    items, next_cursor = list_user_rooms(db, user_id=7, limit=20, pending={1: 9})
+
+    assert items[0]["unread"] == 1
+    assert next_cursor is None
+    order = str(db.q.order[0].compile(dialect=postgresql.dialect()))
+    assert order == "coalesce(rooms.last_message_at, rooms.created_at) DESC"
+
+
+def test_projected_changes_update_room_activity():
+    from app.Chat.projector import record_room_activity
+    from app.Chat.room_activity import room_activity
+
+    room_activity.drain()
+    record_room_activity(
+        [
+            {"roomId": 1, "seq": 3, "createdAt": "2024-05-01T00:00:03Z", "content": "latest"},
+            {"roomId": 1, "seq": 2, "createdAt": "2024-05-01T00:00:02Z", "content": "edited older"},
+            {"roomId": 2, "seq": 1, "createdAt": "2024-05-01T00:00:01Z", "content": "secret", "toUserId": 9},
+        ]
+    )
+    assert sorted(room_activity.drain()) == [
+        (1, 3, datetime(2024, 5, 1, 0, 0, 3), "latest"),
+        (2, 1, datetime(2024, 5, 1, 0, 0, 1), None),
+    ]
+
+
+def test_unread_counts_use_the_same_latest_seq_as_the_inbox():
+    from app.Chat.chat_service import list_unread_counts
+
+    db = _FakeDb([(1, 4, 10)])
+    assert list_unread_counts(db, user_id=7, pending={1: 9}) == [
+        {"roomId": 1, "lastReadSeq": 9, "latestSeq": 10, "unread": 1}
+    ]
@@ -0,0 +1,62 @@
+from app.Chat import chat_service
+
+
+class _FakeArchive:
+    # 핫 구간보다 오래된 메시지 1000개 (seq 1..1000)
+    last_seq = 1000
+    count = 1000
+    blocks = [object()]
+
+    def __init__(self, room_id):
+        pass
+
+    def newest(self, offset, limit):
+        return [{"seq": seq} for seq in range(1000 - offset, 0, -1)][:limit]
+
+
+class _FakeQuery:
+    # 핫 구간 메시지 150개 (seq 1001..1150)
+    def __init__(self):
+        self.rows = [_Message(seq) for seq in range(1150, 1000, -1)]
+        self._offset, self._limit = 0, None
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def count(self):
+        return len(self.rows)
+
+    def offset(self, n):
+        self._offset = n
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def all(self):
+        return self.rows[self._offset:self._offset + self._limit]
+
+
+class _Message:
+    def __init__(self, seq):
+        self.seq = seq
+
+
+class _FakeDb:
+    def query(self, *args):
+        return _FakeQuery()
+
+
+def test_oversized_page_is_clamped_across_hot_and_cold(monkeypatch):
+    monkeypatch.setattr(chat_service, "RoomArchive", _FakeArchive)
+    monkeypatch.setattr(chat_service, "message_dict", lambda m: {"seq": m.seq})
+
+    # size=500은 100으로 잘린다. 2페이지 = 최신순 101~200번째 (핫 50개 + 콜드 50개)
+    items, total = chat_service.list_room_messages(_FakeDb(), room_id=1, page=2, size=500)
+    assert total == 1150
+    assert len(items) == 100
+    assert [item["seq"] for item in items] == list(range(1050, 950, -1))
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from app.Chat.search import highlight, search_messages, uses_trigram
+
+
+def test_hangul_queries_use_trigram_path():
+    assert uses_trigram("메시지")
+    assert not uses_trigram("hello world")
+
+
+def test_highlight_escapes_and_marks_matches():
+    snippet = highlight("<b>hi</b> 새 메시지를 확인하세요", ["메시지"])
+    assert snippet == "&lt;b&gt;hi&lt;/b&gt; 새 <mark>메시지</mark>를 확인하세요"
+    assert highlight("x" * 100 + " Hello", ["hello"], radius=5) == "…xxxx <mark>Hello</mark>"
+
+
+class _Row:
+    def __init__(self, message_id, rank):
+        self.id = message_id
+        self.room_id = 1
+        self.sender_id = 2
+        self.to_user_id = None
+        self.seq = message_id
+        self.content = "hello"
+        self.created_at = datetime(2024, 5, 1)
+        self.rank = rank
+
+
+class _FakeDb:
+    # (rank, id) 내림차순 keyset을 파이썬으로 흉내낸다
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda r: (r.rank, r.id), reverse=True)
+        self.cursor = None
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        rows = [r for r in self.rows if self.cursor is None or (r.rank, r.id) < self.cursor]
+        limit = stmt._limit_clause.value
+        return type("Result", (), {"all": lambda _: rows[:limit]})()
+
+
+def test_tied_ranks_cross_page_boundary_once():
+    from app.Chat.chatRest import _parse_search_cursor, _search_response
+
+    tied = 0.060792699456214905  # float4 ts_rank을 double precision으로 받은 값
+    db = _FakeDb([_Row(i, tied) for i in range(1, 6)] + [_Row(6, 0.5)])
+    seen = []
+    cursor = None
+    while True:
+        db.cursor = cursor
+        items, next_cursor = search_messages(db, q="hello", room_id=1, limit=2, cursor=cursor)
+        seen.extend(item["id"] for item in items)
+        token = _search_response(items, next_cursor)["nextCursor"]
+        if token is None:
+            break
+        cursor = _parse_search_cursor(token)
+    assert seen == [6, 5, 4, 3, 2, 1]
+
+    # 조회 값과 커서 비교 모두 double precision으로 올린 순위를 사용한다 (ORDER BY는 rank 라벨)
+    sql = str(db.statements[-1].compile(dialect=postgresql.dialect()))
+    assert sql.count("CAST(ts_rank(") == 2
+    assert "AS DOUBLE PRECISION" in sql
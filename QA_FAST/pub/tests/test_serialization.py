@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.Chat.chat_service import message_dict
+from app.Chat.message import Message
+from app.Chat.room import Room
+from app.Chat.schemas import MessagePage, RoomOut
+from app.User.schemas import UserOut
+from app.User.user import User
+from app.core.serialization import OrjsonResponse
+
+
+def _message(i, deleted=False):
+    return Message(
+        id=i, room_id=1, sender_id=2, to_user_id=None, content=f"안녕 {i}", seq=i,
+        created_at=datetime(2024, 5, 1, 12, 0, 0, 123456), reply_to_id=None, reply_count=0,
+        last_reply_seq=None, edited_at=None, deleted_at=datetime(2024, 5, 2) if deleted else None,
+        version=i, change_id=i,
+    )
+
+
+def test_orm_models_keep_jsonable_encoder_shape():
+    room = Room(
+        id=1, type="group", title="t", created_at=datetime(2024, 5, 1, 12, 0, 0, 5), dm_key=None,
+        last_seq=3, last_message_at=datetime(2024, 5, 1), last_message_preview="hi",
+    )
+    user = User(id=7, username="kim", status="active", created_at=datetime(2024, 1, 1))
+    assert RoomOut.model_validate(room).model_dump(mode="json") == jsonable_encoder(room)
+    assert UserOut.model_validate(user).model_dump(mode="json") == jsonable_encoder(user)
+
+
+def test_message_page_round_trip_and_orjson_bytes():
+    items = [message_dict(_message(i, deleted=i == 2)) for i in range(1, 4)]
+    page = {"items": items, "total": 3, "page": 1, "size": 20}
+    dumped = MessagePage.model_validate(page).model_dump(mode="json")
+    assert dumped == page
+    assert OrjsonResponse(dumped).body == JSONResponse(dumped).body
@@ -0,0 +1,29 @@
+from app.Chat.typing_indicator import TypingCoalescer
+
+
+def test_typing_is_throttled_and_coalesced_per_room():
+    typing = TypingCoalescer(throttle=3)
+    assert typing.mark(1, 7, now=0)
+    assert not typing.mark(1, 7, now=1)  # 같은 상태 반복은 스로틀
+    assert typing.mark(1, 8, now=1)
+    assert typing.mark(2, 7, now=1)
+    assert typing.mark(2, 7, False, now=2)  # 상태 변경은 바로 반영
+
+    assert sorted(typing.drain(now=2)) == [(1, [7, 8], []), (2, [], [7])]
+    assert typing.drain(now=2) == []
+    assert typing.mark(1, 7, now=3)
+
+
+def test_unidentified_typing_without_user_id_gets_error_frame():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app).websocket_connect("/ws") as ws:
+        ws.send_json({"type": "join_room", "roomId": 1})
+        assert ws.receive_json()["type"] == "joined"
+        ws.send_json({"type": "typing", "roomId": 1})
+        assert ws.receive_json() == {"type": "error", "message": "userId_required", "roomId": 1}
+        # 연결은 유지된다
+        ws.send_json({"type": "leave_room", "roomId": 1})
+        assert ws.receive_json()["type"] == "left"
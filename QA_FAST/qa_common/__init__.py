@@ -0,0 +1 @@
+# pub과 sub이 함께 쓰는 모듈 (아카이브 파일 형식 등). 각 서비스의 app 패키지가 임포트 경로에 추가한다.
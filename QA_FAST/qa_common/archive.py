@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# 오래된 메시지의 콜드 저장소. 룸마다 추가 전용 세그먼트 파일 하나와 고정 폭 인덱스 파일 하나를 둔다.
+#   <ARCHIVE_DIR>/<room_id>.seg : zlib 압축 블록을 이어 붙인 파일 (블록 = 메시지 JSON 줄 묶음, seq 오름차순)
+#   <ARCHIVE_DIR>/<room_id>.idx : 블록당 32바이트 (first_seq, last_seq, offset, length, count)
+# 읽기는 mmap으로 필요한 블록만 풀어서 읽는다. pub과 sub은 같은 ARCHIVE_DIR을 가리켜야 한다.
+ARCHIVE_DIR = os.path.abspath(os.getenv("ARCHIVE_DIR", "archive"))
+ARCHIVE_BLOCK_MESSAGES = int(os.getenv("ARCHIVE_BLOCK_MESSAGES", "256"))
+
+_INDEX = struct.Struct("<qqQII")
+
+Block = Tuple[int, int, int, int, int]
+
+
+def _paths(room_id: int, root: str) -> Tuple[str, str]:
+    base = os.path.join(root, str(int(room_id)))
+    return base + ".seg", base + ".idx"
+
+
+def _map(path: str) -> Optional[mmap.mmap]:
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+
+
+class RoomArchive:
+    def __init__(self, room_id: int, root: str = ARCHIVE_DIR) -> None:
+        self.room_id = room_id
+        self.seg_path, self.idx_path = _paths(room_id, root)
+        self.blocks: List[Block] = self._load_index()
+
+    def _load_index(self) -> List[Block]:
+        mm = _map(self.idx_path)
+        if mm is None:
+            return []
+        with mm:
+            # 기록 중이던 마지막 레코드(크기가 모자란 꼬리)는 무시
+            return [_INDEX.unpack_from(mm, i * _INDEX.size) for i in range(len(mm) // _INDEX.size)]
+
+    @property
+    def last_seq(self) -> int:
+        return self.blocks[-1][1] if self.blocks else 0
+
+    @property
+    def count(self) -> int:
+        return sum(block[4] for block in self.blocks)
+
+    def _read(self, mm: mmap.mmap, block: Block) -> List[dict]:
+        _, _, offset, length, _ = block
+        return [json.loads(line) for line in zlib.decompress(mm[offset:offset + length]).splitlines()]
+
+    def _iter_blocks(self, blocks: Iterable[Block]) -> Iterator[List[dict]]:
+        mm = _map(self.seg_path)
+        if mm is None:
+            return
+        with mm:
+            for block in blocks:
+                yield self._read(mm, block)
+
+    def all(self) -> List[dict]:
+        return [m for items in self._iter_blocks(self.blocks) for m in items]
+
+    def before(self, seq: Optional[int], limit: int) -> List[dict]:
+        # seq보다 작은 메시지 중 최신 limit개 (오름차순). 인덱스 이진 탐색 후 뒤에서부터 필요한 블록만 읽는다
+        end = len(self.blocks) if seq is None else bisect_left([b[0] for b in self.blocks], seq)
+        out: List[dict] = []
+        for items in self._iter_blocks(reversed(self.blocks[:end])):
+            if seq is not None:
+                items = [m for m in items if m["seq"] < seq]
+            out[:0] = items
+            if len(out) >= limit:
+                break
+        return out[-limit:] if limit else []
+
+    def newest(self, offset: int, limit: int) -> List[dict]:
+        # 최신순 offset번째부터 limit개 (내림차순). 건너뛸 블록은 count만 보고 풀지 않는다
+        selected: List[Block] = []
+        skip = offset
+        for block in reversed(self.blocks):
+            if not selected and skip >= block[4]:
+                skip -= block[4]
+                continue
+            selected.append(block)
+            if sum(b[4] for b in selected) - skip >= limit:
+                break
+        out: List[dict] = []
+        for items in self._iter_blocks(selected):
+            out.extend(reversed(items))
+        return out[skip:skip + limit]
+
+
+def append(room_id: int, messages: List[dict], root: str = ARCHIVE_DIR) -> int:
+    # messages는 seq 오름차순이고 모두 이미 보관된 마지막 seq보다 커야 한다.
+    # 세그먼트를 먼저 fsync한 뒤 인덱스를 추가하므로, 중간에 죽어도 인덱스가 가리키는 블록은 항상 온전하다.
+    if not messages:
+        return 0
+    archive = RoomArchive(room_id, root)
+    if messages[0]["seq"] <= archive.last_seq:
+        raise ValueError(f"room {room_id}: seq {messages[0]['seq']} already archived")
+    os.makedirs(root, exist_ok=True)
+    records: List[bytes] = []
+    with open(archive.seg_path, "ab") as seg:
+        offset = seg.seek(0, os.SEEK_END)
+        for start in range(0, len(messages), ARCHIVE_BLOCK_MESSAGES):
+            chunk = messages[start:start + ARCHIVE_BLOCK_MESSAGES]
+            data = zlib.compress(
+                b"\n".join(json.dumps(m, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for m in chunk)
+            )
+            seg.write(data)
+            records.append(_INDEX.pack(chunk[0]["seq"], chunk[-1]["seq"], offset, len(data), len(chunk)))
+            offset += len(data)
+        seg.flush()
+        os.fsync(seg.fileno())
+    with open(archive.idx_path, "ab") as idx:
+        # 이전 기록이 중간에 끊겼다면 꼬리를 잘라 레코드 경계를 맞춘다
+        size = idx.seek(0, os.SEEK_END)
+        if size % _INDEX.size:
+            idx.truncate(size - size % _INDEX.size)
+            idx.seek(0, os.SEEK_END)
+        idx.write(b"".join(records))
+        idx.flush()
+        os.fsync(idx.fileno())
+    return len(messages)
+
+
+def archived_rooms(root: str = ARCHIVE_DIR) -> Dict[int, int]:
+    # room_id -> 보관된 마지막 seq
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return {}
+    return {
+        int(name[:-4]): RoomArchive(int(name[:-4]), root).last_seq
+        for name in names
+        if name.endswith(".idx") and name[:-4].isdigit()
+    }
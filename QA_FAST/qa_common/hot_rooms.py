@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Hashable, List, Optional
+
+
+# 룸별 메시지 수 / 팬아웃 수 / 바이트의 상위 K개를 고정 메모리로 추적한다.
+# Space-Saving 스케치를 시간 버킷 링으로 두고, 조회 시 윈도우 안의 버킷만 합친다.
+# 메모리: HOT_ROOMS_BUCKETS x 3(지표) x HOT_ROOMS_CAPACITY 항목 (룸 수와 무관)
+# 인스턴스는 서비스마다 따로 만든다 (pub과 sub의 /admin/hot-rooms가 각자 관측한 값만 보여준다).
+HOT_ROOMS_CAPACITY = int(os.getenv("HOT_ROOMS_CAPACITY", "100"))
+HOT_ROOMS_BUCKET_SECONDS = float(os.getenv("HOT_ROOMS_BUCKET_SECONDS", "10"))
+HOT_ROOMS_BUCKETS = int(os.getenv("HOT_ROOMS_BUCKETS", "6"))
+
+METRICS = ("messages", "fanout", "bytes")
+
+
+class SpaceSaving:
+    # 항목이 가득 차면 최소 카운트 항목을 새 키로 교체한다. 교체된 카운트는 error로 남긴다 (과대 추정 상한)
+    __slots__ = ("capacity", "counts", "errors")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.counts: Dict[Hashable, float] = {}
+        self.errors: Dict[Hashable, float] = {}
+
+    def add(self, key: Hashable, weight: float = 1.0) -> None:
+        counts = self.counts
+        if key in counts:
+            counts[key] += weight
+            return
+        if len(counts) < self.capacity:
+            counts[key] = weight
+            self.errors[key] = 0.0
+            return
+        victim = min(counts, key=counts.__getitem__)
+        floor = counts.pop(victim)
+        self.errors.pop(victim, None)
+        counts[key] = floor + weight
+        self.errors[key] = floor
+
+    def clear(self) -> None:
+        self.counts.clear()
+        self.errors.clear()
+
+
+class _Bucket:
+    __slots__ = ("epoch", "sketches")
+
+    def __init__(self, capacity: int) -> None:
+        self.epoch = -1
+        self.sketches = {metric: SpaceSaving(capacity) for metric in METRICS}
+
+
+class HotRooms:
+    def __init__(
+        self,
+        capacity: int = HOT_ROOMS_CAPACITY,
+        bucket_seconds: float = HOT_ROOMS_BUCKET_SECONDS,
+        buckets: int = HOT_ROOMS_BUCKETS,
+    ) -> None:
+        self.bucket_seconds = bucket_seconds
+        self._ring = [_Bucket(capacity) for _ in range(max(buckets, 1))]
+        self._lock = threading.Lock()
+
+    @property
+    def window_seconds(self) -> float:
+        return self.bucket_seconds * len(self._ring)
+
+    def record(
+        self,
+        room_id: Hashable,
+        messages: int = 0,
+        fanout: int = 0,
+        nbytes: int = 0,
+        now: Optional[float] = None,
+    ) -> None:
+        epoch = int((time.monotonic() if now is None else now) // self.bucket_seconds)
+        with self._lock:
+            bucket = self._ring[epoch % len(self._ring)]
+            if bucket.epoch != epoch:
+                # 링을 한 바퀴 돌아온 버킷은 비우고 재사용
+                for sketch in bucket.sketches.values():
+                    sketch.clear()
+                bucket.epoch = epoch
+            if messages:
+                bucket.sketches["messages"].add(room_id, messages)
+            if fanout:
+                bucket.sketches["fanout"].add(room_id, fanout)
+            if nbytes:
+                bucket.sketches["bytes"].add(room_id, nbytes)
+
+    def top(self, k: int = 10, metric: str = "messages", now: Optional[float] = None) -> List[dict]:
+        current = int((time.monotonic() if now is None else now) // self.bucket_seconds)
+        totals: Dict[Hashable, float] = {}
+        errors: Dict[Hashable, float] = {}
+        with self._lock:
+            for bucket in self._ring:
+                if current - bucket.epoch >= len(self._ring) or bucket.epoch > current:
+                    continue
+                sketch = bucket.sketches[metric]
+                for key, count in sketch.counts.items():
+                    totals[key] = totals.get(key, 0.0) + count
+                    errors[key] = errors.get(key, 0.0) + sketch.errors.get(key, 0.0)
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:k]
+        window = self.window_seconds
+        return [
+            {"roomId": key, "count": count, "error": errors[key], "perSecond": round(count / window, 3)}
+            for key, count in ranked
+        ]
+
+    def snapshot(self, k: int = 10) -> dict:
+        return {
+            "windowSeconds": self.window_seconds,
+            **{metric: self.top(k, metric) for metric in METRICS},
+        }
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Any, Dict, Optional
+
+
+# 핫 패스용 구조화 로깅.
+# - 호출 스레드(이벤트 루프)에서는 레코드를 큐에 넣기만 하고, 포맷/stdout 쓰기는 백그라운드 스레드가 한다.
+# - 이벤트별 샘플링: LOG_SAMPLE_RATES="ws.recv=0.01,sse.emit=0.1"
+# - 비활성 레벨은 isEnabledFor 한 번으로 끝난다.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+
+def _parse_sample_rates(raw: str) -> Dict[str, float]:
+    rates: Dict[str, float] = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        event, rate = item.split("=", 1)
+        try:
+            rates[event.strip()] = max(0.0, min(float(rate), 1.0))
+        except ValueError:
+            continue
+    return rates
+
+
+SAMPLE_RATES = _parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+
+
+def _format_value(value: Any) -> str:
+    text = str(value)
+    if not text or any(c in text for c in ' "='):
+        return '"' + text.replace('"', '\\"') + '"'
+    return text
+
+
+class KeyValueFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        ts = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+        parts = [
+            f"ts={ts}.{int(record.msecs):03d}Z",
+            f"level={record.levelname.lower()}",
+            f"logger={record.name}",
+            f"event={record.getMessage()}",
+        ]
+        fields = getattr(record, "fields", None)
+        if fields:
+            parts.extend(f"{k}={_format_value(v)}" for k, v in fields.items())
+        if record.exc_info:
+            parts.append(f"exc={_format_value(self.formatException(record.exc_info))}")
+        return " ".join(parts)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 기본 구현은 호출 스레드에서 메시지를 포맷하므로 그대로 넘긴다 (포맷은 리스너 스레드에서)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # stdout이 느려 큐가 가득 차면 로그를 버린다 (이벤트 루프를 막지 않음)
+            pass
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging() -> None:
+    global _listener
+    root = logging.getLogger("qa")
+    if _listener is not None or root.handlers:
+        # embedded 모드에서는 pub/sub이 같은 프로세스에서 하나의 리스너를 공유한다
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(KeyValueFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root.handlers[:] = [_DroppingQueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+
+
+class StructLogger:
+    __slots__ = ("_logger",)
+
+    def __init__(self, name: str) -> None:
+        self._logger = logging.getLogger(name)
+
+    def enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any]) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        rate = SAMPLE_RATES.get(event)
+        if rate is not None and random.random() >= rate:
+            return
+        self._logger.log(level, event, extra={"fields": fields})
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields)
+
+
+def get_logger(name: str) -> StructLogger:
+    return StructLogger(f"qa.{name}")
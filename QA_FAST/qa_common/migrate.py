@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import os
+from typing import List, Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Engine
+
+
+# pub/sub 공용 Alembic 실행/버전 확인. 서비스별 설정(ini 경로, 버전 테이블)은 app/migrate.py에 둔다
+
+# 0이면 시작 시 버전 확인을 건너뛴다
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "1") != "0"
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+class Migrations:
+    def __init__(self, service: str, ini_path: str, version_table: str, schema_check: bool = SCHEMA_CHECK) -> None:
+        self.service = service
+        self.ini_path = ini_path
+        self.version_table = version_table
+        self.schema_check = schema_check
+
+    def config(self) -> Config:
+        return Config(self.ini_path)
+
+    def head_revision(self) -> Optional[str]:
+        return ScriptDirectory.from_config(self.config()).get_current_head()
+
+    def current_revision(self, engine: Engine) -> Optional[str]:
+        with engine.connect() as conn:
+            return MigrationContext.configure(
+                conn, opts={"version_table": self.version_table}
+            ).get_current_revision()
+
+    def verify_schema(self, engine: Engine) -> None:
+        if not self.schema_check:
+            return
+        current, head = self.current_revision(engine), self.head_revision()
+        if current != head:
+            raise SchemaOutOfDate(
+                f"{self.service} schema is at {current}, expected {head}: run `python -m app.migrate`"
+            )
+
+    def main(self, argv: List[str]) -> None:
+        cmd = argv[0] if argv else "upgrade"
+        config = self.config()
+        if cmd == "upgrade":
+            command.upgrade(config, argv[1] if len(argv) > 1 else "head")
+        elif cmd == "current":
+            command.current(config)
+        elif cmd == "revision":
+            command.revision(config, message=argv[1] if len(argv) > 1 else None, autogenerate=True)
+        else:
+            raise SystemExit(f"unknown command: {cmd}")
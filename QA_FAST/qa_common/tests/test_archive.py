@@ -0,0 +1,42 @@
+from qa_common import archive
+from qa_common.archive import RoomArchive
+
+
+def _messages(first, last):
+    return [{"id": seq, "roomId": 1, "seq": seq, "content": f"m{seq}"} for seq in range(first, last + 1)]
+
+
+def test_archive_reads_ranges_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_BLOCK_MESSAGES", 4)
+    root = str(tmp_path)
+    assert archive.append(1, _messages(1, 10), root) == 10
+    assert archive.append(1, _messages(11, 13), root) == 3
+
+    cold = RoomArchive(1, root)
+    assert cold.last_seq == 13
+    assert cold.count == 13
+    assert len(cold.blocks) == 4
+    assert [m["seq"] for m in cold.all()] == list(range(1, 14))
+    # 커서 이전 구간만 (오름차순)
+    assert [m["seq"] for m in cold.before(7, 5)] == [2, 3, 4, 5, 6]
+    assert [m["seq"] for m in cold.before(None, 2)] == [12, 13]
+    # 최신순 offset/limit
+    assert [m["seq"] for m in cold.newest(2, 4)] == [11, 10, 9, 8]
+    assert archive.archived_rooms(root) == {1: 13}
+
+
+def test_archive_rejects_already_archived_seq(tmp_path):
+    root = str(tmp_path)
+    archive.append(1, _messages(1, 3), root)
+    try:
+        archive.append(1, _messages(3, 4), root)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+    # 인덱스 꼬리가 끊겨도 온전한 레코드만 읽는다
+    with open(tmp_path / "1.idx", "ab") as f:
+        f.write(b"\x00" * 5)
+    assert RoomArchive(1, root).last_seq == 3
+    assert RoomArchive(2, root).before(None, 10) == []
+
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+
+# 메시지 단위 추적: pub(WS 수신) -> sub(seq 할당/커밋/팬아웃) -> SSE/WS 전달
+TRACE_HEADER = "X-Trace-Id"
+# 켜면 단계별 소요 시간을 SSE/WS 페이로드에 포함 (디버그용)
+TRACE_DEBUG = os.getenv("TRACE_DEBUG", "").lower() in ("1", "true", "yes")
+# "" | "file:/path/spans.jsonl" | "http://collector:4318/spans"
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "")
+TRACE_EXPORT_BATCH = int(os.getenv("TRACE_EXPORT_BATCH", "100"))
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+class Trace:
+    __slots__ = ("trace_id", "service", "started_at", "_start", "stages")
+
+    def __init__(self, service: str, trace_id: Optional[str] = None) -> None:
+        self.trace_id = trace_id or new_trace_id()
+        self.service = service
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        # (단계명, 시작 시점부터의 경과 ms) - monotonic 기준
+        self.stages: List[Tuple[str, float]] = []
+
+    def mark(self, stage: str) -> None:
+        self.stages.append((stage, round((time.perf_counter() - self._start) * 1000, 3)))
+
+    def timings(self) -> Dict[str, float]:
+        return dict(self.stages)
+
+    def as_span(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "service": self.service,
+            "startedAt": self.started_at,
+            "stagesMs": self.timings(),
+        }
+
+    def finish(self) -> None:
+        if _exporter is not None:
+            _exporter.submit(self.as_span())
+
+
+class _SpanExporter:
+    # 스팬은 큐에 넣기만 하고 파일/컬렉터 전송은 백그라운드 스레드에서 배치로 처리
+    def __init__(self, target: str) -> None:
+        self.target = target
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, span: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=2)
+
+    def _run(self) -> None:
+        while True:
+            span = self._queue.get()
+            if span is None:
+                return
+            batch = [span]
+            while len(batch) < TRACE_EXPORT_BATCH:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    self._write(batch)
+                    return
+                batch.append(more)
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            if self.target.startswith("file:"):
+                with open(self.target[len("file:"):], "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(span) + "\n" for span in batch)
+            else:
+                httpx.post(self.target, json={"spans": batch}, timeout=5)
+        except Exception:
+            # 추적 데이터 유실은 서비스에 영향을 주지 않도록 무시
+            pass
+
+
+_exporter: Optional[_SpanExporter] = _SpanExporter(TRACE_EXPORT) if TRACE_EXPORT else None
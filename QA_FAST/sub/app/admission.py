@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Tuple
+
+
+# publish 입장 제어: 호출자별 / 룸별 / 전체 토큰 버킷. publish 경로(HTTP, pub embedded)는 모두
+# 파이프라인에서 한 번만 차감하고, 멱등 재전송은 차감하지 않는다.
+# rate는 초당 허용 건수, burst는 순간 허용량. rate=0이면 해당 범위는 제한하지 않는다.
+ADMISSION_SENDER_RATE = float(os.getenv("ADMISSION_SENDER_RATE", "5"))
+ADMISSION_SENDER_BURST = float(os.getenv("ADMISSION_SENDER_BURST", "20"))
+ADMISSION_ROOM_RATE = float(os.getenv("ADMISSION_ROOM_RATE", "50"))
+ADMISSION_ROOM_BURST = float(os.getenv("ADMISSION_ROOM_BURST", "200"))
+ADMISSION_GLOBAL_RATE = float(os.getenv("ADMISSION_GLOBAL_RATE", "1000"))
+ADMISSION_GLOBAL_BURST = float(os.getenv("ADMISSION_GLOBAL_BURST", "2000"))
+# 워커 간 상태는 공유하지 않고, 각 워커가 전체 예산의 1/N을 나눠 가진다
+ADMISSION_WORKERS = max(int(os.getenv("ADMISSION_WORKERS", "1")), 1)
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", "100000"))
+
+
+class Rejected(Exception):
+    def __init__(self, code: str, scope: str, retry_after: float) -> None:
+        super().__init__(f"{code}:{scope}")
+        self.code = code
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + max(now - self.updated_at, 0.0) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self) -> float:
+        # 토큰 1개가 모일 때까지 남은 시간 (refill 직후에 호출)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class _KeyedBuckets:
+    # 키별 버킷. 오래 쓰지 않은 버킷은 가득 찬 상태와 같으므로 LRU로 버려도 결과가 같다
+    def __init__(self, rate: float, burst: float, max_keys: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+
+    def get(self, key: Hashable, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        bucket.refill(now)
+        return bucket
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        sender: Tuple[float, float],
+        room: Tuple[float, float],
+        global_: Tuple[float, float],
+        workers: int = 1,
+        max_keys: int = ADMISSION_MAX_KEYS,
+    ) -> None:
+        def share(limit: Tuple[float, float]) -> Tuple[float, float]:
+            rate, burst = limit
+            return rate / workers, max(burst / workers, 1.0)
+
+        self._senders = _KeyedBuckets(*share(sender), max_keys) if sender[0] > 0 else None
+        self._rooms = _KeyedBuckets(*share(room), max_keys) if room[0] > 0 else None
+        self._global = TokenBucket(*share(global_), time.monotonic()) if global_[0] > 0 else None
+        self._lock = threading.Lock()
+
+    def _buckets(self, client: Hashable, room_id: Hashable, now: float) -> List[Tuple[str, TokenBucket]]:
+        buckets = []
+        if self._senders is not None:
+            buckets.append(("sender", self._senders.get(client, now)))
+        if self._rooms is not None:
+            buckets.append(("room", self._rooms.get(room_id, now)))
+        if self._global is not None:
+            self._global.refill(now)
+            buckets.append(("global", self._global))
+        return buckets
+
+    def admit(self, client: Hashable, room_id: Hashable, now: Optional[float] = None) -> None:
+        # client는 요청 본문의 senderId가 아니라 호출자 식별자(연결/유저)다.
+        # 세 버킷 모두 여유가 있을 때만 토큰을 차감한다 (거절된 요청은 다른 범위의 예산을 쓰지 않음)
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            buckets = self._buckets(client, room_id, now)
+            scope, wait = max(((s, b.wait_time()) for s, b in buckets), key=lambda x: x[1], default=("", 0.0))
+            if wait > 0:
+                raise Rejected("rate_limited", scope, wait)
+            for _, bucket in buckets:
+                bucket.tokens -= 1
+
+    def refund(self, client: Hashable, room_id: Hashable, now: Optional[float] = None) -> None:
+        # 저장하지 않은 요청(동시 재시도가 먼저 저장된 경우)의 토큰을 돌려준다
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for _, bucket in self._buckets(client, room_id, now):
+                bucket.tokens = min(bucket.burst, bucket.tokens + 1)
+
+
+def create_admission() -> AdmissionController:
+    return AdmissionController(
+        (ADMISSION_SENDER_RATE, ADMISSION_SENDER_BURST),
+        (ADMISSION_ROOM_RATE, ADMISSION_ROOM_BURST),
+        (ADMISSION_GLOBAL_RATE, ADMISSION_GLOBAL_BURST),
+        workers=ADMISSION_WORKERS,
+    )
+
+
+admission = create_admission()
+
+
+# 부하 차단: DB 풀이 가득 찼거나 SSE 큐 적체가 크면 대기열을 늘리지 않고 바로 503으로 거절한다
+SHED_POOL_UTILIZATION = float(os.getenv("SHED_POOL_UTILIZATION", "1.0"))
+SHED_BUS_BACKLOG = int(os.getenv("SHED_BUS_BACKLOG", "50000"))
+SHED_RETRY_AFTER = float(os.getenv("SHED_RETRY_AFTER", "1"))
+SHED_BACKLOG_CHECK_INTERVAL = 0.05
+
+
+class LoadShedder:
+    def __init__(
+        self,
+        pool,
+        backlog: Callable[[], int],
+        pool_utilization: float = SHED_POOL_UTILIZATION,
+        max_backlog: int = SHED_BUS_BACKLOG,
+        retry_after: float = SHED_RETRY_AFTER,
+    ) -> None:
+        self.pool = pool
+        self.backlog = backlog
+        self.pool_utilization = pool_utilization
+        self.max_backlog = max_backlog
+        self.retry_after = retry_after
+        self._backlog_checked_at = 0.0
+        self._backlog_value = 0
+
+    def _pool_capacity(self) -> int:
+        # QueuePool은 최대 overflow를 공개 API로 노출하지 않는다 (-1은 무제한)
+        overflow = getattr(self.pool, "_max_overflow", 0)
+        if overflow < 0:
+            return 0
+        return self.pool.size() + overflow
+
+    def check(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        capacity = self._pool_capacity()
+        if self.pool_utilization > 0 and capacity and self.pool.checkedout() >= capacity * self.pool_utilization:
+            raise Rejected("overloaded", "pool", self.retry_after)
+        if self.max_backlog > 0:
+            # 큐 깊이 합산은 구독자 수에 비례하므로 짧은 간격으로만 다시 계산한다
+            if now - self._backlog_checked_at >= SHED_BACKLOG_CHECK_INTERVAL:
+                self._backlog_value = self.backlog()
+                self._backlog_checked_at = now
+            if self._backlog_value >= self.max_backlog:
+                raise Rejected("overloaded", "queue", self.retry_after)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from qa_common import archive
+from qa_common.log import get_logger
+
+from ..models.message import Message
+from ..models.message_idempotency import MessageIdempotency
+from ..serialization import message_response
+
+
+# ARCHIVE_AFTER_DAYS보다 오래된 메시지를 룸별 압축 세그먼트 파일로 옮기고 Postgres에서 지운다.
+# 보관은 룸의 seq 앞부분부터 연속으로만 진행한다 (seq < 보관된 마지막 seq+1 이면 콜드 구간).
+# 보관된 메시지는 더 이상 수정/삭제/답글 집계 대상이 아니다. 룸의 최신 메시지는 항상 핫 테이블에 남는다.
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", "5000"))
+# 0이면 백그라운드 작업을 돌리지 않는다 (CLI로만 실행)
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "0"))
+
+log = get_logger("sub.archival")
+
+
+def _cutoff(now: datetime, days: int = ARCHIVE_AFTER_DAYS) -> datetime:
+    return now - timedelta(days=days)
+
+
+def cold_rooms(db: Session, cutoff: datetime) -> List[int]:
+    return list(db.execute(select(Message.room_id).where(Message.created_at < cutoff).distinct()).scalars())
+
+
+def archive_room(db: Session, room_id: int, cutoff: datetime, root: str = archive.ARCHIVE_DIR) -> int:
+    last_seq = archive.RoomArchive(room_id, root).last_seq
+    # 지난 실행에서 파일에는 썼지만 DELETE가 커밋되지 못한 행 정리
+    db.execute(delete(Message).where(Message.room_id == room_id, Message.seq <= last_seq))
+    # 룸의 최신 메시지는 보관하지 않는다. 핫 테이블의 최대 seq가 다음 seq 할당의 기준이다
+    newest = db.query(func.max(Message.seq)).filter(Message.room_id == room_id).scalar()
+    if newest is None:
+        db.commit()
+        return 0
+    rows = (
+        db.query(Message)
+        .filter(Message.room_id == room_id, Message.seq > last_seq, Message.seq < newest)
+        .order_by(Message.seq)
+        .limit(ARCHIVE_BATCH)
+        .all()
+    )
+    batch = []
+    for m in rows:
+        if m.created_at >= cutoff:
+            break
+        batch.append(m)
+    if not batch:
+        db.commit()
+        return 0
+    archive.append(room_id, [message_response(m) for m in batch], root)
+    db.execute(delete(Message).where(Message.room_id == room_id, Message.seq <= batch[-1].seq))
+    db.commit()
+    return len(batch)
+
+
+def run_archival(engine: Engine, now: datetime | None = None, root: str = archive.ARCHIVE_DIR) -> int:
+    cutoff = _cutoff(now or datetime.utcnow())
+    total = 0
+    with Session(engine) as db:
+        for room_id in cold_rooms(db, cutoff):
+            while True:
+                moved = archive_room(db, room_id, cutoff, root)
+                total += moved
+                if moved < ARCHIVE_BATCH:
+                    break
+        # 보관 기간이 지난 멱등 키도 정리한다 (그보다 오래된 재시도는 새 메시지로 저장된다)
+        keys = db.execute(delete(MessageIdempotency).where(MessageIdempotency.created_at < cutoff)).rowcount
+        db.commit()
+    log.info("archival.done", messages=total, keys=keys, cutoff=cutoff.isoformat())
+    return total
+
+
+async def run_archive_job(engine: Engine) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(run_archival, engine)
+        except Exception as exc:
+            log.error("archival.failed", error=exc)
+        await asyncio.sleep(ARCHIVE_INTERVAL)
+
+
+if __name__ == "__main__":
+    # python -m app.db.archival run
+    from .session import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "run"
+    if command == "run":
+        print(f"archived {run_archival(engine)} messages")
+    else:
+        raise SystemExit(f"unknown command: {command}")
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from datetime import date, datetime
+from typing import List, Tuple
+
+from sqlalchemy.engine import Connection, Engine
+
+from qa_common.log import get_logger
+
+
+# "" (기본, 단일 힙) | "month" (created_at 월 단위 range) | "hash" (room_id 해시)
+MESSAGE_PARTITIONING = os.getenv("MESSAGE_PARTITIONING", "").strip().lower()
+MESSAGE_PARTITION_MONTHS_AHEAD = int(os.getenv("MESSAGE_PARTITION_MONTHS_AHEAD", "3"))
+# list_messages가 우선 조회할 최근 월 수 (이 범위 밖 파티션은 플래너가 제외)
+MESSAGE_PARTITION_LOOKBACK_MONTHS = int(os.getenv("MESSAGE_PARTITION_LOOKBACK_MONTHS", "1"))
+MAINTENANCE_INTERVAL = float(os.getenv("MESSAGE_PARTITION_MAINTENANCE_INTERVAL", "86400"))
+
+log = get_logger("sub.partitioning")
+
+
+def is_month_partitioned() -> bool:
+    return MESSAGE_PARTITIONING == "month"
+
+
+def add_months(d: date, months: int) -> date:
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(d: date) -> Tuple[date, date]:
+    start = date(d.year, d.month, 1)
+    return start, add_months(start, 1)
+
+
+def month_partition_name(d: date) -> str:
+    return f"message_y{d.year:04d}m{d.month:02d}"
+
+
+def lookback_lower_bound(now: datetime, months: int = MESSAGE_PARTITION_LOOKBACK_MONTHS) -> datetime:
+    start = add_months(now.date(), -months)
+    return datetime(start.year, start.month, 1)
+
+
+def ensure_future_partitions(
+    conn: Connection, months_ahead: int = MESSAGE_PARTITION_MONTHS_AHEAD, today: date | None = None
+) -> List[str]:
+    today = today or datetime.utcnow().date()
+    created = []
+    for offset in range(0, months_ahead + 1):
+        start, end = month_bounds(add_months(today, offset))
+        name = month_partition_name(start)
+        conn.exec_driver_sql(
+            f"create table if not exists {name} partition of message"
+            f" for values from ('{start.isoformat()}') to ('{end.isoformat()}')"
+        )
+        created.append(name)
+    return created
+
+
+def detach_month_partition(engine: Engine, month: date, concurrently: bool = True) -> str:
+    # DETACH ... CONCURRENTLY는 트랜잭션 밖에서만 실행 가능
+    name = month_partition_name(month)
+    suffix = " concurrently" if concurrently else ""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(f"alter table message detach partition {name}{suffix}")
+    return name
+
+
+async def run_partition_maintenance(engine: Engine) -> None:
+    def _ensure() -> None:
+        with engine.begin() as conn:
+            ensure_future_partitions(conn)
+
+    while True:
+        try:
+            await asyncio.to_thread(_ensure)
+        except Exception as exc:
+            log.error("partitioning.maintenance_failed", error=exc)
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
+
+
+if __name__ == "__main__":
+    # python -m app.db.partitioning ensure       (다음 달 파티션들을 미리 생성)
+    # python -m app.db.partitioning detach 2024-01
+    # 파티션 테이블 자체는 마이그레이션(migrations/versions/0001_baseline.py)이 만든다
+    from .session import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "ensure"
+    if command == "ensure":
+        with engine.begin() as conn:
+            print("ensured " + ", ".join(ensure_future_partitions(conn)))
+    elif command == "detach":
+        month = datetime.strptime(sys.argv[2], "%Y-%m").date()
+        print(f"detached {detach_month_partition(engine, month)}")
+    else:
+        raise SystemExit(f"unknown command: {command}")
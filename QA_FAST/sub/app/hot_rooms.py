@@ -0,0 +1,3 @@
+from qa_common.hot_rooms import HotRooms
+
+hot_rooms = HotRooms()
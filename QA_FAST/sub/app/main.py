@@ -1,51 +1,80 @@
-from fastapi import FastAPI
+import asyncio
+import math
 
-from app.route.routes import router as api_router
-from app.models.base import Base
-from app.db.session import engine
-from sqlalchemy import text
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from qa_common.log import get_logger, setup_logging
+
+from .admission import Rejected
+from .pipeline import PipelineError
+from .route.routes import router as api_router
+from .sse_bus import run_reaper
+from .membership import run_membership_listener
+from .migrate import verify_schema
+from .serialization import OrjsonResponse
+from .db.archival import ARCHIVE_INTERVAL, run_archive_job
+from .db.session import caller_key, engine, read_router, run_lag_monitor
+from .db.partitioning import is_month_partitioned, run_partition_maintenance
 
 
 def create_application() -> FastAPI:
-    application = FastAPI(title="QA_FAST-SUB", version="0.1.0")
+    application = FastAPI(title="QA_FAST-SUB", version="0.1.0", default_response_class=OrjsonResponse)
     application.include_router(api_router)
     return application
 
 
+setup_logging()
+log = get_logger("sub.main")
+
 app = create_application()
 
 
+@app.middleware("http")
+async def track_writes(request: Request, call_next):
+    # 쓰기 직후에는 같은 호출자의 읽기를 primary로 보내기 위해 기록 (read-your-writes)
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        read_router.mark_write(caller_key(request))
+    return response
+
+
+@app.exception_handler(Rejected)
+async def handle_rejected(request: Request, exc: Rejected):
+    # rate_limited -> 429, overloaded(풀/큐 포화) -> 503
+    status_code = 429 if exc.code == "rate_limited" else 503
+    return JSONResponse(
+        status_code=status_code,
+        content={"code": exc.code, "scope": exc.scope, "retryAfter": round(exc.retry_after, 3)},
+        headers={"Retry-After": str(max(math.ceil(exc.retry_after), 1))},
+    )
+
+
+@app.exception_handler(PipelineError)
+async def handle_pipeline_error(request: Request, exc: PipelineError):
+    return JSONResponse(status_code=exc.status_code, content={"code": exc.code})
+
+
 @app.on_event("startup")
 def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
-    # Install NOTIFY trigger for messages (minimal payload)
-    with engine.begin() as conn:
-        print("[SUB] installing triggers for messages table ...")
-        conn.exec_driver_sql(
-            """
-            create or replace function notify_message_insert() returns trigger as $$
-            begin
-              perform pg_notify(
-                'room_evt_' || NEW.room_id::text,
-                json_build_object(
-                  'id', NEW.id,
-                  'roomId', NEW.room_id,
-                  'senderId', NEW.sender_id,
-                  'toUserId', NEW.to_user_id,
-                  'seq', NEW.seq,
-                  'content', NEW.content
-                )::text
-              );
-              return NEW;
-            end;
-            $$ language plpgsql;
-
-            drop trigger if exists trg_message_notify on messages;
-            create trigger trg_message_notify
-            after insert on messages
-            for each row execute function notify_message_insert();
-            """
-        )
-        print("[SUB] triggers installed")
+    # DDL은 실행하지 않는다. 스키마 변경은 `python -m app.migrate`로 배포 전에 한 번 적용
+    verify_schema(engine)
+
+
+@app.on_event("startup")
+async def start_background_tasks() -> None:
+    app.state.sse_reaper = asyncio.create_task(run_reaper())
+    app.state.lag_monitor = asyncio.create_task(run_lag_monitor())
+    app.state.membership_listener = asyncio.create_task(run_membership_listener())
+    if is_month_partitioned():
+        app.state.partition_maintenance = asyncio.create_task(run_partition_maintenance(engine))
+    if ARCHIVE_INTERVAL > 0:
+        app.state.archive_job = asyncio.create_task(run_archive_job(engine))
 
 
+@app.on_event("shutdown")
+async def stop_background_tasks() -> None:
+    for name in ("sse_reaper", "lag_monitor", "membership_listener", "partition_maintenance", "archive_job"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import uuid
+
+import psycopg
+from sqlalchemy import text
+
+from qa_common.log import get_logger
+
+from .db.session import engine
+from .sse_bus import bus
+
+
+# 유저 SSE 스트림의 룸 멤버십 변경을 모든 sub 워커에 전달한다 (Postgres LISTEN/NOTIFY).
+# 변경을 받은 워커는 자기 버스에 바로 반영하고, 다른 워커는 알림을 받아 반영한다.
+MEMBERSHIP_CHANNEL = "sse_membership"
+MEMBERSHIP_RECONNECT_DELAY = float(os.getenv("SSE_MEMBERSHIP_RECONNECT_DELAY", "1"))
+# 자기가 보낸 알림을 다시 적용하지 않도록 워커마다 다른 값
+WORKER_ID = uuid.uuid4().hex
+
+log = get_logger("sub.membership")
+
+
+def _apply(user_id: int, room_id: int, joined: bool) -> None:
+    if joined:
+        bus.join_room(user_id, room_id)
+    else:
+        bus.leave_room(user_id, room_id)
+
+
+def publish_membership(user_id: int, room_id: int, joined: bool) -> None:
+    _apply(user_id, room_id, joined)
+    payload = json.dumps({"worker": WORKER_ID, "userId": user_id, "roomId": room_id, "joined": joined})
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text("select pg_notify(:channel, :payload)"), {"channel": MEMBERSHIP_CHANNEL, "payload": payload}
+            )
+    except Exception as exc:
+        # 다른 워커의 열린 스트림은 재접속할 때 멤버십을 다시 읽는다
+        log.warning("membership.notify_failed", user=user_id, room=room_id, error=exc)
+
+
+def _on_notify(payload: str) -> None:
+    try:
+        event = json.loads(payload)
+        if event["worker"] == WORKER_ID:
+            return
+        _apply(int(event["userId"]), int(event["roomId"]), bool(event["joined"]))
+    except (ValueError, KeyError, TypeError) as exc:
+        log.warning("membership.bad_notify", payload=payload[:200], error=exc)
+
+
+def _listen_dsn() -> str:
+    # SQLAlchemy URL(postgresql+psycopg://)을 psycopg가 받는 형태로
+    return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def run_membership_listener() -> None:
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(_listen_dsn(), autocommit=True) as conn:
+                await conn.execute(f"LISTEN {MEMBERSHIP_CHANNEL}")
+                log.info("membership.listen", channel=MEMBERSHIP_CHANNEL)
+                async for notify in conn.notifies():
+                    _on_notify(notify.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            log.warning("membership.listen_failed", error=exc)
+        await asyncio.sleep(MEMBERSHIP_RECONNECT_DELAY)
@@ -0,0 +1,3 @@
+from qa_common.metrics import Registry
+
+registry = Registry()
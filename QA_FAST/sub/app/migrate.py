@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import os
+import sys
+
+from qa_common.migrate import Migrations, SchemaOutOfDate  # noqa: F401
+
+
+# 스키마는 마이그레이션으로만 바꾼다. 서버 시작 시에는 버전만 확인하고 DDL은 실행하지 않는다.
+#   python -m app.migrate            (= upgrade, 배포 시 한 번)
+#   python -m app.migrate current
+#   python -m app.migrate revision "message"
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "alembic.ini")
+# pub과 sub이 같은 DB를 쓰므로 버전 테이블을 분리한다
+VERSION_TABLE = "alembic_version_sub"
+# 동시에 여러 migrate가 실행되지 않도록 잡는 advisory lock 키
+MIGRATION_LOCK_KEY = 740002
+
+migrations = Migrations("sub", ALEMBIC_INI, VERSION_TABLE)
+head_revision = migrations.head_revision
+verify_schema = migrations.verify_schema
+
+
+if __name__ == "__main__":
+    migrations.main(sys.argv[1:])
@@ -2,13 +2,31 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, Sequence, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
 
 
+# 전역 변경 순번: 메시지 추가/수정/삭제마다 새 값을 받는다 (pub 읽기 모델이 이 순서로 따라온다)
+CHANGE_ID_SEQ = Sequence("message_change_id_seq")
+
+
 class Message(Base):
+    __table_args__ = (
+        # 멱등 키 조회용. 유니크 여부는 파티션 모드에 따라 달라서(month는 불가) 모델에는 선언하지 않고,
+        # 중복 저장은 message_idempotency의 기본 키로 막는다
+        Index("uq_message_idempotency_key", "room_id", "sender_id", "idempotency_key"),
+        # 룸별 최신 seq / seq 범위 조회용
+        Index("ix_message_room_id_seq", "room_id", "seq"),
+        # 스레드 조회용
+        Index("ix_message_reply_to_id_seq", "reply_to_id", "seq"),
+        # 델타 동기화(changes 피드)용
+        Index("ix_message_room_id_version", "room_id", "version"),
+        # 전역 변경 피드용
+        Index("ix_message_change_id", "change_id"),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     room_id: Mapped[int] = mapped_column(Integer, index=True)
     sender_id: Mapped[int] = mapped_column(Integer, index=True)
@@ -17,5 +35,18 @@ class Message(Base):
     seq: Mapped[int] = mapped_column(Integer, index=True)
     reply_to_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # 클라이언트가 보낸 멱등 키 (재시도 시 중복 저장 방지)
+    idempotency_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # 스레드 배지용 집계 (답글 저장 트랜잭션에서 증분 갱신)
+    reply_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_reply_seq: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    edited_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # 소프트 삭제 (행은 남기고 changes 피드에 tombstone으로 전달)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # 마지막으로 변경된 룸 버전 (room_version.version)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    change_id: Mapped[int] = mapped_column(
+        BigInteger, CHANGE_ID_SEQ, nullable=False, server_default=CHANGE_ID_SEQ.next_value()
+    )
 
 
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class MessageIdempotency(Base):
+    # publish 멱등 키 등록부. message가 month 파티션이면 키에 unique 인덱스를 걸 수 없으므로
+    # 파티션하지 않는 이 테이블의 기본 키로 중복 저장을 막는다 (메시지와 같은 트랜잭션에서 삽입)
+    __tablename__ = "message_idempotency"
+
+    room_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    sender_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    idempotency_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Integer, MetaData, Table
+
+
+# pub 서비스가 소유하는 room_members 테이블의 읽기 전용 매핑.
+# sub의 create_all 대상이 되지 않도록 별도 MetaData에 둔다.
+room_members = Table(
+    "room_members",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("room_id", Integer),
+    Column("user_id", Integer),
+)
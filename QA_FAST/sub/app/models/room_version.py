@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from sqlalchemy import Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class RoomVersion(Base):
+    # 룸별 변경 버전 (메시지 추가/수정/삭제마다 1 증가). 델타 동기화의 기준
+    __tablename__ = "room_version"
+
+    room_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
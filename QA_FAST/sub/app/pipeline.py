@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from qa_common.archive import RoomArchive
+from qa_common.log import get_logger
+from qa_common.tracing import TRACE_DEBUG, Trace
+
+from .admission import LoadShedder, Rejected, admission
+from .db.partitioning import is_month_partitioned, lookback_lower_bound
+from .db.session import engine
+from .hot_rooms import hot_rooms
+from .idempotency import recent_keys
+from .metrics import registry
+from .models.message import CHANGE_ID_SEQ, Message
+from .models.message_idempotency import MessageIdempotency
+from .models.room_version import RoomVersion
+from .serialization import message_event, message_response
+from .sse_bus import bus
+
+
+# 메시지 저장/조회 파이프라인. HTTP 라우트와 pub의 embedded 모드가 함께 사용한다.
+
+log = get_logger("sub.pipeline")
+
+PUBLISH_LATENCY = registry.histogram("qa_sub_publish_seconds", "sub publish pipeline time")
+PUBLISH_REPLAYS = registry.counter("qa_sub_publish_replays_total", "Publishes answered from an idempotency key")
+ADMISSION_REJECTED = registry.counter(
+    "qa_sub_admission_rejected_total", "Publishes rejected by admission control", ("code", "scope")
+)
+
+shedder = LoadShedder(engine.pool, bus.backlog)
+
+
+class PipelineError(Exception):
+    def __init__(self, status_code: int, code: str) -> None:
+        super().__init__(code)
+        self.status_code = status_code
+        self.code = code
+
+
+class PublishMessageRequest(BaseModel):
+    roomId: int
+    senderId: int
+    content: str
+    toUserId: Optional[int] = None
+    replyToId: Optional[int] = None
+    idempotencyKey: Optional[str] = Field(default=None, max_length=64)
+
+
+class EditMessageRequest(BaseModel):
+    roomId: int
+    senderId: int
+    content: str
+
+
+def _next_room_version(db: Session, room_id: int) -> int:
+    # 룸 버전 행을 잠그고 1 증가 (같은 룸의 변경은 여기서 직렬화된다)
+    return db.execute(
+        pg_insert(RoomVersion)
+        .values(room_id=room_id, version=1)
+        .on_conflict_do_update(
+            index_elements=[RoomVersion.room_id], set_={"version": RoomVersion.version + 1}
+        )
+        .returning(RoomVersion.version)
+    ).scalar_one()
+
+
+def _find_by_idempotency_key(db: Session, body: PublishMessageRequest) -> Optional[Message]:
+    return (
+        db.query(Message)
+        .filter(
+            Message.room_id == body.roomId,
+            Message.sender_id == body.senderId,
+            Message.idempotency_key == body.idempotencyKey,
+        )
+        .first()
+    )
+
+
+def _bump_thread(db: Session, room_id: int, parent_id: int, seq: int) -> None:
+    # 부모 메시지의 답글 집계를 같은 트랜잭션에서 갱신 (room_id 조건은 파티션 프루닝용)
+    db.query(Message).filter(Message.id == parent_id, Message.room_id == room_id).update(
+        {
+            Message.reply_count: Message.reply_count + 1,
+            Message.last_reply_seq: func.greatest(func.coalesce(Message.last_reply_seq, 0), seq),
+            Message.change_id: CHANGE_ID_SEQ.next_value(),
+        },
+        synchronize_session=False,
+    )
+
+
+def publish_message(
+    db: Session, body: PublishMessageRequest, trace_id: Optional[str] = None, client: Optional[str] = None
+) -> dict:
+    # client: 입장 제어 키 (HTTP 호출자 식별자 또는 pub 연결의 유저). 없으면 senderId
+    trace = Trace("sub", trace_id)
+    trace.mark("receive")
+    with PUBLISH_LATENCY.time():
+        response = _publish_message(db, body, trace, client if client is not None else str(body.senderId))
+    trace.finish()
+    return response
+
+
+def _with_trace(response: dict, trace: Trace) -> dict:
+    # 캐시된 응답은 공유되므로 복사본에만 추적 정보를 붙인다
+    response = dict(response, traceId=trace.trace_id)
+    if TRACE_DEBUG:
+        response["trace"] = trace.timings()
+    return response
+
+
+def _seq_after(hot_max: int, room_id: int, root: Optional[str] = None) -> int:
+    # 핫 테이블이 비어 있으면 룸 전체가 보관된 상태일 수 있으므로 콜드 구간 뒤에서 이어간다
+    if hot_max:
+        return hot_max + 1
+    cold = RoomArchive(room_id) if root is None else RoomArchive(room_id, root)
+    return cold.last_seq + 1
+
+
+def _next_seq(db: Session, room_id: int) -> int:
+    # seq는 룸별 증가. 핫 테이블의 최대 seq+1로 할당한다 (보관 작업은 룸의 최신 메시지를 남겨 둔다)
+    hot_max = db.query(func.coalesce(func.max(Message.seq), 0)).filter(Message.room_id == room_id).scalar()
+    return _seq_after(hot_max, room_id)
+
+
+def _reject(exc: Rejected, body: PublishMessageRequest) -> None:
+    ADMISSION_REJECTED.inc(1, exc.code, exc.scope)
+    log.debug("publish.rejected", code=exc.code, scope=exc.scope, room=body.roomId, sender=body.senderId)
+
+
+def _publish_message(db: Session, body: PublishMessageRequest, trace: Trace, client: str) -> dict:
+    log.debug("publish", room=body.roomId, sender=body.senderId, to=body.toUserId, trace=trace.trace_id)
+    cache_key = (body.roomId, body.senderId, body.idempotencyKey)
+    if body.idempotencyKey:
+        # 재전송된 publish: 원본 응답을 그대로 반환하고 저장/팬아웃은 하지 않는다
+        cached = recent_keys.get(cache_key)
+        if cached is not None:
+            PUBLISH_REPLAYS.inc()
+            return _with_trace(cached, trace)
+    try:
+        shedder.check()
+    except Rejected as exc:
+        _reject(exc, body)
+        raise
+    if body.idempotencyKey:
+        # 재전송은 입장 제어 예산을 쓰지 않는다
+        existing = _find_by_idempotency_key(db, body)
+        if existing is not None:
+            PUBLISH_REPLAYS.inc()
+            response = message_response(existing)
+            recent_keys.put(cache_key, response)
+            return _with_trace(response, trace)
+    try:
+        admission.admit(client, body.roomId)
+    except Rejected as exc:
+        _reject(exc, body)
+        raise
+    now = datetime.utcnow()
+    try:
+        if body.idempotencyKey:
+            # 같은 키로 진행 중인 publish가 있으면 그 트랜잭션이 끝날 때까지 기다렸다가 충돌한다
+            db.execute(
+                insert(MessageIdempotency).values(
+                    room_id=body.roomId, sender_id=body.senderId, idempotency_key=body.idempotencyKey, created_at=now
+                )
+            )
+        # room_version 행 잠금이 같은 룸의 publish를 커밋까지 직렬화하므로 seq 조회는 그 뒤에 한다
+        version = _next_room_version(db, body.roomId)
+        next_seq = _next_seq(db, body.roomId)
+        trace.mark("seq_alloc")
+        msg = Message(
+            room_id=body.roomId,
+            sender_id=body.senderId,
+            to_user_id=body.toUserId,
+            content=body.content,
+            reply_to_id=body.replyToId,
+            seq=next_seq,
+            created_at=now,
+            idempotency_key=body.idempotencyKey,
+            version=version,
+        )
+        db.add(msg)
+        if body.replyToId is not None:
+            _bump_thread(db, body.roomId, body.replyToId, next_seq)
+        db.commit()
+    except IntegrityError:
+        # 같은 키의 동시 재시도가 먼저 저장된 경우
+        db.rollback()
+        existing = _find_by_idempotency_key(db, body) if body.idempotencyKey else None
+        if existing is None:
+            raise
+        PUBLISH_REPLAYS.inc()
+        admission.refund(client, body.roomId)
+        response = message_response(existing)
+        recent_keys.put(cache_key, response)
+        return _with_trace(response, trace)
+    db.refresh(msg)
+    trace.mark("commit")
+    hot_rooms.record(msg.room_id, messages=1, nbytes=len(msg.content.encode("utf-8")))
+    response = message_response(msg)
+    # REST 응답과 같은 모양. 이벤트 dict는 구독자에게 그대로 전달되므로 fanout_scheduled 단계까지 같은 객체에 기록된다
+    event = dict(response, traceId=trace.trace_id, trace=trace.stages)
+    try:
+        bus.publish(msg.room_id, event)
+    except Exception:
+        pass
+    # 구독자 큐에 넣은 시점까지만 잰다. SSE 전송 완료는 포함하지 않는다
+    trace.mark("fanout_scheduled")
+    log.debug("publish.saved", id=msg.id, seq=msg.seq, trace=trace.trace_id)
+
+    if body.idempotencyKey:
+        recent_keys.put(cache_key, response)
+    return _with_trace(response, trace)
+
+
+def list_recent_messages(db: Session, room_id: int, limit: int = 50, before_seq: Optional[int] = None) -> dict:
+    # 최근 메시지 limit개(before_seq가 있으면 그 이전), 과거->현재 순서로 반환
+    limit = max(min(limit, 200), 1)
+    base = db.query(Message).filter(Message.room_id == room_id)
+    if before_seq is not None:
+        base = base.filter(Message.seq < before_seq)
+    q = []
+    if is_month_partitioned():
+        # 최근 월 파티션만 먼저 조회(파티션 프루닝), 부족할 때만 전체 범위로 확장
+        q = (
+            base.filter(Message.created_at >= lookback_lower_bound(datetime.utcnow()))
+            .order_by(Message.seq.desc())
+            .limit(limit)
+            .all()
+        )
+    if len(q) < limit:
+        q = base.order_by(Message.seq.desc()).limit(limit).all()
+    items = [message_response(m) for m in reversed(q)]
+    if len(items) < limit:
+        # 커서가 콜드 구간으로 넘어가면 아카이브 파일에서 이어서 읽는다
+        cold = RoomArchive(room_id)
+        if cold.blocks:
+            bound = items[0]["seq"] if items else before_seq
+            items[:0] = cold.before(bound, limit - len(items))
+    next_before = items[0]["seq"] if len(items) == limit else None
+    return {"items": items, "nextBeforeSeq": next_before}
+
+
+def _locked_message(db: Session, message_id: int, room_id: int, sender_id: int) -> Message:
+    msg = (
+        db.query(Message)
+        .filter(Message.id == message_id, Message.room_id == room_id)
+        .with_for_update()
+        .first()
+    )
+    if msg is None or msg.deleted_at is not None:
+        raise PipelineError(404, "message_not_found")
+    if msg.sender_id != sender_id:
+        raise PipelineError(403, "not_message_owner")
+    return msg
+
+
+def edit_message(db: Session, message_id: int, body: EditMessageRequest) -> dict:
+    # 버전 행을 먼저 잠근다 (publish와 같은 잠금 순서: room_version -> message)
+    version = _next_room_version(db, body.roomId)
+    try:
+        msg = _locked_message(db, message_id, body.roomId, body.senderId)
+    except PipelineError:
+        db.rollback()
+        raise
+    msg.content = body.content
+    msg.edited_at = datetime.utcnow()
+    msg.version = version
+    msg.change_id = CHANGE_ID_SEQ.next_value()
+    db.commit()
+    db.refresh(msg)
+    response = message_response(msg)
+    # 가벼운 이벤트: 바뀐 필드만 전달
+    bus.publish(
+        msg.room_id,
+        message_event(
+            "message_edited", response, ("id", "roomId", "toUserId", "seq", "content", "editedAt", "version")
+        ),
+    )
+    return response
+
+
+def delete_message(db: Session, message_id: int, room_id: int, sender_id: int) -> dict:
+    version = _next_room_version(db, room_id)
+    try:
+        msg = _locked_message(db, message_id, room_id, sender_id)
+    except PipelineError:
+        db.rollback()
+        raise
+    msg.deleted_at = datetime.utcnow()
+    msg.version = version
+    msg.change_id = CHANGE_ID_SEQ.next_value()
+    db.commit()
+    db.refresh(msg)
+    response = message_response(msg)
+    bus.publish(
+        msg.room_id, message_event("message_deleted", response, ("id", "roomId", "toUserId", "seq", "version"))
+    )
+    return response
+
+
+def list_changes(db: Session, room_id: int, since_version: int = 0, limit: int = 500) -> dict:
+    # 클라이언트가 마지막으로 본 버전 이후의 추가/수정(upsert)과 삭제(tombstone)만 반환
+    limit = max(min(limit, 1000), 1)
+    rows = (
+        db.query(Message)
+        .filter(Message.room_id == room_id, Message.version > since_version)
+        .order_by(Message.version)
+        .limit(limit + 1)
+        .all()
+    )
+    items = []
+    for m in rows[:limit]:
+        if m.deleted_at is not None:
+            items.append({"op": "delete", "id": m.id, "seq": m.seq, "version": m.version})
+        else:
+            items.append({"op": "upsert", "message": message_response(m), "version": m.version})
+    version = items[-1]["version"] if items else since_version
+    return {"items": items, "version": version, "hasMore": len(rows) > limit}
+
+
+def list_feed(
+    db: Session, after_change_id: int = 0, limit: int = 500, change_ids: Optional[List[int]] = None
+) -> dict:
+    # 전체 룸의 변경을 change_id 순서로 반환 (pub 읽기 모델 프로젝터용).
+    # change_ids가 있으면 그 순번들만 반환한다 (프로젝터가 비어 있던 순번을 다시 확인할 때).
+    # 삭제된 메시지는 본문 없이 deletedAt이 채워진 상태로 전달된다.
+    limit = max(min(limit, 1000), 1)
+    q = db.query(Message).filter(Message.change_id > after_change_id)
+    if change_ids is not None:
+        q = q.filter(Message.change_id.in_(change_ids[:limit]))
+    rows = q.order_by(Message.change_id).limit(limit + 1).all()
+    items = [{**message_response(m), "changeId": m.change_id} for m in rows[:limit]]
+    last = items[-1]["changeId"] if items else after_change_id
+    return {"items": items, "lastChangeId": last, "hasMore": len(rows) > limit}
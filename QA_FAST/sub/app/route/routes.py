@@ -1,11 +1,14 @@
 from fastapi import APIRouter
 
-from .v1 import health, messages, sse
+from .v1 import admin, health, messages, metrics, rooms, sse
 
 
 router = APIRouter()
 router.include_router(health.router)
+router.include_router(metrics.router)
 router.include_router(messages.router, prefix="/messages", tags=["messages"])
+router.include_router(rooms.router, prefix="/rooms", tags=["rooms"])
 router.include_router(sse.router, prefix="/sse", tags=["sse"])
+router.include_router(admin.router, prefix="/admin", tags=["admin"])
 
 
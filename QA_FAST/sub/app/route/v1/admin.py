@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from ...hot_rooms import hot_rooms
+from ...sse_bus import bus
+
+
+router = APIRouter()
+
+
+@router.get("/subscribers")
+def subscribers() -> dict:
+    # 룸별 살아있는 SSE 구독자 수와 큐 적재량 (구독 누수 확인용)
+    return bus.stats()
+
+
+@router.get("/hot-rooms")
+def hot_room_list(k: int = 10) -> dict:
+    # 최근 윈도우 기준 룸별 메시지 수 / 팬아웃 / 바이트 상위 K (추정치, error는 과대 추정 상한)
+    return hot_rooms.snapshot(max(min(k, 100), 1))
@@ -1,115 +1,65 @@
 from __future__ import annotations
 
-import json
-from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
-from sqlalchemy import func, text
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.models.message import Message
-from app.sse_bus import bus
+from qa_common.tracing import TRACE_HEADER
 
-
-class PublishMessageRequest(BaseModel):
-    roomId: int
-    senderId: int
-    content: str
-    toUserId: Optional[int] = None
-    replyToId: Optional[int] = None
+from ...db.session import caller_key, get_db, get_read_db
+from ... import pipeline
+from ...pipeline import EditMessageRequest, PublishMessageRequest
+from ...schemas import MessageFeed, MessageHistory, MessageOut
 
 
 router = APIRouter()
 
 
 @router.post("")
-def publish_message(body: PublishMessageRequest, db: Session = Depends(get_db)):
-    print(f"[PUB] room={body.roomId} sender={body.senderId} to={body.toUserId}")
-    # seq는 룸별 증가. 간단히 최대 seq+1로 할당(동시성은 트랜잭션/락/DB함수로 보완 가능)
-    next_seq = (
-        db.query(func.coalesce(func.max(Message.seq), 0))
-        .filter(Message.room_id == body.roomId)
-        .scalar()
-        + 1
-    )
-    msg = Message(
-        room_id=body.roomId,
-        sender_id=body.senderId,
-        to_user_id=body.toUserId,
-        content=body.content,
-        reply_to_id=body.replyToId,
-        seq=next_seq,
-        created_at=datetime.utcnow(),
-    )
-    db.add(msg)
-    db.commit()
-    db.refresh(msg)
-    try:
-        bus.publish(
-            msg.room_id,
-            {
-                "id": msg.id,
-                "roomId": msg.room_id,
-                "senderId": msg.sender_id,
-                "toUserId": msg.to_user_id,
-                "seq": msg.seq,
-                "content": msg.content,
-            },
-        )
-    except Exception:
-        pass
+def publish_message(
+    body: PublishMessageRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    trace_id: Optional[str] = Header(default=None, alias=TRACE_HEADER, max_length=64),
+):
+    # 응답 모델 없음: traceId/trace(TRACE_DEBUG) 같은 선택 필드를 그대로 내보낸다.
+    # 입장 제어는 본문의 senderId가 아니라 호출자(X-Client-Id, 없으면 IP) 기준
+    return pipeline.publish_message(db, body, trace_id=trace_id, client=caller_key(request))
+
+
+@router.get("", response_model=MessageHistory)
+def list_messages(
+    roomId: int, limit: int = 50, beforeSeq: Optional[int] = None, db: Session = Depends(get_read_db)
+):
+    # 이전 페이지는 응답의 nextBeforeSeq를 beforeSeq로 넘긴다 (오래된 구간은 아카이브 파일에서 읽음)
+    return pipeline.list_recent_messages(db, roomId, limit, beforeSeq)
+
+
+def _parse_change_ids(change_ids: Optional[str]) -> Optional[List[int]]:
+    # "7,9,12" -> [7, 9, 12]
+    if change_ids is None:
+        return None
     try:
-        payload = {
-            "id": msg.id,
-            "roomId": msg.room_id,
-            "senderId": msg.sender_id,
-            "toUserId": msg.to_user_id,
-            "seq": msg.seq,
-            "content": msg.content,
-        }
-        print(f"[PUB] saved id={msg.id} seq={msg.seq}")
-    except Exception:
-        pass
-
-    return {
-        "id": msg.id,
-        "roomId": msg.room_id,
-        "senderId": msg.sender_id,
-        "toUserId": msg.to_user_id,
-        "content": msg.content,
-        "seq": msg.seq,
-        "createdAt": msg.created_at.isoformat() + "Z",
-        "replyToId": msg.reply_to_id,
-    }
-
-
-@router.get("")
-def list_messages(roomId: int, limit: int = 50, db: Session = Depends(get_db)):
-    # 최근 메시지 limit개, 과거->현재 순서로 반환
-    limit = max(min(limit, 200), 1)
-    q = (
-        db.query(Message)
-        .filter(Message.room_id == roomId)
-        .order_by(Message.seq.desc())
-        .limit(limit)
-        .all()
-    )
-    items = list(reversed([
-        {
-            "id": m.id,
-            "roomId": m.room_id,
-            "senderId": m.sender_id,
-            "toUserId": m.to_user_id,
-            "content": m.content,
-            "seq": m.seq,
-            "createdAt": m.created_at.isoformat() + "Z",
-            "replyToId": m.reply_to_id,
-        }
-        for m in q
-    ]))
-    return {"items": items}
+        return [int(part) for part in change_ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid_change_ids")
+
+
+@router.get("/feed", response_model=MessageFeed)
+def message_feed(
+    afterChangeId: int = 0, limit: int = 500, changeIds: Optional[str] = None, db: Session = Depends(get_db)
+):
+    # 전역 변경 피드: 응답의 lastChangeId를 다음 요청의 afterChangeId로 사용.
+    # changeIds를 주면 해당 순번들만 조회한다. 레플리카 지연으로 순번이 비어 보이지 않도록 primary에서 읽는다
+    return pipeline.list_feed(db, afterChangeId, limit, _parse_change_ids(changeIds))
+
+
+@router.patch("/{message_id}", response_model=MessageOut)
+def edit_message(message_id: int, body: EditMessageRequest, db: Session = Depends(get_db)):
+    return pipeline.edit_message(db, message_id, body)
 
 
+@router.delete("/{message_id}", response_model=MessageOut)
+def delete_message(message_id: int, roomId: int, senderId: int, db: Session = Depends(get_db)):
+    return pipeline.delete_message(db, message_id, roomId, senderId)
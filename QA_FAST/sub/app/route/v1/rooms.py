@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from ...db.session import get_read_db
+from ... import pipeline
+from ...schemas import MessageChanges
+
+
+router = APIRouter()
+
+
+@router.get("/{room_id}/changes", response_model=MessageChanges)
+def list_changes(room_id: int, sinceVersion: int = 0, limit: int = 500, db: Session = Depends(get_read_db)):
+    # 델타 동기화: 응답의 version을 다음 요청의 sinceVersion으로 사용
+    return pipeline.list_changes(db, room_id, sinceVersion, limit)
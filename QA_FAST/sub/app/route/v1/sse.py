@@ -1,44 +1,84 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from sqlalchemy import select
 from starlette.responses import StreamingResponse
 
 
-from app.sse_bus import bus
+from qa_common.log import get_logger
+from qa_common.tracing import TRACE_DEBUG
+
+from ...db.session import SessionLocal
+from ...models.room_member import room_members
+from ...membership import publish_membership
+from ...serialization import dumps
+from ...sse_bus import bus
 
 router = APIRouter()
 
+log = get_logger("sub.sse")
+
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+HEARTBEAT = ": ping\n\n"
+
+
+async def _receive(queue: asyncio.Queue, request: Optional[Request]) -> AsyncGenerator[Optional[dict], None]:
+    # 조용한 룸에서도 끊긴 클라이언트를 감지하도록 heartbeat 주기마다 깨어난다.
+    # None은 heartbeat 차례를 의미한다.
+    while True:
+        bus.touch(queue)
+        try:
+            payload = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_INTERVAL)
+        except asyncio.TimeoutError:
+            if request is not None and await request.is_disconnected():
+                return
+            if not bus.is_subscribed(queue):
+                # reaper가 이미 정리한 구독
+                return
+            yield None
+            continue
+        yield payload
 
-def _dsn_from_env() -> str:
-    return ""
 
+def _message_data(payload: dict) -> dict:
+    # 버스의 message 이벤트는 REST와 같은 message_response 모양에 추적 정보가 붙어 있다
+    data = {key: value for key, value in payload.items() if key not in ("traceId", "trace")}
+    if TRACE_DEBUG and payload.get("traceId"):
+        data["traceId"] = payload["traceId"]
+        data["trace"] = dict(payload.get("trace") or ())
+    return data
 
-async def listen_event_stream(room_id: int, to_user_id: int) -> AsyncGenerator[str, None]:
-    print(f"[SSE] subscribe room={room_id} to={to_user_id}")
+
+async def listen_event_stream(
+    room_id: int, to_user_id: int, request: Optional[Request] = None
+) -> AsyncGenerator[str, None]:
+    log.info("sse.subscribe", room=room_id, to=to_user_id)
     queue = bus.add_subscriber(room_id)
     try:
-        while True:
-            payload = await queue.get()
+        async for payload in _receive(queue, request):
+            if payload is None:
+                yield HEARTBEAT
+                continue
             if payload.get("toUserId") is not None and payload.get("toUserId") != to_user_id:
                 continue
+            event_type = payload.get("type", "message")
+            if event_type != "message":
+                # message_edited / message_deleted 등 가벼운 변경 이벤트
+                yield f"event: {event_type}\ndata: {dumps(payload)}\n\n"
+                continue
             seq = payload.get("seq")
-            print(
-                f"[SSE] emit room={payload.get('roomId')} sender={payload.get('senderId')} to={payload.get('toUserId')} seq={seq}"
-            )
-            data = json.dumps(
-                {
-                    "id": payload.get("id"),
-                    "roomId": payload.get("roomId"),
-                    "senderId": payload.get("senderId"),
-                    "toUserId": payload.get("toUserId"),
-                    "seq": seq,
-                    "content": payload.get("content"),
-                }
+            log.debug(
+                "sse.emit",
+                room=payload.get("roomId"),
+                sender=payload.get("senderId"),
+                to=payload.get("toUserId"),
+                seq=seq,
             )
+            data = dumps(_message_data(payload))
             lines = []
             if seq is not None:
                 lines.append(f"id: {seq}")
@@ -49,13 +89,71 @@ async def listen_event_stream(room_id: int, to_user_id: int) -> AsyncGenerator[s
         bus.remove_subscriber(room_id, queue)
 
 
+async def listen_user_event_stream(
+    user_id: int, request: Optional[Request] = None
+) -> AsyncGenerator[str, None]:
+    # 유저가 속한 모든 룸의 이벤트를 하나의 연결로 전달 (roomId로 구분).
+    # 멤버십을 읽는 동안 들어온 join/leave를 놓치지 않도록 구독을 먼저 등록한다
+    queue = bus.add_user_subscriber(user_id, ())
+    try:
+        room_ids = await asyncio.to_thread(_room_ids_for_user, user_id)
+        bus.add_rooms(queue, room_ids)
+        log.info("sse.subscribe_user", user=user_id, rooms=len(room_ids))
+        async for payload in _receive(queue, request):
+            if payload is None:
+                yield HEARTBEAT
+                continue
+            if payload.get("toUserId") is not None and payload.get("toUserId") != user_id:
+                continue
+            event_type = payload.get("type", "message")
+            if event_type != "message":
+                # room_joined / room_left, message_edited / message_deleted 등
+                yield f"event: {event_type}\ndata: {dumps(payload)}\n\n"
+                continue
+            seq = payload.get("seq")
+            data = dumps(_message_data(payload))
+            lines = []
+            if seq is not None:
+                # 룸마다 seq가 따로 증가하므로 roomId:seq 형태로 이벤트 id를 만든다
+                lines.append(f"id: {payload.get('roomId')}:{seq}")
+            lines.append("event: message")
+            lines.append(f"data: {data}")
+            yield "\n".join(lines) + "\n\n"
+    finally:
+        bus.remove_user_subscriber(user_id, queue)
+
+
+def _room_ids_for_user(user_id: int) -> List[int]:
+    # 스트림이 열려 있는 동안 커넥션을 잡지 않도록 조회 직후 세션을 닫는다
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(room_members.c.room_id).where(room_members.c.user_id == user_id)
+        ).scalars()
+        return list(rows)
+
+
 @router.get("/rooms/{room_id}")
-async def sse_room(room_id: int, toUserId: int):
-    print(f"[SSE] subscribe room={room_id} to={toUserId}")
-    return EventSourceResponse(listen_event_stream(room_id, toUserId))
+async def sse_room(room_id: int, toUserId: int, request: Request):
+    return EventSourceResponse(listen_event_stream(room_id, toUserId, request))
 
 
-class EventSourceResponse(StreamingResponse):
-    media_type = "text/event-stream"
+@router.get("/users/{user_id}")
+async def sse_user(user_id: int, request: Request):
+    return EventSourceResponse(listen_user_event_stream(user_id, request))
+
+
+@router.post("/users/{user_id}/rooms/{room_id}")
+def sse_user_join(user_id: int, room_id: int):
+    # pub에서 룸 멤버 추가 시 호출: 모든 워커의 열린 유저 스트림에 룸 구독을 붙인다
+    publish_membership(user_id, room_id, joined=True)
+    return {"userId": user_id, "roomId": room_id, "joined": True}
+
 
+@router.delete("/users/{user_id}/rooms/{room_id}")
+def sse_user_leave(user_id: int, room_id: int):
+    publish_membership(user_id, room_id, joined=False)
+    return {"userId": user_id, "roomId": room_id, "left": True}
 
+
+class EventSourceResponse(StreamingResponse):
+    media_type = "text/event-stream"
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from typing import Annotated, List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+
+# 응답 모델. 값은 serialization.message_response가 만든 dict이고, 모델은 문서화와 컴파일된 직렬화에 쓴다
+class MessageOut(BaseModel):
+    id: int
+    roomId: int
+    senderId: int
+    toUserId: Optional[int]
+    content: Optional[str]
+    seq: int
+    createdAt: str
+    replyToId: Optional[int]
+    replyCount: int
+    lastReplySeq: Optional[int]
+    editedAt: Optional[str]
+    deletedAt: Optional[str]
+    version: int
+
+
+class MessageHistory(BaseModel):
+    items: List[MessageOut]
+    nextBeforeSeq: Optional[int]
+
+
+class FeedItem(MessageOut):
+    changeId: int
+
+
+class MessageFeed(BaseModel):
+    items: List[FeedItem]
+    lastChangeId: int
+    hasMore: bool
+
+
+class ChangeUpsert(BaseModel):
+    op: Literal["upsert"]
+    message: MessageOut
+    version: int
+
+
+class ChangeDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+    seq: int
+    version: int
+
+
+class MessageChanges(BaseModel):
+    items: List[Annotated[Union[ChangeUpsert, ChangeDelete], Field(discriminator="op")]]
+    version: int
+    hasMore: bool
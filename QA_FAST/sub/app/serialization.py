@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from .models.message import Message
+
+
+# 메시지 직렬화는 여기 한 곳에서만 한다. REST 응답, 변경 피드, SSE/WS로 나가는 버스 이벤트,
+# 아카이브 파일이 모두 message_response의 모양을 공유한다. JSON 인코딩은 orjson.
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() + "Z" if value is not None else None
+
+
+def message_response(msg: Message) -> dict:
+    return {
+        "id": msg.id,
+        "roomId": msg.room_id,
+        "senderId": msg.sender_id,
+        "toUserId": msg.to_user_id,
+        # 삭제된 메시지는 본문을 내보내지 않는다
+        "content": msg.content if msg.deleted_at is None else None,
+        "seq": msg.seq,
+        "createdAt": msg.created_at.isoformat() + "Z",
+        "replyToId": msg.reply_to_id,
+        "replyCount": msg.reply_count,
+        "lastReplySeq": msg.last_reply_seq,
+        "editedAt": _iso(msg.edited_at),
+        "deletedAt": _iso(msg.deleted_at),
+        "version": msg.version,
+    }
+
+
+def message_event(event_type: str, message: dict, fields: Iterable[str]) -> dict:
+    # 수정/삭제 같은 가벼운 변경 이벤트: message_response에서 필요한 필드만 골라 보낸다
+    return {"type": event_type, **{name: message[name] for name in fields}}
+
+
+def dumps(obj: Any) -> str:
+    # SSE data 줄 / WS 텍스트 프레임용
+    return orjson.dumps(obj, option=_OPTIONS).decode("utf-8")
+
+
+class OrjsonResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=_OPTIONS)
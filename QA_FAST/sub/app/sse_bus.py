@@ -1,36 +1,213 @@
 from __future__ import annotations
 
 import asyncio
+import os
+import time
 from collections import defaultdict
-from typing import Dict, Set
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from qa_common.log import get_logger
+
+from .hot_rooms import hot_rooms
+from .metrics import registry
+
+
+log = get_logger("sub.bus")
+
+SSE_QUEUE_MAXSIZE = int(os.getenv("SSE_QUEUE_MAXSIZE", "1000"))
+SSE_REAP_INTERVAL = float(os.getenv("SSE_REAP_INTERVAL", "30"))
+SSE_REAP_IDLE = float(os.getenv("SSE_REAP_IDLE", "90"))
 
 
 class RoomEventBus:
     def __init__(self) -> None:
         self._room_id_to_queues: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        # 유저 단위 멀티플렉스 구독: 하나의 큐가 여러 룸에 동시에 등록된다
+        self._user_id_to_queues: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._queue_to_room_ids: Dict[asyncio.Queue, Set[int]] = {}
+        self._queue_to_user_id: Dict[asyncio.Queue, int] = {}
+        # 구독자가 마지막으로 큐를 확인한 시각 (reaper가 고아 큐 판별에 사용)
+        self._queue_last_seen: Dict[asyncio.Queue, float] = {}
+        # 구독자 큐가 속한 이벤트 루프 (스레드풀에서 publish할 때 루프로 넘기기 위함)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     def add_subscriber(self, room_id: int) -> asyncio.Queue:
-        queue: asyncio.Queue = asyncio.Queue()
-        self._room_id_to_queues[room_id].add(queue)
+        queue = self._new_queue()
+        self._attach(queue, room_id)
         return queue
 
     def remove_subscriber(self, room_id: int, queue: asyncio.Queue) -> None:
-        try:
-            self._room_id_to_queues[room_id].discard(queue)
-            if not self._room_id_to_queues[room_id]:
-                self._room_id_to_queues.pop(room_id, None)
-        except KeyError:
-            pass
+        self._detach(queue, room_id)
+        if not self._queue_to_room_ids.get(queue) and queue not in self._queue_to_user_id:
+            self._forget(queue)
+
+    def add_user_subscriber(self, user_id: int, room_ids: Iterable[int]) -> asyncio.Queue:
+        queue = self._new_queue()
+        self._user_id_to_queues[user_id].add(queue)
+        self._queue_to_user_id[queue] = user_id
+        for room_id in room_ids:
+            self._attach(queue, room_id)
+        return queue
+
+    def add_rooms(self, queue: asyncio.Queue, room_ids: Iterable[int]) -> None:
+        # 구독을 먼저 등록한 뒤 읽은 멤버십을 붙인다 (그 사이 도착한 join/leave는 이미 반영돼 있다)
+        if queue not in self._queue_to_user_id:
+            return
+        for room_id in room_ids:
+            self._attach(queue, room_id)
+
+    def remove_user_subscriber(self, user_id: int, queue: asyncio.Queue) -> None:
+        for room_id in list(self._queue_to_room_ids.get(queue, set())):
+            self._detach(queue, room_id)
+        queues = self._user_id_to_queues.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                self._user_id_to_queues.pop(user_id, None)
+        self._forget(queue)
+
+    def join_room(self, user_id: int, room_id: int) -> None:
+        # 멤버십 변경을 해당 유저의 열린 스트림에 즉시 반영
+        self._dispatch(self._join_room_now, user_id, room_id)
+
+    def leave_room(self, user_id: int, room_id: int) -> None:
+        self._dispatch(self._leave_room_now, user_id, room_id)
 
     def publish(self, room_id: int, payload: dict) -> None:
-        for q in list(self._room_id_to_queues.get(room_id, set())):
+        self._dispatch(self._publish_now, room_id, payload)
+
+    def _join_room_now(self, user_id: int, room_id: int) -> None:
+        for queue in list(self._user_id_to_queues.get(user_id, set())):
+            if room_id in self._queue_to_room_ids.get(queue, set()):
+                continue
+            self._attach(queue, room_id)
+            self._offer(queue, {"type": "room_joined", "roomId": room_id, "userId": user_id})
+
+    def _leave_room_now(self, user_id: int, room_id: int) -> None:
+        for queue in list(self._user_id_to_queues.get(user_id, set())):
+            if room_id not in self._queue_to_room_ids.get(queue, set()):
+                continue
+            self._detach(queue, room_id)
+            self._offer(queue, {"type": "room_left", "roomId": room_id, "userId": user_id})
+
+    def _dispatch(self, fn: Callable[..., None], *args: Any) -> None:
+        # 동기 라우트/embedded 호출은 워커 스레드에서 오므로 큐 조작은 루프 스레드에서 수행
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
             try:
-                q.put_nowait(payload)
-            except Exception:
-                # Drop if queue is closed or full
-                pass
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                loop.call_soon_threadsafe(fn, *args)
+                return
+        fn(*args)
+
+    def _publish_now(self, room_id: int, payload: dict) -> None:
+        queues = list(self._room_id_to_queues.get(room_id, set()))
+        for q in queues:
+            self._offer(q, payload)
+        if queues:
+            hot_rooms.record(room_id, fanout=len(queues))
+
+    def touch(self, queue: asyncio.Queue) -> None:
+        if queue in self._queue_last_seen:
+            self._queue_last_seen[queue] = time.monotonic()
+
+    def is_subscribed(self, queue: asyncio.Queue) -> bool:
+        return queue in self._queue_last_seen
+
+    def reap(self, max_idle: float, now: Optional[float] = None) -> int:
+        # 제너레이터가 정리되지 못하고 남긴 큐를 제거한다
+        now = time.monotonic() if now is None else now
+        stale = [q for q, seen in self._queue_last_seen.items() if now - seen > max_idle]
+        for queue in stale:
+            user_id = self._queue_to_user_id.get(queue)
+            if user_id is not None:
+                self.remove_user_subscriber(user_id, queue)
+            else:
+                for room_id in list(self._queue_to_room_ids.get(queue, set())):
+                    self._detach(queue, room_id)
+                self._forget(queue)
+        return len(stale)
+
+    def stats(self) -> dict:
+        rooms = {
+            room_id: {"subscribers": len(queues), "queued": sum(q.qsize() for q in queues)}
+            for room_id, queues in self._room_id_to_queues.items()
+        }
+        return {
+            "subscribers": len(self._queue_last_seen),
+            "userStreams": len(self._queue_to_user_id),
+            "rooms": rooms,
+        }
+
+    def backlog(self) -> int:
+        # 전체 구독 큐에 쌓인 이벤트 수
+        return sum(q.qsize() for q in list(self._queue_last_seen))
+
+    def _new_queue(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_QUEUE_MAXSIZE)
+        self._loop = asyncio.get_running_loop()
+        self._queue_to_room_ids[queue] = set()
+        self._queue_last_seen[queue] = time.monotonic()
+        return queue
+
+    def _attach(self, queue: asyncio.Queue, room_id: int) -> None:
+        self._room_id_to_queues[room_id].add(queue)
+        self._queue_to_room_ids[queue].add(room_id)
+
+    def _detach(self, queue: asyncio.Queue, room_id: int) -> None:
+        queues = self._room_id_to_queues.get(room_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                self._room_id_to_queues.pop(room_id, None)
+        room_ids = self._queue_to_room_ids.get(queue)
+        if room_ids is not None:
+            room_ids.discard(room_id)
+
+    def _forget(self, queue: asyncio.Queue) -> None:
+        self._queue_to_room_ids.pop(queue, None)
+        self._queue_to_user_id.pop(queue, None)
+        self._queue_last_seen.pop(queue, None)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, payload: dict) -> None:
+        try:
+            queue.put_nowait(payload)
+        except Exception:
+            # Drop if queue is closed or full
+            pass
 
 
 bus = RoomEventBus()
 
 
+def _subscriber_gauges():
+    yield (), len(bus._queue_last_seen)
+
+
+def _room_gauges():
+    yield (), len(bus._room_id_to_queues)
+
+
+def _queue_depth_gauges():
+    depths = [q.qsize() for q in bus._queue_last_seen]
+    yield ("total",), sum(depths)
+    yield ("max",), max(depths, default=0)
+
+
+registry.gauge("qa_sse_subscribers", "Live SSE subscriber queues", callback=_subscriber_gauges)
+registry.gauge("qa_sse_rooms", "Rooms with at least one SSE subscriber", callback=_room_gauges)
+registry.gauge(
+    "qa_sse_queue_depth", "Events waiting in RoomEventBus queues", ("stat",), callback=_queue_depth_gauges
+)
+
+
+async def run_reaper() -> None:
+    while True:
+        await asyncio.sleep(SSE_REAP_INTERVAL)
+        reaped = bus.reap(SSE_REAP_IDLE)
+        if reaped:
+            log.warning("sse.reaped", subscriptions=reaped)
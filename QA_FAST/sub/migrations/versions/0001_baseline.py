@@ -0,0 +1,188 @@
+"""baseline: schema previously created by on_startup
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+import os
+from datetime import date
+from typing import List, Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 새 DB와 예전 시작 시 DDL로 만들어진 DB 모두에서 같은 결과가 되도록 IF NOT EXISTS로 작성한다.
+# 파티션 모드(MESSAGE_PARTITIONING)는 서버와 같은 값으로 실행해야 한다.
+# 애플리케이션 코드(app.db.partitioning, app.db.search)를 임포트하지 않고 DDL을 이 파일에 고정한다.
+# 서버 코드가 바뀌어도 이 리비전의 결과는 바뀌지 않고, `upgrade head --sql`(오프라인)로도 출력할 수 있다.
+MESSAGE_PARTITIONING = os.getenv("MESSAGE_PARTITIONING", "").strip().lower()
+MESSAGE_HASH_PARTITIONS = int(os.getenv("MESSAGE_HASH_PARTITIONS", "16"))
+MESSAGE_PARTITION_MONTHS_AHEAD = int(os.getenv("MESSAGE_PARTITION_MONTHS_AHEAD", "3"))
+_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS message (
+        id SERIAL NOT NULL,
+        room_id INTEGER NOT NULL,
+        sender_id INTEGER NOT NULL,
+        to_user_id INTEGER,
+        content VARCHAR(4000) NOT NULL,
+        seq INTEGER NOT NULL,
+        reply_to_id INTEGER,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS room_version (
+        room_id INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        PRIMARY KEY (room_id)
+    )
+    """,
+]
+
+# 예전 시작 시 DDL이 단계적으로 추가하던 컬럼 (ADD COLUMN은 파티션에도 전파된다)
+_COLUMNS = [
+    "ALTER TABLE message ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64) NULL",
+    "ALTER TABLE message ADD COLUMN IF NOT EXISTS reply_count INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE message ADD COLUMN IF NOT EXISTS last_reply_seq INTEGER NULL",
+    "ALTER TABLE message ADD COLUMN IF NOT EXISTS edited_at TIMESTAMP NULL",
+    "ALTER TABLE message ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP NULL",
+    "ALTER TABLE message ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0",
+    # 기존 행은 nextval 기본값으로 채워진다
+    "ALTER TABLE message ADD COLUMN IF NOT EXISTS change_id BIGINT NOT NULL DEFAULT nextval('message_change_id_seq')",
+]
+
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_message_room_id_seq ON message (room_id, seq)",
+    "CREATE INDEX IF NOT EXISTS ix_message_reply_to_id_seq ON message (reply_to_id, seq)",
+    "CREATE INDEX IF NOT EXISTS ix_message_room_id_version ON message (room_id, version)",
+    "CREATE INDEX IF NOT EXISTS ix_message_change_id ON message (change_id)",
+]
+
+# 단일 힙 테이블 전용
+_HEAP_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_message_room_id ON message (room_id)",
+    "CREATE INDEX IF NOT EXISTS ix_message_sender_id ON message (sender_id)",
+    "CREATE INDEX IF NOT EXISTS ix_message_to_user_id ON message (to_user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_message_seq ON message (seq)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_message_idempotency_key ON message (room_id, sender_id, idempotency_key)",
+]
+
+
+_PARTITIONED_COLUMNS = """
+    id SERIAL,
+    room_id INTEGER NOT NULL,
+    sender_id INTEGER NOT NULL,
+    to_user_id INTEGER,
+    content VARCHAR(4000) NOT NULL,
+    seq INTEGER NOT NULL,
+    reply_to_id INTEGER,
+    created_at TIMESTAMP NOT NULL,
+    idempotency_key VARCHAR(64),
+    reply_count INTEGER NOT NULL DEFAULT 0,
+    last_reply_seq INTEGER,
+    edited_at TIMESTAMP,
+    deleted_at TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 0,
+    change_id BIGINT NOT NULL DEFAULT nextval('message_change_id_seq')
+"""
+
+# 메시지 검색용. 생성 컬럼/GIN 인덱스라 INSERT 시 Postgres가 증분으로 유지한다.
+# - content_tsv: 'simple' 설정(형태소 분석 없음)의 tsvector -> 공백 단위 토큰 검색
+# - pg_trgm: 조사가 붙는 한국어 등 토큰 일치가 어려운 경우의 부분 문자열 검색
+_SEARCH = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE message ADD COLUMN IF NOT EXISTS content_tsv tsvector"
+    " GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_message_content_tsv ON message USING gin (content_tsv)",
+    "CREATE INDEX IF NOT EXISTS ix_message_content_trgm ON message USING gin (content gin_trgm_ops)",
+]
+
+
+def _add_months(d: date, months: int) -> date:
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _if_partitioned(statement: str) -> str:
+    # 기존 단일 힙 테이블은 변환하지 않으므로 파티션 테이블일 때만 자식 테이블을 만든다
+    return (
+        "DO $$ BEGIN IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('message')) = 'p' THEN "
+        f"{statement}; END IF; END $$"
+    )
+
+
+def _partitioned_tables(mode: str) -> List[str]:
+    if mode == "month":
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS message ({_PARTITIONED_COLUMNS}, PRIMARY KEY (id, created_at))"
+            " PARTITION BY RANGE (created_at)"
+        ]
+        # 이번 달부터 MESSAGE_PARTITION_MONTHS_AHEAD개월 뒤까지 (이후는 서버의 파티션 유지 작업이 만든다)
+        this_month = date.today().replace(day=1)
+        for offset in range(MESSAGE_PARTITION_MONTHS_AHEAD + 1):
+            start, end = _add_months(this_month, offset), _add_months(this_month, offset + 1)
+            statements.append(
+                _if_partitioned(
+                    f"CREATE TABLE IF NOT EXISTS message_y{start.year:04d}m{start.month:02d} PARTITION OF message"
+                    f" FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                )
+            )
+        return statements
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS message ({_PARTITIONED_COLUMNS}, PRIMARY KEY (id, room_id))"
+        " PARTITION BY HASH (room_id)"
+    ]
+    for i in range(MESSAGE_HASH_PARTITIONS):
+        statements.append(
+            _if_partitioned(
+                f"CREATE TABLE IF NOT EXISTS message_p{i} PARTITION OF message"
+                f" FOR VALUES WITH (MODULUS {MESSAGE_HASH_PARTITIONS}, REMAINDER {i})"
+            )
+        )
+    return statements
+
+
+def _partitioned_indexes(mode: str) -> List[str]:
+    # 파티션 테이블의 unique 인덱스는 파티션 키를 포함해야 하므로 hash 모드에서만 unique
+    unique = "UNIQUE " if mode == "hash" else ""
+    return [
+        "CREATE INDEX IF NOT EXISTS ix_message_sender_id ON message (sender_id)",
+        "CREATE INDEX IF NOT EXISTS ix_message_to_user_id ON message (to_user_id)",
+        "CREATE INDEX IF NOT EXISTS brin_message_created_at ON message USING brin (created_at)",
+        f"CREATE {unique}INDEX IF NOT EXISTS uq_message_idempotency_key"
+        " ON message (room_id, sender_id, idempotency_key)",
+    ]
+
+
+def upgrade() -> None:
+    partitioned = MESSAGE_PARTITIONING in ("month", "hash")
+    statements = ["CREATE SEQUENCE IF NOT EXISTS message_change_id_seq"]
+    if partitioned:
+        # 파티션 테이블은 일반 CREATE TABLE보다 먼저 만들어야 단일 힙으로 생성되지 않는다
+        statements += _partitioned_tables(MESSAGE_PARTITIONING)
+    statements += _TABLES + _COLUMNS + _INDEXES
+    statements += _partitioned_indexes(MESSAGE_PARTITIONING) if partitioned else _HEAP_INDEXES
+    for statement in statements + _SEARCH:
+        op.execute(statement)
+    # pub의 messages에 걸려 있던 예전 NOTIFY 트리거 (구독자 없음) 제거
+    op.execute(
+        "DO $$ BEGIN IF to_regclass('messages') IS NOT NULL THEN"
+        " DROP TRIGGER IF EXISTS trg_message_notify ON messages; END IF; END $$"
+    )
+    op.execute("DROP FUNCTION IF EXISTS notify_message_insert()")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS room_version")
+    op.execute("DROP TABLE IF EXISTS message")
+    op.execute("DROP SEQUENCE IF EXISTS message_change_id_seq")
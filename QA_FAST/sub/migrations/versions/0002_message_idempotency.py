@@ -0,0 +1,39 @@
+"""message_idempotency: unique publish keys outside the partitioned message table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "message_idempotency",
+        sa.Column("room_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("sender_id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("idempotency_key", sa.String(length=64), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("room_id", "sender_id", "idempotency_key"),
+    )
+    # 기존 메시지의 키도 등록해 둔다 (month 모드에서 이미 생긴 중복은 한 번만)
+    op.execute(
+        "INSERT INTO message_idempotency (room_id, sender_id, idempotency_key, created_at)"
+        " SELECT room_id, sender_id, idempotency_key, min(created_at) FROM message"
+        " WHERE idempotency_key IS NOT NULL GROUP BY room_id, sender_id, idempotency_key"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("message_idempotency")
@@ -0,0 +1,61 @@
+import pytest
+
+from app.admission import AdmissionController, LoadShedder, Rejected
+
+
+def test_sender_bucket_limits_burst_and_refills():
+    ctl = AdmissionController((1, 2), (100, 100), (100, 100))
+    ctl.admit(1, 10, now=0.0)
+    ctl.admit(1, 10, now=0.0)
+    with pytest.raises(Rejected) as exc:
+        ctl.admit(1, 10, now=0.0)
+    assert exc.value.code == 'rate_limited'
+    assert exc.value.scope == 'sender'
+    assert exc.value.retry_after == pytest.approx(1.0)
+
+    # 다른 발신자는 영향을 받지 않고, 거절된 요청은 룸 예산을 쓰지 않는다
+    ctl.admit(2, 10, now=0.0)
+    ctl.admit(1, 10, now=1.0)
+
+
+def test_worker_share_and_room_scope():
+    ctl = AdmissionController((100, 100), (2, 4), (0, 0), workers=2)
+    ctl.admit(1, 10, now=0.0)
+    ctl.admit(2, 10, now=0.0)
+    with pytest.raises(Rejected) as exc:
+        ctl.admit(3, 10, now=0.0)
+    assert exc.value.scope == 'room'
+
+
+def test_shedder_rejects_when_pool_is_exhausted():
+    class Pool:
+        _max_overflow = 2
+        busy = 0
+
+        def size(self):
+            return 3
+
+        def checkedout(self):
+            return self.busy
+
+    pool = Pool()
+    shedder = LoadShedder(pool, lambda: 0, pool_utilization=1.0, max_backlog=10)
+    shedder.check(now=0.0)
+    pool.busy = 5
+    with pytest.raises(Rejected) as exc:
+        shedder.check(now=0.0)
+    assert (exc.value.code, exc.value.scope) == ('overloaded', 'pool')
+
+
+def test_refund_returns_tokens_for_unsaved_publish():
+    ctl = AdmissionController((1, 1), (100, 100), (0, 0))
+    ctl.admit("ws-1", 10, now=0.0)
+    ctl.refund("ws-1", 10, now=0.0)
+    ctl.admit("ws-1", 10, now=0.0)
+    with pytest.raises(Rejected):
+        ctl.admit("ws-1", 10, now=0.0)
+    # 버킷은 burst를 넘어 채워지지 않는다
+    ctl.refund("ws-2", 10, now=0.0)
+    ctl.admit("ws-2", 10, now=0.0)
+    with pytest.raises(Rejected):
+        ctl.admit("ws-2", 10, now=0.0)
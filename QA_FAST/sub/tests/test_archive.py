@@ -0,0 +1,18 @@
+from app.pipeline import _seq_after
+from qa_common import archive
+from qa_common.archive import RoomArchive
+
+
+def _messages(first, last):
+    return [{"id": seq, "roomId": 1, "seq": seq, "content": f"m{seq}"} for seq in range(first, last + 1)]
+
+
+def test_publish_after_fully_archived_room_continues_seq(tmp_path):
+    root = str(tmp_path)
+    archive.append(1, _messages(1, 5), root)
+    # 핫 테이블이 비어도 seq는 1로 돌아가지 않는다
+    assert _seq_after(0, 1, root) == 6
+    assert _seq_after(8, 1, root) == 9
+    assert _seq_after(0, 2, root) == 1
+    archive.append(1, [{"id": 6, "roomId": 1, "seq": 6, "content": "m6"}], root)
+    assert RoomArchive(1, root).last_seq == 6
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from app.models.message import Message
+from app.route.v1.sse import _message_data
+from app.serialization import dumps, message_event, message_response
+
+
+def _message():
+    return Message(
+        id=5, room_id=1, sender_id=2, to_user_id=None, content="hello", seq=9,
+        created_at=datetime(2024, 5, 1), reply_to_id=None, reply_count=0, last_reply_seq=None,
+        edited_at=datetime(2024, 5, 2), deleted_at=None, version=4,
+    )
+
+
+def test_events_share_message_response_shape():
+    response = message_response(_message())
+    event = message_event("message_edited", response, ("id", "roomId", "seq", "content", "editedAt"))
+    assert event == {
+        "type": "message_edited",
+        "id": 5,
+        "roomId": 1,
+        "seq": 9,
+        "content": "hello",
+        "editedAt": "2024-05-02T00:00:00Z",
+    }
+    # SSE message 이벤트는 REST 응답과 같은 모양 (추적 정보는 TRACE_DEBUG에서만)
+    assert _message_data(dict(response, traceId="t", trace=[("commit", 1.0)])) == response
+    assert dumps({"content": "안녕"}) == '{"content":"안녕"}'
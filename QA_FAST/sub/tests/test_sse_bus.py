@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from app.sse_bus import RoomEventBus
+
+
+def test_user_subscriber_multiplexes_rooms_and_follows_membership():
+    async def scenario():
+        bus = RoomEventBus()
+        queue = bus.add_user_subscriber(7, [1, 2])
+
+        bus.publish(1, {'roomId': 1, 'seq': 1})
+        bus.publish(2, {'roomId': 2, 'seq': 1})
+        bus.publish(3, {'roomId': 3, 'seq': 1})
+        got = [queue.get_nowait(), queue.get_nowait()]
+        assert sorted(p['roomId'] for p in got) == [1, 2]
+        assert queue.empty()
+
+        bus.join_room(7, 3)
+        assert queue.get_nowait()['type'] == 'room_joined'
+        bus.publish(3, {'roomId': 3, 'seq': 2})
+        assert queue.get_nowait()['roomId'] == 3
+
+        bus.leave_room(7, 1)
+        assert queue.get_nowait()['type'] == 'room_left'
+        bus.publish(1, {'roomId': 1, 'seq': 2})
+        assert queue.empty()
+
+        bus.remove_user_subscriber(7, queue)
+        bus.publish(2, {'roomId': 2, 'seq': 2})
+        assert queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_reaper_removes_orphaned_subscriptions():
+    async def scenario():
+        bus = RoomEventBus()
+        live = bus.add_subscriber(1)
+        orphan = bus.add_subscriber(1)
+        user_orphan = bus.add_user_subscriber(9, [1, 2])
+
+        bus._queue_last_seen[orphan] -= 1000
+        bus._queue_last_seen[user_orphan] -= 1000
+        assert bus.reap(max_idle=60) == 2
+
+        assert bus.is_subscribed(live)
+        assert not bus.is_subscribed(orphan)
+        assert not bus.is_subscribed(user_orphan)
+        stats = bus.stats()
+        assert stats['subscribers'] == 1
+        assert stats['rooms'] == {1: {'subscribers': 1, 'queued': 0}}
+
+        bus.touch(orphan)
+        assert not bus.is_subscribed(orphan)
+
+    asyncio.run(scenario())
+
+
+def test_publish_from_worker_thread_is_delivered_on_loop():
+    async def scenario():
+        bus = RoomEventBus()
+        queue = bus.add_subscriber(5)
+        await asyncio.to_thread(bus.publish, 5, {'roomId': 5, 'seq': 1})
+        payload = await asyncio.wait_for(queue.get(), timeout=1)
+        assert payload['seq'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_user_stream_keeps_joins_that_arrive_before_membership_is_read():
+    async def scenario():
+        bus = RoomEventBus()
+        queue = bus.add_user_subscriber(7, ())
+        # 멤버십 조회 중에 다른 워커에서 온 join
+        bus.join_room(7, 3)
+        assert queue.get_nowait()['type'] == 'room_joined'
+        bus.add_rooms(queue, [1, 3])
+        bus.publish(3, {'roomId': 3, 'seq': 1})
+        bus.publish(1, {'roomId': 1, 'seq': 1})
+        assert sorted(queue.get_nowait()['roomId'] for _ in range(2)) == [1, 3]
+
+    asyncio.run(scenario())
+
+
+def test_membership_notify_from_other_worker_is_applied(monkeypatch):
+    from app import membership
+
+    calls = []
+    monkeypatch.setattr(membership, "_apply", lambda *args: calls.append(args))
+    membership._on_notify(json.dumps({"worker": "other", "userId": 7, "roomId": 3, "joined": True}))
+    membership._on_notify(json.dumps({"worker": membership.WORKER_ID, "userId": 7, "roomId": 4, "joined": True}))
+    membership._on_notify("not json")
+    assert calls == [(7, 3, True)]